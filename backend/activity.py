@@ -0,0 +1,196 @@
+"""
+In-memory sliding-window detector for suspicious verification activity
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from .models import DatabaseManager, VerificationLog
+
+
+def risk_level(failed_attempts: int) -> str:
+    """Map a failure count to the risk levels used by check_suspicious_activity()"""
+    if failed_attempts >= 5:
+        return 'critical'
+    if failed_attempts >= 3:
+        return 'high'
+    if failed_attempts >= 1:
+        return 'medium'
+    return 'low'
+
+
+class SuspiciousActivityDetector:
+    """Per-email and per-IP sliding-window counters of failed verification attempts
+
+    Mirrors the ``check_suspicious_activity()`` SQL function: an email is
+    suspicious once it has ``email_threshold`` failed attempts inside the
+    window. IP addresses are flagged at ``ip_threshold`` failed attempts.
+    Blocked attempts do not count toward it: a blocked client retrying
+    would otherwise keep its own IP (and, without a trusted proxy setting,
+    every user behind the same proxy) locked out indefinitely.
+
+    State is seeded from ``verification_logs`` in a background thread and
+    kept current by ``record``. Until the first seed completes the detector
+    is cold and ``check`` returns None so callers fall back to SQL, applying
+    the IP rule with ``with_ip_failures``. Each
+    process only observes its own writes between seeds, so deployments with
+    several workers should set ``resync_interval`` to re-seed periodically.
+    """
+
+    def __init__(self, window: float = 3600.0, email_threshold: int = 3,
+                 ip_threshold: int = 20, resync_interval: float = 0.0):
+        self.window = window
+        self.email_threshold = email_threshold
+        self.ip_threshold = ip_threshold
+        self.resync_interval = resync_interval
+
+        self._lock = threading.Lock()
+        # email -> deque of failure timestamps (oldest on the left)
+        self._email_failures = {}
+        # ip -> deque of failure timestamps
+        self._ip_failures = {}
+        self._warm = False
+        self._seeder = None
+        self._pid = None
+        self._last_sweep = time.time()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def start(self, db_manager: DatabaseManager):
+        """Seed in the background, then keep re-seeding every ``resync_interval`` seconds"""
+        with self._lock:
+            if self._seeder is not None and self._pid == os.getpid() and self._seeder.is_alive():
+                return
+            self._pid = os.getpid()
+            self._seeder = threading.Thread(
+                target=self._seed_loop, args=(db_manager,),
+                name='suspicious-activity-seeder', daemon=True
+            )
+            self._seeder.start()
+
+    def seed(self, db_manager: DatabaseManager) -> bool:
+        """Rebuild the counters from verification_logs inside the current window"""
+        started = time.time()
+        rows = db_manager.get_recent_failures(
+            datetime.fromtimestamp(started - self.window),
+            datetime.fromtimestamp(started)
+        )
+        if rows is None:
+            return False
+
+        self.load(rows, started)
+        return True
+
+    def load(self, rows, started: float):
+        """Replace the counters with ``(email, ip_address, status, created_at)`` rows read at ``started``"""
+        email_failures = {}
+        ip_failures = {}
+        for email, ip_address, status, created_at in rows:
+            ts = created_at.timestamp()
+            if status == 'failed':
+                email_failures.setdefault(email, deque()).append(ts)
+                if ip_address:
+                    ip_failures.setdefault(ip_address, deque()).append(ts)
+
+        with self._lock:
+            # Keep events recorded locally while the seed query was running
+            self._merge_since(email_failures, self._email_failures, started)
+            self._merge_since(ip_failures, self._ip_failures, started)
+            self._email_failures = email_failures
+            self._ip_failures = ip_failures
+            self._warm = True
+
+    def record(self, log: VerificationLog):
+        """Account for a verification attempt as it is logged"""
+        if log.verification_status != 'failed':
+            return
+
+        ts = log.created_at.timestamp() if log.created_at else time.time()
+        with self._lock:
+            self._email_failures.setdefault(log.email, deque()).append(ts)
+            if log.ip_address:
+                self._ip_failures.setdefault(log.ip_address, deque()).append(ts)
+
+            if ts - self._last_sweep > self.window:
+                self._sweep(ts)
+
+    def check(self, email: str, ip_address: Optional[str] = None) -> Optional[dict]:
+        """Return the same shape as check_suspicious_activity(), or None while cold"""
+        if not self._warm:
+            return None
+
+        cutoff = time.time() - self.window
+        with self._lock:
+            failures = self._trim(self._email_failures, email, cutoff)
+            failed_attempts = len(failures)
+            last_failure = failures[-1] if failures else None
+            ip_attempts = len(self._trim(self._ip_failures, ip_address, cutoff)) if ip_address else 0
+
+        result = {
+            'is_suspicious': failed_attempts >= self.email_threshold,
+            'failed_attempts': failed_attempts,
+            'last_failure': datetime.fromtimestamp(last_failure) if last_failure else None,
+            'risk_level': risk_level(failed_attempts)
+        }
+        if ip_address:
+            self.with_ip_failures(result, ip_attempts)
+        return result
+
+    def with_ip_failures(self, result: dict, ip_failed_attempts: int) -> dict:
+        """Apply the per-IP rule to a ``check`` or check_suspicious_activity() result"""
+        result['ip_failed_attempts'] = ip_failed_attempts
+        result['is_suspicious'] = bool(result.get('is_suspicious')) or ip_failed_attempts >= self.ip_threshold
+        return result
+
+    def ip_failed_attempts(self, ip_address: Optional[str]) -> Optional[int]:
+        """Failed attempts from ``ip_address`` inside the window, or None while cold"""
+        if not self._warm:
+            return None
+        if not ip_address:
+            return 0
+        cutoff = time.time() - self.window
+        with self._lock:
+            return len(self._trim(self._ip_failures, ip_address, cutoff))
+
+    def _seed_loop(self, db_manager: DatabaseManager):
+        while True:
+            if not self.seed(db_manager) and not self._warm:
+                # Keep retrying quickly until the first seed succeeds
+                time.sleep(5)
+                continue
+            if not self.resync_interval:
+                return
+            time.sleep(self.resync_interval)
+
+    @staticmethod
+    def _trim(buckets: dict, key: Optional[str], cutoff: float) -> deque:
+        """Drop expired timestamps for ``key``; caller holds the lock"""
+        events = buckets.get(key)
+        if not events:
+            return deque()
+        while events and events[0] < cutoff:
+            events.popleft()
+        if not events:
+            del buckets[key]
+        return events
+
+    def _sweep(self, now: float):
+        """Remove keys with no events left in the window; caller holds the lock"""
+        cutoff = now - self.window
+        for buckets in (self._email_failures, self._ip_failures):
+            for key in [key for key, events in buckets.items() if events[-1] < cutoff]:
+                del buckets[key]
+        self._last_sweep = now
+
+    @staticmethod
+    def _merge_since(target: dict, source: dict, since: float):
+        for key, events in source.items():
+            recent = [ts for ts in events if ts >= since]
+            if recent:
+                merged = target.setdefault(key, deque())
+                merged.extend(recent)
@@ -1,16 +1,37 @@
 """
 API routes for GuardIQ VIP verification system
 """
-from flask import Blueprint, request, jsonify
-from datetime import datetime
-import re
-from .models import DatabaseManager, VerificationLog
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from datetime import datetime, timezone
+from typing import List, Optional
+from werkzeug.local import LocalProxy
+import json
+import threading
+import time
+import uuid
+from .models import ACCESS_CODE_MAX_LENGTH, EMAIL_MAX_LENGTH, DatabaseManager, SecurityEvent, VerificationLog, is_valid_email
+from .log_writer import VerificationLogWriter
+from .activity import SuspiciousActivityDetector, risk_level
+from .stats_cache import StatisticsCache
+from .security_events import SEVERITIES, URGENT, EventBus, SecurityEventRelay, SecurityEventWriter, event_payload, severities_from
+from .user_cache import VIPUserCache, VIPUserCacheListener
+from .ingest import INGEST_ROWS, INGEST_STAGE_LATENCY, PLATFORMS, THREAT_TYPES, DetectionIngestor, validate_detection
+from .matching import VIPMatcher
+from .campaign_graph import CampaignGraphIndex
+from .partitions import PartitionMaintainer
+from .timeseries import DETECTION_GROUPS, INTERVALS, VERIFICATION_STATUSES, RollupCompactor, dense, detection_rows, time_range
+from .export import FORMATS, THREAT_DETECTIONS, VERIFICATION_LOGS, export_chunks
+from .rate_limit import MemoryStore, RateLimiter, RedisStore, RejectionLog, build_rules, parse_limit
+from .rules import RuleEngine, SUCCESS, INVALID_ROLE, INVALID_PLATFORM
+from .metrics import count_error, registry
+from .auth import require_api_key
+from .warmup import Warmup
 from .config import Config
 
 # Create blueprint
 api = Blueprint('api', __name__, url_prefix='/api')
 
-# Initialize database manager
+# Database manager, built on first use
 db_config = {
     'host': Config.DB_HOST,
     'database': Config.DB_NAME,
@@ -18,37 +39,332 @@ db_config = {
     'password': Config.DB_PASSWORD,
     'port': Config.DB_PORT
 }
-db_manager = DatabaseManager(db_config)
+pool_config = {
+    'min_size': Config.DB_POOL_MIN_SIZE,
+    'max_size': Config.DB_POOL_MAX_SIZE,
+    'timeout': Config.DB_POOL_TIMEOUT,
+    'max_lifetime': Config.DB_POOL_MAX_LIFETIME,
+    'max_idle': Config.DB_POOL_MAX_IDLE,
+    'health_check_after': Config.DB_POOL_HEALTH_CHECK_AFTER
+}
+# verify_vip_user results, invalidated on roster changes
+user_cache = VIPUserCache(
+    max_size=Config.VIP_USER_CACHE_SIZE,
+    ttl=Config.VIP_USER_CACHE_TTL,
+    negative_ttl=Config.VIP_USER_CACHE_NEGATIVE_TTL
+) if Config.VIP_USER_CACHE_SIZE > 0 else None
+_db_manager = None
+_db_lock = threading.Lock()
+
+def get_db_manager() -> DatabaseManager:
+    """The application DatabaseManager; its pool opens connections on first use"""
+    global _db_manager
+    if _db_manager is None:
+        with _db_lock:
+            if _db_manager is None:
+                _db_manager = DatabaseManager(db_config, pool_config, user_cache=user_cache)
+    return _db_manager
+
+# Importing this module never touches the database: the workers below hold
+# the proxy and resolve it when they first run
+db_manager = LocalProxy(get_db_manager)
+user_cache_listener = VIPUserCacheListener(
+    user_cache, lambda: db_manager.get_connection_or_raise(), channel=Config.VIP_USER_CACHE_CHANNEL
+) if user_cache is not None and Config.VIP_USER_CACHE_LISTEN else None
+
+# Verification logs are written behind the request by a background worker
+log_writer = VerificationLogWriter(
+    db_manager,
+    max_queue=Config.LOG_QUEUE_SIZE,
+    batch_size=Config.LOG_BATCH_SIZE,
+    flush_interval=Config.LOG_FLUSH_INTERVAL,
+    enqueue_timeout=Config.LOG_ENQUEUE_TIMEOUT,
+    spill_path=Config.LOG_SPILL_PATH,
+    retry_interval=Config.LOG_RETRY_INTERVAL
+)
+
+# Answers suspicious-activity checks from memory once seeded
+activity_detector = SuspiciousActivityDetector(
+    window=Config.SUSPICIOUS_WINDOW,
+    email_threshold=Config.SUSPICIOUS_EMAIL_THRESHOLD,
+    ip_threshold=Config.SUSPICIOUS_IP_THRESHOLD,
+    resync_interval=Config.SUSPICIOUS_RESYNC_INTERVAL
+)
+
+# Shared by /vip-stats and /security-status
+stats_cache = StatisticsCache(
+    lambda: db_manager.get_vip_statistics(),
+    ttl=Config.STATS_CACHE_TTL,
+    stale_while_revalidate=Config.STATS_STALE_WHILE_REVALIDATE,
+    max_stale=Config.STATS_MAX_STALE
+)
+
+# Security events: written in batches and fanned out to /security-events/stream
+security_event_writer = SecurityEventWriter(
+    db_manager,
+    max_queue=Config.SECURITY_EVENT_QUEUE_SIZE,
+    batch_size=Config.SECURITY_EVENT_BATCH_SIZE,
+    flush_interval=Config.SECURITY_EVENT_FLUSH_INTERVAL,
+    channel=Config.SECURITY_EVENT_CHANNEL or None
+)
+security_event_bus = EventBus(
+    max_subscribers=Config.SECURITY_EVENT_MAX_SUBSCRIBERS,
+    queue_size=Config.SECURITY_EVENT_SUBSCRIBER_QUEUE
+)
+# Events other workers wrote, relayed so every stream sees all of them
+security_event_relay = SecurityEventRelay(
+    security_event_bus, lambda: db_manager.get_connection_or_raise(), channel=Config.SECURITY_EVENT_CHANNEL
+) if Config.SECURITY_EVENT_CHANNEL else None
+
+# Compiled verification rules; hot-reloaded from a file or the database
+rule_engine = RuleEngine(
+    path=Config.VERIFICATION_RULES_PATH if Config.VERIFICATION_RULES_SOURCE == 'file' else None,
+    db_manager=db_manager if Config.VERIFICATION_RULES_SOURCE == 'database' else None,
+    reload_interval=Config.VERIFICATION_RULES_RELOAD_INTERVAL
+)
+
+# Gauges read from the pool, queue and caches at scrape time
+registry.callback(
+    'guardiq_db_pool_connections', 'Pooled database connections by state',
+    lambda: {(state,): db_manager.pool_stats()[state] for state in ('in_use', 'idle', 'waiting')},
+    ('state',)
+)
+registry.callback(
+    'guardiq_db_pool_events_total', 'Connection pool lifecycle events',
+    lambda: {(event,): db_manager.pool_stats()[event] for event in ('created', 'recycled', 'checkouts', 'timeouts')},
+    ('event',), type_name='counter'
+)
+registry.callback('guardiq_log_queue_depth', 'Verification logs waiting to be written',
+                  lambda: log_writer.stats()['queued'])
+registry.callback(
+    'guardiq_log_writer_rows_total', 'Verification log rows by outcome',
+    lambda: {(outcome,): log_writer.stats()[outcome] for outcome in ('written', 'spilled', 'replayed', 'rejected')},
+    ('outcome',), type_name='counter'
+)
+registry.callback('guardiq_security_event_queue_depth', 'Security events waiting to be written',
+                  lambda: security_event_writer.stats()['queued'])
+registry.callback('guardiq_security_event_subscribers', 'Open security event streams',
+                  lambda: security_event_bus.stats()['subscribers'])
+registry.callback('guardiq_suspicious_detector_warm', 'Whether the suspicious-activity detector is seeded',
+                  lambda: activity_detector.is_warm)
+registry.callback(
+    'guardiq_stats_cache_requests_total', 'Statistics cache lookups by result',
+    lambda: {(result,): stats_cache.stats()[result] for result in ('hits', 'misses', 'refreshes')},
+    ('result',), type_name='counter'
+)
+registry.callback(
+    'guardiq_vip_user_cache_events_total', 'verify_vip_user cache events',
+    lambda: {(event,): user_cache.stats()[event] for event in ('hits', 'misses', 'invalidations', 'evictions')}
+    if user_cache is not None else {},
+    ('event',), type_name='counter'
+)
+
+# Token buckets checked before each handler; rejections are logged in aggregate
+_default_limits, _endpoint_limits = build_rules(
+    Config.RATE_LIMIT_DEFAULT_IP, Config.RATE_LIMIT_DEFAULT_EMAIL, json.loads(Config.RATE_LIMIT_RULES)
+)
+rate_limiter = RateLimiter(
+    RedisStore(Config.RATE_LIMIT_STORAGE_URL) if Config.RATE_LIMIT_STORAGE_URL else MemoryStore(),
+    global_limit=parse_limit(Config.RATE_LIMIT_GLOBAL),
+    default=_default_limits,
+    rules=_endpoint_limits,
+    exempt=Config.RATE_LIMIT_EXEMPT,
+    rejection_log=RejectionLog(log_writer.submit, interval=Config.RATE_LIMIT_LOG_INTERVAL)
+)
+
+# Supabase database holding threat_detections, connected on first use
+_supabase_db_manager = None
+_supabase_db_lock = threading.Lock()
+
+def get_supabase_db_manager() -> Optional[DatabaseManager]:
+    """DatabaseManager for the Supabase Postgres, or None when SUPABASE_DB_URL is unset"""
+    global _supabase_db_manager
+    if not Config.SUPABASE_DB_URL:
+        return None
+    with _supabase_db_lock:
+        if _supabase_db_manager is None:
+            _supabase_db_manager = DatabaseManager(
+                {'dsn': Config.SUPABASE_DB_URL},
+                {'min_size': 0, 'max_size': Config.SUPABASE_DB_POOL_MAX_SIZE, 'timeout': Config.DB_POOL_TIMEOUT}
+            )
+    return _supabase_db_manager
+
+# Write pipeline for threat detections posted by scanners
+detection_ingestor = DetectionIngestor(
+    get_supabase_db_manager,
+    max_queue=Config.INGEST_QUEUE_SIZE,
+    batch_size=Config.INGEST_BATCH_SIZE,
+    flush_interval=Config.INGEST_FLUSH_INTERVAL
+)
+registry.callback('guardiq_ingest_queue_depth', 'Threat detections waiting to be written',
+                  lambda: detection_ingestor.stats()['queued'])
+
+# Folds verification_rollup_deltas into the dashboard rollups
+rollup_compactor = RollupCompactor(db_manager, interval=Config.ROLLUP_COMPACT_INTERVAL)
+
+# Creates upcoming monthly verification_logs partitions
+partition_maintainer = PartitionMaintainer(
+    db_manager, months_ahead=Config.PARTITION_MONTHS_AHEAD, interval=Config.PARTITION_MAINTENANCE_INTERVAL
+)
+
+# Compiled VIP names, keywords and handles for /api/scan
+vip_matcher = VIPMatcher(
+    get_supabase_db_manager,
+    refresh_interval=Config.SCAN_REFRESH_INTERVAL,
+    full_sync_every=Config.SCAN_FULL_SYNC_EVERY,
+    fuzzy_min_length=Config.SCAN_FUZZY_MIN_LENGTH
+)
+
+# Account co-occurrence graph over campaign_networks
+campaign_graph = CampaignGraphIndex(
+    get_supabase_db_manager,
+    refresh_interval=Config.CAMPAIGN_GRAPH_REFRESH_INTERVAL,
+    full_sync_every=Config.CAMPAIGN_GRAPH_FULL_SYNC_EVERY,
+    max_group=Config.CAMPAIGN_GRAPH_MAX_GROUP
+)
+
+# Connects to Postgres and primes caches behind the first requests; /ready
+# reports 503 until the database check has passed
+warmup = Warmup(
+    retry_interval=Config.WARMUP_RETRY_INTERVAL,
+    max_retry_interval=Config.WARMUP_MAX_RETRY_INTERVAL
+)
+warmup.add('database', lambda: db_manager.warm_up())
+warmup.add('statistics', lambda: bool(stats_cache.get()), required=False)
+warmup.add('suspicious_activity', lambda: activity_detector.is_warm, required=False)
+
+def start_background_services():
+    """Start per-process background workers"""
+    warmup.start()
+    rule_engine.start()
+    log_writer.start()
+    security_event_writer.start()
+    rate_limiter.start()
+    rollup_compactor.start()
+    partition_maintainer.start()
+    if Config.SUPABASE_DB_URL:
+        detection_ingestor.start()
+        vip_matcher.start()
+        campaign_graph.start()
+    activity_detector.start(db_manager)
+    if user_cache_listener is not None:
+        user_cache_listener.start()
+    if security_event_relay is not None:
+        security_event_relay.start()
+
+def check_suspicious_activity(email: str, ip_address: Optional[str] = None) -> dict:
+    """Check suspicious activity, falling back to SQL while the detector is cold"""
+    result = activity_detector.check(email, ip_address)
+    if result is None:
+        result = db_manager.check_suspicious_activity(email)
+        if ip_address:
+            activity_detector.with_ip_failures(result, ip_failed_attempts(ip_address))
+    return result
+
+def ip_failed_attempts(ip_address: Optional[str]) -> int:
+    """Failed attempts from an IP inside the detector window, counted in SQL while it is cold"""
+    count = activity_detector.ip_failed_attempts(ip_address)
+    if count is None and ip_address:
+        since = datetime.fromtimestamp(time.time() - activity_detector.window)
+        count = db_manager.count_ip_failures(ip_address, since)
+    return count or 0
+
+def check_suspicious_activity_many(emails: List[str]) -> dict:
+    """Suspicious-activity results keyed by email, using one SQL query while the detector is cold"""
+    if activity_detector.is_warm:
+        return {email: activity_detector.check(email) for email in emails}
+    return db_manager.check_suspicious_activity_many(emails)
+
+def record_verification(log: VerificationLog):
+    """Queue a verification log and account for it in the detector and stats cache"""
+    log_writer.submit(log)
+    account_verification(log)
+
+def record_verifications(logs: List[VerificationLog]):
+    """Write a batch of verification logs in one INSERT, queueing them if that fails"""
+    now = datetime.now(timezone.utc)
+    for log in logs:
+        log.created_at = log.created_at or now
+    
+    if not db_manager.log_verification_attempts(logs):
+        for log in logs:
+            log_writer.submit(log)
+    
+    for log in logs:
+        account_verification(log)
+
+def account_verification(log: VerificationLog):
+    """Apply a verification outcome to the in-memory detector and stats cache"""
+    activity_detector.record(log)
+    
+    # The log_security_event() trigger raises a high severity event once an
+    # email reaches the failed-attempt threshold within the hour
+    high_risk = False
+    if log.verification_status == 'failed':
+        activity = activity_detector.check(log.email)
+        high_risk = bool(activity) and activity['failed_attempts'] >= activity_detector.email_threshold
+    stats_cache.record(log, high_risk=high_risk)
+
+def emit_security_event(event: SecurityEvent):
+    """Publish a security event to live streams and queue it for writing"""
+    event.created_at = event.created_at or datetime.now()
+    security_event_bus.publish(event)
+    if event.event_type == 'suspicious_activity':
+        # The log_security_event() trigger already writes a high severity row for
+        # this failure, and account_verification has counted it in the stats cache
+        return
+    security_event_writer.submit(event)
+    if event.severity in URGENT:
+        stats_cache.record_high_risk()
+
+def verification_security_event(fields: dict, status: str, failed_attempts: int,
+                                ip_failed_attempts: int = 0) -> Optional[SecurityEvent]:
+    """Event for a blocked attempt, or a failure that reaches the suspicious-activity threshold
+    
+    ``failed_attempts`` counts the email's failures in the window before this attempt.
+    """
+    window = f"{activity_detector.window / 60:g} minutes"
+    if status == 'blocked':
+        if failed_attempts >= activity_detector.email_threshold:
+            reason = f"{failed_attempts} failed attempts for this email in the last {window}"
+        else:
+            reason = f"{ip_failed_attempts} failed attempts from this IP in the last {window}"
+        return SecurityEvent(
+            event_type='verification_blocked',
+            email=fields['email'],
+            description=f"Verification blocked after {reason}",
+            severity='critical' if failed_attempts >= 5 else 'high',
+            ip_address=request.remote_addr
+        )
+    
+    if status == 'failed' and failed_attempts + 1 >= activity_detector.email_threshold:
+        return SecurityEvent(
+            event_type='suspicious_activity',
+            email=fields['email'],
+            description=f"{failed_attempts + 1} failed verification attempts in the last {window}; "
+                        "further attempts are blocked",
+            severity=risk_level(failed_attempts + 1),
+            ip_address=request.remote_addr
+        )
+    return None
+
+MAX_FOLLOWERS = 10 ** 12
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+    return is_valid_email(email)
 
 def validate_role(role: str) -> bool:
     """Validate role/category"""
-    valid_roles = ['influencer', 'celebrity', 'vip', 'executive', 'content-creator', 'public-figure']
-    return role.lower() in valid_roles
+    return role.lower() in rule_engine.current.roles
 
 def validate_platform(platform: str) -> bool:
     """Validate social media platform"""
-    valid_platforms = ['twitter', 'instagram', 'youtube', 'tiktok', 'linkedin', 'facebook', 'twitch']
-    return platform.lower() in valid_platforms
+    return platform.lower() in rule_engine.current.platforms
 
 def determine_vip_status(role: str, platform: str, followers: int) -> bool:
     """Determine VIP status based on role, platform, and followers"""
-    # VIP criteria based on role and follower count
-    vip_thresholds = {
-        'celebrity': 100000,      # 100K+ followers
-        'influencer': 50000,      # 50K+ followers
-        'vip': 25000,            # 25K+ followers
-        'executive': 10000,       # 10K+ followers
-        'content-creator': 75000, # 75K+ followers
-        'public-figure': 30000    # 30K+ followers
-    }
-    
-    threshold = vip_thresholds.get(role.lower(), 100000)  # Default high threshold
-    return followers >= threshold
+    return followers >= rule_engine.current.threshold_for(role.lower(), platform.lower())
 
 @api.route('/health', methods=['GET'])
 def health_check():
@@ -60,6 +376,107 @@ def health_check():
         'version': '1.0.0'
     })
 
+@api.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 200 once warm-up has connected to the database, 503 until then"""
+    warmup.start()
+    status = warmup.status()
+    status['timestamp'] = datetime.utcnow().isoformat()
+    response = jsonify(status)
+    if not status['ready']:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, round(Config.WARMUP_RETRY_INTERVAL)))
+    return response
+
+def parse_verification_payload(data) -> tuple:
+    """Normalize and validate one verification payload, returning (fields, error)"""
+    if not isinstance(data, dict) or not data:
+        return None, 'No data provided'
+    
+    full_name = str(data.get('fullName') or '').strip()
+    email = str(data.get('email') or '').strip().lower()
+    role = str(data.get('role') or '').strip().lower()
+    platform = str(data.get('platform') or '').strip().lower()
+    followers = data.get('followers', 0)
+    
+    # Validation
+    if not isinstance(followers, (int, float)) or isinstance(followers, bool):
+        return None, 'All fields are required and followers must be non-negative'
+    
+    if not all([full_name, email, role, platform]) or followers < 0:
+        return None, 'All fields are required and followers must be non-negative'
+    
+    if not followers <= MAX_FOLLOWERS:
+        return None, f'followers must be at most {MAX_FOLLOWERS:,}'
+    
+    if len(email) > EMAIL_MAX_LENGTH:
+        return None, f'Email must be at most {EMAIL_MAX_LENGTH} characters'
+    
+    if not validate_email(email):
+        return None, 'Invalid email format'
+    
+    # Role/platform validation and the VIP decision are one rule lookup
+    outcome = rule_engine.current.evaluate(role, platform, followers)
+    if outcome == INVALID_ROLE:
+        return None, 'Invalid role selected'
+        
+    if outcome == INVALID_PLATFORM:
+        return None, 'Invalid platform selected'
+    
+    if len(verification_access_code(role, platform, followers)) > ACCESS_CODE_MAX_LENGTH:
+        return None, 'Role, platform and followers are too long to record'
+    
+    return {
+        'full_name': full_name,
+        'email': email,
+        'role': role,
+        'platform': platform,
+        'followers': followers,
+        'is_vip': outcome == SUCCESS
+    }, None
+
+def verification_access_code(role: str, platform: str, followers) -> str:
+    """Verification attempt details, stored in the log's access_code column"""
+    return f"{role}:{platform}:{followers}"
+
+def build_verification_log(fields: dict, status: str) -> VerificationLog:
+    """Build the audit log row for a verification attempt"""
+    return VerificationLog(
+        email=fields['email'],
+        access_code=verification_access_code(fields['role'], fields['platform'], fields['followers']),
+        verification_status=status,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent', '')
+    )
+
+def verification_response(fields: dict, status: str) -> tuple:
+    """Response body and HTTP status for a verification outcome"""
+    if status == 'blocked':
+        return {
+            'success': False,
+            'message': 'Account temporarily locked due to suspicious activity. Please contact security.',
+            'blocked': True
+        }, 429
+    
+    if status == 'success':
+        return {
+            'success': True,
+            'message': 'Verified as VIP',
+            'user': {
+                'fullName': fields['full_name'],
+                'email': fields['email'],
+                'role': fields['role'].title(),
+                'platform': fields['platform'].title(),
+                'followers': fields['followers'],
+                'verificationStatus': 'VIP Verified'
+            }
+        }, 200
+    
+    return {
+        'success': False,
+        'message': "You're not a VIP. Insufficient followers for your role category."
+    }, 401
+
 @api.route('/verify-vip', methods=['POST'])
 def verify_vip():
     """
@@ -74,97 +491,120 @@ def verify_vip():
     """
     try:
         # Get request data
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
+        fields, error = parse_verification_payload(request.get_json(silent=True))
+        if error:
+            return jsonify({'error': error}), 400
         
-        full_name = data.get('fullName', '').strip()
-        email = data.get('email', '').strip().lower()
-        role = data.get('role', '').strip().lower()
-        platform = data.get('platform', '').strip().lower()
-        followers = data.get('followers', 0)
+        # Check for suspicious activity
+        suspicious_check = check_suspicious_activity(fields['email'], request.remote_addr)
+        if suspicious_check.get('is_suspicious', False):
+            status = 'blocked'
+        else:
+            status = 'success' if fields['is_vip'] else 'failed'
         
-        # Validation
-        if not all([full_name, email, role, platform]) or followers < 0:
-            return jsonify({'error': 'All fields are required and followers must be non-negative'}), 400
+        # Log verification attempt
+        record_verification(build_verification_log(fields, status))
         
-        if not validate_email(email):
-            return jsonify({'error': 'Invalid email format'}), 400
+        event = verification_security_event(
+            fields, status, suspicious_check.get('failed_attempts') or 0,
+            suspicious_check.get('ip_failed_attempts') or 0
+        )
+        if event is not None:
+            emit_security_event(event)
         
-        if not validate_role(role):
-            return jsonify({'error': 'Invalid role selected'}), 400
+        body, code = verification_response(fields, status)
+        return jsonify(body), code
             
-        if not validate_platform(platform):
-            return jsonify({'error': 'Invalid platform selected'}), 400
+    except Exception as e:
+        print(f"Verification error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/verify-vip/batch', methods=['POST'])
+def verify_vip_batch():
+    """
+    Verify many VIP payloads in one request
+    Expected payload: {"items": [<verify-vip payload>, ...]} or a bare list.
+    Returns per-item results in input order; invalid items fail on their own.
+    """
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No items provided'}), 400
         
-        # Check for suspicious activity
-        suspicious_check = db_manager.check_suspicious_activity(email)
-        if suspicious_check.get('is_suspicious', False):
-            log = VerificationLog(
-                email=email,
-                access_code=f"{role}:{platform}:{followers}",  # Store verification attempt details
-                verification_status='blocked',
-                ip_address=request.remote_addr,
-                user_agent=request.headers.get('User-Agent', '')
-            )
-            db_manager.log_verification_attempt(log)
-            
-            return jsonify({
-                'success': False,
-                'message': 'Account temporarily locked due to suspicious activity. Please contact security.',
-                'blocked': True
-            }), 429
+        max_size = current_app.config.get('VERIFY_BATCH_MAX_SIZE', Config.VERIFY_BATCH_MAX_SIZE)
+        if len(items) > max_size:
+            return jsonify({'error': f'Batch size exceeds maximum of {max_size}'}), 413
         
-        is_vip = determine_vip_status(role, platform, followers)
+        parsed = [parse_verification_payload(item) for item in items]
+        emails = list({fields['email'] for fields, error in parsed if not error})
+        suspicious = check_suspicious_activity_many(emails)
+        # The same per-IP rule as /verify-vip, so a blocked client cannot switch to batches
+        ip_failures = ip_failed_attempts(request.remote_addr)
         
-        # Log verification attempt
-        log = VerificationLog(
-            email=email,
-            access_code=f"{role}:{platform}:{followers}",
-            verification_status='success' if is_vip else 'failed',
-            ip_address=request.remote_addr,
-            user_agent=request.headers.get('User-Agent', '')
-        )
-        db_manager.log_verification_attempt(log)
-        
-        if is_vip:
-            return jsonify({
-                'success': True,
-                'message': 'Verified as VIP',
-                'user': {
-                    'fullName': full_name,
-                    'email': email,
-                    'role': role.title(),
-                    'platform': platform.title(),
-                    'followers': followers,
-                    'verificationStatus': 'VIP Verified'
-                }
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': "You're not a VIP. Insufficient followers for your role category."
-            }), 401
+        # Failures earlier in the batch count towards later items for the same email and IP
+        batch_failures = {}
+        results = []
+        logs = []
+        events = []
+        for index, (fields, error) in enumerate(parsed):
+            if error:
+                results.append({'index': index, 'status': 400, 'error': error})
+                continue
+            
+            email = fields['email']
+            activity = suspicious.get(email, {})
+            failed_attempts = (activity.get('failed_attempts') or 0) + batch_failures.get(email, 0)
+            if activity.get('is_suspicious', False) or failed_attempts >= activity_detector.email_threshold \
+                    or ip_failures >= activity_detector.ip_threshold:
+                status = 'blocked'
+            else:
+                status = 'success' if fields['is_vip'] else 'failed'
+                if status == 'failed':
+                    batch_failures[email] = batch_failures.get(email, 0) + 1
+                    ip_failures += 1
             
+            logs.append(build_verification_log(fields, status))
+            event = verification_security_event(fields, status, failed_attempts, ip_failures)
+            if event is not None:
+                events.append(event)
+            body, code = verification_response(fields, status)
+            body.update({'index': index, 'status': code})
+            results.append(body)
+        
+        record_verifications(logs)
+        for event in events:
+            emit_security_event(event)
+        
+        summary = {'total': len(results)}
+        for result in results:
+            key = {200: 'verified', 401: 'rejected', 429: 'blocked'}.get(result['status'], 'invalid')
+            summary[key] = summary.get(key, 0) + 1
+        
+        return jsonify({'results': results, 'summary': summary})
+        
     except Exception as e:
-        print(f"Verification error: {e}")
+        print(f"Batch verification error: {e}")
+        count_error('api', e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @api.route('/vip-stats', methods=['GET'])
 def get_vip_stats():
     """Get VIP system statistics"""
     try:
-        stats = db_manager.get_vip_statistics()
+        stats = stats_cache.get()
         return jsonify(stats)
     except Exception as e:
         print(f"Stats error: {e}")
+        count_error('api', e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @api.route('/security-status', methods=['GET'])
 def get_security_status():
     """Get overall security status"""
     try:
-        stats = db_manager.get_vip_statistics()
+        stats = stats_cache.get()
         
         # Calculate security score based on recent activity
         total_attempts = stats.get('recent_verifications', 0) + stats.get('failed_attempts_today', 0)
@@ -189,6 +629,7 @@ def get_security_status():
         
     except Exception as e:
         print(f"Security status error: {e}")
+        count_error('api', e)
         return jsonify({'error': 'Internal server error'}), 500
 
 @api.route('/user-activity/<email>', methods=['GET'])
@@ -198,13 +639,424 @@ def get_user_activity(email):
         if not validate_email(email):
             return jsonify({'error': 'Invalid email format'}), 400
         
-        activity = db_manager.check_suspicious_activity(email.lower())
+        activity = check_suspicious_activity(email.lower())
         return jsonify(activity)
         
     except Exception as e:
         print(f"User activity error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def parse_min_severity(default: str) -> tuple:
+    """Severities at or above the ``severity`` query argument, returning (severities, error)"""
+    minimum = request.args.get('severity', default).strip().lower()
+    if minimum not in SEVERITIES:
+        return None, f"severity must be one of: {', '.join(SEVERITIES)}"
+    return severities_from(minimum), None
+
+@api.route('/security-events', methods=['GET'])
+@require_api_key
+def get_security_events():
+    """
+    Recent security events, newest first
+    Query: severity (minimum), event_type, email, since (ISO 8601), limit,
+    before_id (the next_before_id of the previous page)
+    """
+    try:
+        severities, error = parse_min_severity('low')
+        if error:
+            return jsonify({'error': error}), 400
+        
+        try:
+            limit = int(request.args.get('limit', 100))
+            before_id = int(request.args['before_id']) if request.args.get('before_id') else None
+        except ValueError:
+            return jsonify({'error': 'limit and before_id must be integers'}), 400
+        if not 1 <= limit <= Config.SECURITY_EVENTS_MAX_LIMIT:
+            return jsonify({'error': f'limit must be between 1 and {Config.SECURITY_EVENTS_MAX_LIMIT}'}), 400
+        
+        since = request.args.get('since')
+        try:
+            since = datetime.fromisoformat(since) if since else None
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+        email = (request.args.get('email') or '').strip().lower() or None
+        
+        events = db_manager.get_security_events(
+            severities=list(severities) if len(severities) < len(SEVERITIES) else None,
+            event_type=request.args.get('event_type') or None,
+            email=email, since=since, before_id=before_id, limit=limit
+        )
+        if events is None:
+            return jsonify({'error': 'Security events unavailable'}), 503
+        
+        return jsonify({
+            'events': [event_payload(event) for event in events],
+            'next_before_id': events[-1].id if len(events) == limit else None
+        })
+        
+    except Exception as e:
+        print(f"Security events error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/security-events/stream', methods=['GET'])
+@require_api_key
+def stream_security_events():
+    """
+    Live security events as server-sent events (``security_event``, plus
+    ``dropped`` when this client fell behind and missed some)
+    Query: severity (minimum, default medium)
+    """
+    severities, error = parse_min_severity('medium')
+    if error:
+        return jsonify({'error': error}), 400
+    
+    subscription = security_event_bus.subscribe(severities[0])
+    if subscription is None:
+        response = jsonify({'error': 'Too many open event streams'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    def body():
+        # Streams end after a while so clients rebalance across workers when they reconnect
+        deadline = time.monotonic() + Config.SECURITY_EVENT_STREAM_MAX_AGE
+        try:
+            yield 'retry: 5000\n\n'
+            while time.monotonic() < deadline and not subscription.closed:
+                events, dropped = subscription.get(Config.SECURITY_EVENT_STREAM_KEEPALIVE)
+                if dropped:
+                    yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+                if events:
+                    yield ''.join(
+                        f"id: {sequence}\nevent: security_event\ndata: {json.dumps(event_payload(event))}\n\n"
+                        for sequence, event in events
+                    )
+                elif not dropped:
+                    yield ': keepalive\n\n'
+        finally:
+            security_event_bus.unsubscribe(subscription)
+    
+    return Response(
+        stream_with_context(body()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def parse_export_args(table, filter_names: tuple) -> tuple:
+    """Read format, time range and filters from the query string, returning (args, error)"""
+    fmt = request.args.get('format', 'ndjson').lower()
+    if fmt not in FORMATS:
+        return None, f"format must be one of: {', '.join(FORMATS)}"
+    
+    bounds = {}
+    for name in ('since', 'until'):
+        value = request.args.get(name)
+        try:
+            bounds[name] = datetime.fromisoformat(value) if value else None
+        except ValueError:
+            return None, f"{name} must be an ISO 8601 timestamp"
+    
+    filters = {name: request.args.get(name) or None for name in filter_names}
+    if filters.get('email') is not None:
+        filters['email'] = filters['email'].strip().lower()
+    
+    return {'format': fmt, 'filters': filters, **bounds}, None
+
+def export_response(db, table, args: dict) -> Response:
+    """Stream an export as an attachment"""
+    def on_error(error):
+        # Headers are already sent, so NDJSON clients get a trailing error line
+        return json.dumps({'error': 'Export interrupted'}) + '\n' if args['format'] == 'ndjson' else None
+    
+    body = export_chunks(
+        db, table, args['format'], args['filters'], args['since'], args['until'],
+        page_size=Config.EXPORT_PAGE_SIZE, chunk_rows=Config.EXPORT_CHUNK_ROWS, on_error=on_error
+    )
+    filename = f"{table.name}.{args['format']}"
+    return Response(
+        stream_with_context(body),
+        mimetype=FORMATS[args['format']],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"', 'X-Accel-Buffering': 'no'}
+    )
+
+@api.route('/export/verification-logs', methods=['GET'])
+@require_api_key
+def export_verification_logs():
+    """
+    Stream verification_logs as NDJSON or CSV
+    Query: format=ndjson|csv, since, until (ISO 8601), status, email
+    """
+    args, error = parse_export_args(VERIFICATION_LOGS, ('status', 'email'))
+    if error:
+        return jsonify({'error': error}), 400
+    return export_response(db_manager, VERIFICATION_LOGS, args)
+
+@api.route('/export/threat-detections', methods=['GET'])
+@require_api_key
+def export_threat_detections():
+    """
+    Stream Supabase threat_detections as NDJSON or CSV
+    Query: format=ndjson|csv, since, until (ISO 8601), status, vip_id
+    """
+    supabase_db = get_supabase_db_manager()
+    if supabase_db is None:
+        return jsonify({'error': 'Threat detection export is not configured'}), 503
+    
+    args, error = parse_export_args(THREAT_DETECTIONS, ('status', 'vip_id'))
+    if error:
+        return jsonify({'error': error}), 400
+    if args['filters']['vip_id'] is not None:
+        try:
+            uuid.UUID(args['filters']['vip_id'])
+        except ValueError:
+            return jsonify({'error': 'vip_id must be a UUID'}), 400
+    return export_response(supabase_db, THREAT_DETECTIONS, args)
+
+@api.route('/detections', methods=['POST'])
+@require_api_key
+def ingest_detections():
+    """
+    Queue threat detections for bulk insertion
+    Expected payload: {"detections": [{"vip_id", "platform", "threat_type", "content_url",
+    "content_text", "evidence_urls", "confidence_score", "status", "metadata",
+    "related_accounts", "network_analysis"}, ...]} or a bare list.
+    Valid items are queued (202); invalid ones are reported by index.
+    """
+    try:
+        if get_supabase_db_manager() is None:
+            return jsonify({'error': 'Threat detection ingestion is not configured'}), 503
+        
+        data = request.get_json(silent=True)
+        items = data.get('detections') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'No detections provided'}), 400
+        
+        if len(items) > Config.INGEST_MAX_REQUEST_ITEMS:
+            return jsonify({'error': f'Batch size exceeds maximum of {Config.INGEST_MAX_REQUEST_ITEMS}'}), 413
+        
+        started = time.perf_counter()
+        rows, rejected = [], []
+        for index, item in enumerate(items):
+            row, error = validate_detection(item)
+            if error:
+                rejected.append({'index': index, 'error': error})
+            else:
+                rows.append(row)
+        INGEST_STAGE_LATENCY.observe(time.perf_counter() - started, 'validate')
+        if rejected:
+            INGEST_ROWS.inc('invalid', amount=len(rejected))
+        
+        if rows and not detection_ingestor.submit(rows):
+            response = jsonify({'error': 'Ingestion queue is full, retry later'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '1'
+            return response
+        
+        return jsonify({'accepted': len(rows), 'rejected': rejected}), 202 if rows else 400
+        
+    except Exception as e:
+        print(f"Detection ingest error: {e}")
+        count_error('api', e)
         return jsonify({'error': 'Internal server error'}), 500
 
+@api.route('/detections/ingest-stats', methods=['GET'])
+@require_api_key
+def get_ingest_stats():
+    """Get threat detection ingestion counters"""
+    return jsonify(detection_ingestor.stats())
+
+@api.route('/scan', methods=['POST'])
+@require_api_key
+def scan_content():
+    """
+    Match texts against every active VIP's names, keywords and handles
+    Expected payload: {"texts": ["...", ...]} or {"text": "..."}
+    Returns candidate threat_type hits per text, in request order.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        texts = data.get('texts') if isinstance(data, dict) else None
+        if texts is None and isinstance(data, dict) and data.get('text') is not None:
+            texts = [data['text']]
+        if not isinstance(texts, list) or not texts:
+            return jsonify({'error': 'No texts provided'}), 400
+        
+        if len(texts) > Config.SCAN_MAX_TEXTS:
+            return jsonify({'error': f'Batch size exceeds maximum of {Config.SCAN_MAX_TEXTS}'}), 413
+        if not all(isinstance(text, str) for text in texts):
+            return jsonify({'error': 'Texts must be strings'}), 400
+        if any(len(text) > Config.SCAN_MAX_TEXT_LENGTH for text in texts):
+            return jsonify({'error': f'Texts are limited to {Config.SCAN_MAX_TEXT_LENGTH} characters'}), 413
+        
+        if not vip_matcher.is_loaded:
+            if get_supabase_db_manager() is None:
+                return jsonify({'error': 'VIP matching is not configured'}), 503
+            response = jsonify({'error': 'VIP patterns are still loading, retry later'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '1'
+            return response
+        
+        index = vip_matcher.current
+        results = [{'index': i, 'hits': index.scan(text)} for i, text in enumerate(texts)]
+        return jsonify({'version': index.version, 'results': results})
+        
+    except Exception as e:
+        print(f"Scan error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+@api.route('/scan/stats', methods=['GET'])
+@require_api_key
+def get_scan_stats():
+    """Get the size and age of the VIP match index"""
+    return jsonify(vip_matcher.stats())
+
+@api.route('/timeseries', methods=['GET'])
+@require_api_key
+def get_timeseries():
+    """
+    Hourly or daily counts from the rollup tables
+    Query: metric=verifications|detections, interval=hour|day, since, until (ISO 8601),
+    and for detections group_by=threat_type|platform, threat_type, platform.
+    Returns one bucket list and a zero-filled count series per status or group.
+    """
+    try:
+        metric = request.args.get('metric', 'verifications')
+        interval = request.args.get('interval', 'hour')
+        if metric not in ('verifications', 'detections'):
+            return jsonify({'error': 'metric must be verifications or detections'}), 400
+        if interval not in INTERVALS:
+            return jsonify({'error': f"interval must be one of: {', '.join(INTERVALS)}"}), 400
+        
+        bounds = {}
+        for name in ('since', 'until'):
+            value = request.args.get(name)
+            try:
+                bounds[name] = datetime.fromisoformat(value) if value else None
+            except ValueError:
+                return jsonify({'error': f'{name} must be an ISO 8601 timestamp'}), 400
+        
+        # Detection rollups are bucketed in UTC, verification rollups in server time
+        default_points = 24 * 7 if interval == 'hour' else 90
+        window, error = time_range(interval, bounds['since'], bounds['until'], default_points,
+                                   Config.TIMESERIES_MAX_POINTS, utc=metric == 'detections')
+        if error:
+            return jsonify({'error': error}), 400
+        since, until = window
+        
+        if metric == 'verifications':
+            rows = db_manager.get_verification_timeseries(interval, since, until)
+            if rows is None:
+                return jsonify({'error': 'Time series unavailable'}), 503
+            names = VERIFICATION_STATUSES
+        else:
+            supabase_db = get_supabase_db_manager()
+            if supabase_db is None:
+                return jsonify({'error': 'Detection time series are not configured'}), 503
+            group_by = request.args.get('group_by') or None
+            if group_by is not None and group_by not in DETECTION_GROUPS:
+                return jsonify({'error': f"group_by must be one of: {', '.join(DETECTION_GROUPS)}"}), 400
+            filters = {'threat_type': request.args.get('threat_type'), 'platform': request.args.get('platform')}
+            if filters['threat_type'] and filters['threat_type'] not in THREAT_TYPES:
+                return jsonify({'error': f"threat_type must be one of: {', '.join(sorted(THREAT_TYPES))}"}), 400
+            if filters['platform'] and filters['platform'] not in PLATFORMS:
+                return jsonify({'error': f"platform must be one of: {', '.join(sorted(PLATFORMS))}"}), 400
+            try:
+                rows, names = detection_rows(supabase_db, interval, since, until, group_by, filters)
+            except Exception:
+                return jsonify({'error': 'Time series unavailable'}), 503
+        
+        return jsonify({
+            'metric': metric,
+            'interval': interval,
+            'since': since.isoformat(),
+            'until': until.isoformat(),
+            **dense(rows, since, until, interval, names)
+        })
+        
+    except Exception as e:
+        print(f"Timeseries error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+def campaign_graph_unavailable():
+    """503 response while the campaign graph is unconfigured or still loading, else None"""
+    if campaign_graph.is_loaded:
+        return None
+    if get_supabase_db_manager() is None:
+        return jsonify({'error': 'Campaign graph is not configured'}), 503
+    response = jsonify({'error': 'Campaign graph is still loading, retry later'})
+    response.status_code = 503
+    response.headers['Retry-After'] = '5'
+    return response
+
+@api.route('/campaigns/components', methods=['GET'])
+@require_api_key
+def get_campaign_components():
+    """Largest connected account groups (min_size, limit)"""
+    unavailable = campaign_graph_unavailable()
+    if unavailable is not None:
+        return unavailable
+    min_size = max(2, request.args.get('min_size', 3, type=int))
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+    return jsonify({'components': campaign_graph.graph.components(min_size, limit)})
+
+@api.route('/campaigns/central', methods=['GET'])
+@require_api_key
+def get_central_accounts():
+    """Accounts linked to the most other accounts (limit)"""
+    unavailable = campaign_graph_unavailable()
+    if unavailable is not None:
+        return unavailable
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 1000)
+    return jsonify({'accounts': campaign_graph.graph.central(limit)})
+
+@api.route('/campaigns/accounts/<account>/neighborhood', methods=['GET'])
+@require_api_key
+def get_account_neighborhood(account):
+    """Accounts within k hops of an account (hops, limit)"""
+    unavailable = campaign_graph_unavailable()
+    if unavailable is not None:
+        return unavailable
+    hops = min(max(1, request.args.get('hops', 1, type=int)), Config.CAMPAIGN_GRAPH_MAX_HOPS)
+    limit = min(max(1, request.args.get('limit', 1000, type=int)), Config.CAMPAIGN_GRAPH_MAX_NODES)
+    result = campaign_graph.graph.neighborhood(account, hops, limit)
+    if result is None:
+        return jsonify({'error': 'Account not found'}), 404
+    return jsonify(result)
+
+@api.route('/campaigns/accounts/<account>/component', methods=['GET'])
+@require_api_key
+def get_account_component(account):
+    """The connected account group an account belongs to (limit)"""
+    unavailable = campaign_graph_unavailable()
+    if unavailable is not None:
+        return unavailable
+    limit = min(max(1, request.args.get('limit', 100, type=int)), Config.CAMPAIGN_GRAPH_MAX_NODES)
+    result = campaign_graph.graph.component(account, limit)
+    if result is None:
+        return jsonify({'error': 'Account not found'}), 404
+    return jsonify(result)
+
+@api.route('/campaigns/graph-stats', methods=['GET'])
+@require_api_key
+def get_campaign_graph_stats():
+    """Get the size and age of the campaign account graph"""
+    return jsonify(campaign_graph.stats())
+
+@api.route('/pool-stats', methods=['GET'])
+@require_api_key
+def get_pool_stats():
+    """Get database connection pool metrics"""
+    return jsonify(db_manager.pool_stats())
+
+@api.route('/statement-stats', methods=['GET'])
+@require_api_key
+def get_statement_stats():
+    """Get per-statement call counts and timings for prepared queries"""
+    return jsonify(db_manager.statement_stats())
+
 # Error handlers
 @api.errorhandler(404)
 def not_found(error):
@@ -1,23 +1,54 @@
 from flask import Flask
 from flask_cors import CORS
-from .api_routes import api   # ✅ fixed import
+from werkzeug.middleware.proxy_fix import ProxyFix
+from .api_routes import api, rate_limiter, start_background_services   # ✅ fixed import
 from .config import config    # ✅ also make config relative
+from . import metrics, rate_limit
+from .auth import require_api_key
+from .response_cache import ResponseCache
+import json
 import os
 
 
-def create_app(config_name=None):
-    """Application factory"""
+def create_app(config_name=None, start_services=True):
+    """Application factory
+    
+    Pass ``start_services=False`` when a process manager forks workers after
+    loading the app; each worker then starts them from its post_fork hook.
+    """
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
     
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
+    # Resolve request.remote_addr to the client behind trusted proxies
+    if app.config['TRUSTED_PROXY_COUNT'] > 0:
+        proxies = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+    
     # Initialize CORS
     CORS(app, origins=app.config['CORS_ORIGINS'])
     
+    # Request instrumentation and /api/metrics
+    metrics.init_app(app, protect=require_api_key if app.config['METRICS_REQUIRE_API_KEY'] else None)
+    
+    # Token-bucket limits, enforced before any handler touches the database
+    if app.config['RATE_LIMIT_ENABLED']:
+        rate_limit.init_app(app, rate_limiter)
+    
+    # Cached bodies, ETags and precompressed responses for polled read endpoints
+    if app.config['RESPONSE_CACHE_ENABLED']:
+        ResponseCache(
+            json.loads(app.config['RESPONSE_CACHE_TTLS']),
+            max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+            min_compress_size=app.config['RESPONSE_CACHE_MIN_COMPRESS_SIZE']
+        ).init_app(app)
+    
     # Register blueprints
     app.register_blueprint(api)
+    if start_services:
+        start_background_services()
     
     # Root endpoint
     @app.route('/')
@@ -0,0 +1,9 @@
+"""
+ASGI entry point for the asyncio variant of GuardIQ
+
+    hypercorn backend.asgi:application --bind 0.0.0.0:5000 --workers 2
+"""
+import os
+from .async_api import create_async_app
+
+application = create_async_app(os.getenv('FLASK_ENV', 'production'))
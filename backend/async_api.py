@@ -0,0 +1,335 @@
+"""
+Asyncio variant of the GuardIQ VIP API (Quart + asyncpg)
+
+Run under an ASGI server, e.g.:
+
+    hypercorn backend.asgi:application --workers 2
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from quart import Blueprint, Quart, Response, jsonify, request
+from quart_cors import cors
+
+from .api_routes import (activity_detector, log_writer, parse_verification_payload, rule_engine,
+                         validate_email, verification_response)
+from .async_models import AsyncDatabaseManager
+from .auth import is_admin_key, supplied_api_key
+from .config import Config, config
+from .log_writer import VerificationLogWriter
+from .metrics import count_error, registry
+from .models import VerificationLog
+
+# Create blueprint
+async_api = Blueprint('async_api', __name__, url_prefix='/api')
+
+db_config = {
+    'host': Config.DB_HOST,
+    'database': Config.DB_NAME,
+    'user': Config.DB_USER,
+    'password': Config.DB_PASSWORD,
+    'port': Config.DB_PORT
+}
+async_db_manager = AsyncDatabaseManager(
+    db_config,
+    min_size=Config.DB_POOL_MIN_SIZE,
+    max_size=Config.DB_POOL_MAX_SIZE,
+    timeout=Config.DB_POOL_TIMEOUT,
+    max_idle=Config.DB_POOL_MAX_IDLE
+)
+
+
+class AsyncLogWriter:
+    """Write-behind verification logging on the event loop
+
+    Handlers enqueue without awaiting the database; a flusher task writes
+    batches with COPY. When the queue is full or a batch fails, logs are
+    handed to the thread-based VerificationLogWriter, which spills them to
+    disk and replays them later.
+    """
+
+    def __init__(self, db_manager: AsyncDatabaseManager, fallback: VerificationLogWriter,
+                 max_queue: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.db_manager = db_manager
+        self.fallback = fallback
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, log: VerificationLog):
+        if log.created_at is None:
+            log.created_at = datetime.now(timezone.utc)
+        try:
+            self._queue.put_nowait(log)
+        except (asyncio.QueueFull, AttributeError):
+            self.fallback.submit(log)
+
+    async def close(self):
+        """Flush everything queued, then stop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():
+            batch = [self._queue.get_nowait() for _ in range(min(self.batch_size, self._queue.qsize()))]
+            await self._flush(batch)
+        self.fallback.close()
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        if not await self.db_manager.log_verification_attempts(batch):
+            for log in batch:
+                self.fallback.submit(log)
+
+
+async_log_writer = AsyncLogWriter(
+    async_db_manager,
+    log_writer,
+    max_queue=Config.LOG_QUEUE_SIZE,
+    batch_size=Config.LOG_BATCH_SIZE,
+    flush_interval=Config.LOG_FLUSH_INTERVAL
+)
+
+# Statistics snapshot shared by /vip-stats and /security-status
+_stats = {'value': None, 'loaded_at': 0.0, 'task': None}
+
+
+async def get_statistics() -> dict:
+    """TTL-cached statistics; concurrent misses await one in-flight query"""
+    if _stats['value'] is not None and time.monotonic() - _stats['loaded_at'] < Config.STATS_CACHE_TTL:
+        return _stats['value']
+
+    if _stats['task'] is None:
+        _stats['task'] = asyncio.ensure_future(async_db_manager.get_vip_statistics())
+    task = _stats['task']
+    try:
+        value = await asyncio.shield(task)
+    finally:
+        if _stats['task'] is task and task.done():
+            _stats['task'] = None
+
+    if value:
+        _stats['value'] = value
+        _stats['loaded_at'] = time.monotonic()
+    return _stats['value'] or {}
+
+
+async def check_suspicious_activity(email: str, ip_address=None) -> dict:
+    """Check suspicious activity, falling back to SQL while the detector is cold"""
+    result = activity_detector.check(email, ip_address)
+    if result is None:
+        result = await async_db_manager.check_suspicious_activity(email)
+        if ip_address:
+            since = datetime.fromtimestamp(time.time() - activity_detector.window)
+            ip_failures = await async_db_manager.count_ip_failures(ip_address, since)
+            activity_detector.with_ip_failures(result, ip_failures or 0)
+    return result
+
+
+async def seed_detector():
+    """Seed the shared in-memory detector through the async pool"""
+    while True:
+        started = time.time()
+        rows = await async_db_manager.get_recent_failures(
+            datetime.fromtimestamp(started - activity_detector.window),
+            datetime.fromtimestamp(started)
+        )
+        if rows is not None:
+            activity_detector.load(rows, started)
+            if not activity_detector.resync_interval:
+                return
+            await asyncio.sleep(activity_detector.resync_interval)
+        else:
+            await asyncio.sleep(5)
+
+
+def record_verification(log: VerificationLog):
+    """Queue a verification log and account for it in the in-memory detector"""
+    async_log_writer.submit(log)
+    activity_detector.record(log)
+
+
+def build_verification_log(fields: dict, status: str) -> VerificationLog:
+    return VerificationLog(
+        email=fields['email'],
+        access_code=f"{fields['role']}:{fields['platform']}:{fields['followers']}",
+        verification_status=status,
+        ip_address=request.remote_addr,
+        user_agent=request.headers.get('User-Agent', '')
+    )
+
+
+@async_api.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint"""
+    return jsonify({
+        'status': 'healthy',
+        'service': 'GuardIQ VIP API',
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '1.0.0'
+    })
+
+
+@async_api.route('/verify-vip', methods=['POST'])
+async def verify_vip():
+    """Verify VIP status endpoint (same payload and responses as the sync API)"""
+    try:
+        data = await request.get_json(silent=True)
+        email = str(data.get('email') or '').strip().lower() if isinstance(data, dict) else ''
+
+        # Start the suspicious-activity lookup before evaluating the rules;
+        # the two are independent and the lookup may have to go to Postgres
+        suspicious_task = None
+        if validate_email(email):
+            suspicious_task = asyncio.ensure_future(check_suspicious_activity(email, request.remote_addr))
+
+        fields, error = parse_verification_payload(data)
+        if error:
+            if suspicious_task is not None:
+                suspicious_task.cancel()
+            return jsonify({'error': error}), 400
+
+        if suspicious_task is None or fields['email'] != email:
+            suspicious_task = check_suspicious_activity(fields['email'], request.remote_addr)
+        suspicious_check = await suspicious_task
+        if suspicious_check.get('is_suspicious', False):
+            status = 'blocked'
+        else:
+            status = 'success' if fields['is_vip'] else 'failed'
+
+        # Logged behind the response
+        record_verification(build_verification_log(fields, status))
+
+        body, code = verification_response(fields, status)
+        return jsonify(body), code
+
+    except Exception as e:
+        print(f"Verification error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@async_api.route('/vip-stats', methods=['GET'])
+async def get_vip_stats():
+    """Get VIP system statistics"""
+    try:
+        return jsonify(await get_statistics())
+    except Exception as e:
+        print(f"Stats error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@async_api.route('/security-status', methods=['GET'])
+async def get_security_status():
+    """Get overall security status"""
+    try:
+        stats = await get_statistics()
+
+        # Calculate security score based on recent activity
+        total_attempts = stats.get('recent_verifications', 0) + stats.get('failed_attempts_today', 0)
+        success_rate = (stats.get('recent_verifications', 0) / max(total_attempts, 1)) * 100
+
+        security_level = 'high'
+        if stats.get('high_risk_events', 0) > 5:
+            security_level = 'critical'
+        elif stats.get('high_risk_events', 0) > 2:
+            security_level = 'medium'
+        elif stats.get('failed_attempts_today', 0) > 10:
+            security_level = 'medium'
+
+        return jsonify({
+            'securityLevel': security_level,
+            'successRate': round(success_rate, 2),
+            'totalVips': stats.get('active_vips', 0),
+            'recentActivity': stats.get('recent_verifications', 0),
+            'threatLevel': stats.get('high_risk_events', 0),
+            'lastUpdated': datetime.utcnow().isoformat()
+        })
+
+    except Exception as e:
+        print(f"Security status error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@async_api.route('/user-activity/<email>', methods=['GET'])
+async def get_user_activity(email):
+    """Get activity for a specific user"""
+    try:
+        if not validate_email(email):
+            return jsonify({'error': 'Invalid email format'}), 400
+
+        return jsonify(await check_suspicious_activity(email.lower()))
+
+    except Exception as e:
+        print(f"User activity error: {e}")
+        count_error('api', e)
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@async_api.route('/metrics', methods=['GET'])
+async def metrics_endpoint():
+    if Config.METRICS_REQUIRE_API_KEY and not is_admin_key(supplied_api_key(request.headers)):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def create_async_app(config_name=None):
+    """Application factory for the asyncio API"""
+    import os
+    if config_name is None:
+        config_name = os.getenv('FLASK_ENV', 'development')
+
+    app = Quart(__name__)
+    app.config.from_object(config[config_name])
+    app = cors(app, allow_origin=app.config['CORS_ORIGINS'])
+    if app.config['TRUSTED_PROXY_COUNT'] > 0:
+        # Resolve request.remote_addr to the client behind trusted proxies
+        from hypercorn.middleware import ProxyFixMiddleware
+        app.asgi_app = ProxyFixMiddleware(app.asgi_app, mode='legacy', trusted_hops=app.config['TRUSTED_PROXY_COUNT'])
+    app.register_blueprint(async_api)
+
+    @app.before_serving
+    async def start_services():
+        rule_engine.start()
+        async_log_writer.start()
+        app.add_background_task(seed_detector)
+
+    @app.after_serving
+    async def stop_services():
+        await async_log_writer.close()
+        await async_db_manager.close()
+
+    @app.route('/')
+    async def index():
+        return {
+            'service': 'GuardIQ VIP API',
+            'version': '1.0.0',
+            'status': 'running',
+            'mode': 'async'
+        }
+
+    return app
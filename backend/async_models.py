@@ -0,0 +1,222 @@
+"""
+Asyncio database access for GuardIQ, backed by an asyncpg connection pool
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import asyncpg
+
+from .models import VIP_USER_COLUMNS, VIPUser, VerificationLog
+from .metrics import DB_QUERY_LATENCY, count_error
+
+# asyncpg raises these for server-side and connection-level failures
+DB_ERRORS = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError)
+
+
+def _session_timezone(conn):
+    """The connection's TimeZone setting, or None (the app's zone) if Python does not know it"""
+    try:
+        return ZoneInfo(conn.get_settings().TimeZone)
+    except (AttributeError, ValueError, ZoneInfoNotFoundError):
+        return None
+
+
+def _session_timestamp(value: Optional[datetime], tz) -> datetime:
+    """Naive timestamp in the session time zone, as a TIMESTAMP column stores CURRENT_TIMESTAMP"""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(tz).replace(tzinfo=None)
+
+
+class AsyncDatabaseManager:
+    """Async counterpart of DatabaseManager with the same methods and error handling"""
+    
+    def __init__(self, db_config: dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, max_idle: float = 300.0):
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._pool = None
+        self._pool_lock = None
+    
+    async def get_pool(self) -> asyncpg.Pool:
+        """Create the pool on first use inside the running event loop"""
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        host=self.db_config['host'],
+                        database=self.db_config['database'],
+                        user=self.db_config['user'],
+                        password=self.db_config['password'],
+                        port=int(self.db_config['port']),
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        max_inactive_connection_lifetime=self.max_idle
+                    )
+        return self._pool
+    
+    async def close(self):
+        """Close the pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+    
+    def pool_stats(self) -> dict:
+        if self._pool is None:
+            return {'size': 0, 'idle': 0, 'min_size': self.min_size, 'max_size': self.max_size}
+        return {
+            'size': self._pool.get_size(),
+            'idle': self._pool.get_idle_size(),
+            'min_size': self.min_size,
+            'max_size': self.max_size
+        }
+    
+    async def verify_vip_user(self, email: str, access_code: str) -> Optional[VIPUser]:
+        """Verify VIP user credentials"""
+        with _timed('verify_vip_user'):
+            try:
+                pool = await self.get_pool()
+                result = await pool.fetchrow(f"""
+                    SELECT {VIP_USER_COLUMNS} FROM vip_users 
+                    WHERE email = $1 AND access_code = $2 AND is_active = TRUE
+                """, email.lower().strip(), access_code.strip(), timeout=self.timeout)
+            except DB_ERRORS as e:
+                print(f"Database query error: {e}")
+                count_error('database', e)
+                return None
+        
+        if result:
+            return VIPUser(*result)
+        return None
+    
+    async def log_verification_attempt(self, log: VerificationLog) -> bool:
+        """Log verification attempt"""
+        return await self.log_verification_attempts([log])
+    
+    async def log_verification_attempts(self, logs: List[VerificationLog]) -> bool:
+        """Log a batch of verification attempts with COPY"""
+        if not logs:
+            return True
+        
+        with _timed('log_verification_attempts'):
+            try:
+                pool = await self.get_pool()
+                async with pool.acquire(timeout=self.timeout) as conn:
+                    # COPY cannot convert time zones, so aware timestamps are converted here
+                    tz = _session_timezone(conn)
+                    await conn.copy_records_to_table(
+                        'verification_logs',
+                        records=[(
+                            log.email,
+                            log.access_code,
+                            log.verification_status,
+                            log.ip_address,
+                            log.user_agent,
+                            _session_timestamp(log.created_at, tz)
+                        ) for log in logs],
+                        columns=['email', 'access_code', 'verification_status',
+                                 'ip_address', 'user_agent', 'created_at']
+                    )
+                return True
+            except DB_ERRORS as e:
+                print(f"Batch logging error: {e}")
+                count_error('database', e)
+                return False
+    
+    async def update_last_verified(self, user_id: int) -> bool:
+        """Update user's last verified timestamp"""
+        with _timed('update_last_verified'):
+            try:
+                pool = await self.get_pool()
+                await pool.execute("""
+                    UPDATE vip_users 
+                    SET last_verified = CURRENT_TIMESTAMP 
+                    WHERE id = $1
+                """, user_id, timeout=self.timeout)
+                return True
+            except DB_ERRORS as e:
+                print(f"Update error: {e}")
+                count_error('database', e)
+                return False
+    
+    async def get_vip_statistics(self) -> dict:
+        """Get VIP system statistics"""
+        with _timed('get_vip_statistics'):
+            try:
+                pool = await self.get_pool()
+                result = await pool.fetchrow("SELECT * FROM get_vip_statistics()", timeout=self.timeout)
+                return dict(result) if result else {}
+            except DB_ERRORS as e:
+                print(f"Statistics error: {e}")
+                count_error('database', e)
+                return {}
+    
+    async def check_suspicious_activity(self, email: str) -> dict:
+        """Check for suspicious activity for a user"""
+        with _timed('check_suspicious_activity'):
+            try:
+                pool = await self.get_pool()
+                result = await pool.fetchrow(
+                    "SELECT * FROM check_suspicious_activity($1)", email, timeout=self.timeout
+                )
+                return dict(result) if result else {}
+            except DB_ERRORS as e:
+                print(f"Suspicious activity check error: {e}")
+                count_error('database', e)
+                return {}
+    
+    async def count_ip_failures(self, ip_address: str, since: datetime) -> Optional[int]:
+        """Failed attempts from an IP address since a point in time"""
+        with _timed('count_ip_failures'):
+            try:
+                pool = await self.get_pool()
+                return await pool.fetchval("""
+                    SELECT COUNT(*) FROM verification_logs
+                    WHERE ip_address = $1 AND verification_status = 'failed' AND created_at >= $2
+                """, ip_address, since, timeout=self.timeout)
+            except DB_ERRORS as e:
+                print(f"IP failure count error: {e}")
+                count_error('database', e)
+                return None
+    
+    async def get_recent_failures(self, since: datetime, until: datetime) -> Optional[List[tuple]]:
+        """Get (email, ip_address, verification_status, created_at) for failed/blocked attempts in a time range"""
+        with _timed('get_recent_failures'):
+            try:
+                pool = await self.get_pool()
+                rows = await pool.fetch("""
+                    SELECT email, ip_address, verification_status, created_at
+                    FROM verification_logs
+                    WHERE verification_status IN ('failed', 'blocked')
+                    AND created_at >= $1 AND created_at < $2
+                    ORDER BY created_at
+                """, since, until, timeout=self.timeout)
+                return [tuple(row) for row in rows]
+            except DB_ERRORS as e:
+                print(f"Recent failures query error: {e}")
+                count_error('database', e)
+                return None
+
+
+class _timed:
+    """Context manager feeding the shared DB query latency histogram"""
+    
+    __slots__ = ('method', 'started')
+    
+    def __init__(self, method: str):
+        self.method = method
+    
+    def __enter__(self):
+        self.started = asyncio.get_running_loop().time()
+    
+    def __exit__(self, *exc):
+        DB_QUERY_LATENCY.observe(asyncio.get_running_loop().time() - self.started, self.method)
@@ -0,0 +1,55 @@
+"""
+API key authentication for admin and service endpoints
+"""
+import hmac
+from functools import wraps
+from typing import Optional
+
+from flask import jsonify, request
+
+from .config import Config
+from .metrics import registry
+
+AUTH_FAILURES = registry.counter(
+    'guardiq_auth_failures_total', 'Requests to key-protected endpoints rejected', ('endpoint', 'reason')
+)
+
+
+def supplied_api_key(headers=None) -> Optional[str]:
+    """The key from ``Authorization: Bearer <key>`` or ``X-API-Key``"""
+    headers = request.headers if headers is None else headers
+    scheme, _, token = headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    return headers.get('X-API-Key') or None
+
+
+def is_admin_key(supplied: Optional[str]) -> bool:
+    return supplied is not None and any(
+        hmac.compare_digest(supplied.encode(), key.encode()) for key in Config.ADMIN_API_KEYS
+    )
+
+
+def require_api_key(view):
+    """Reject requests without one of ``ADMIN_API_KEYS``
+
+    These endpoints read or write every tenant's data over service
+    connections that bypass Supabase row-level security, so with no keys
+    configured they answer 503 rather than run unauthenticated.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        keys = Config.ADMIN_API_KEYS
+        if not keys:
+            AUTH_FAILURES.inc(request.endpoint, 'not_configured')
+            return jsonify({'error': 'This endpoint requires ADMIN_API_KEYS to be configured'}), 503
+
+        supplied = supplied_api_key()
+        if not is_admin_key(supplied):
+            AUTH_FAILURES.inc(request.endpoint, 'missing' if supplied is None else 'invalid')
+            response = jsonify({'error': 'Unauthorized'})
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,363 @@
+"""
+In-memory account graph over campaign_networks for coordinated_campaign analysis
+"""
+import heapq
+import os
+import threading
+import time
+from array import array
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import psycopg2
+
+from .metrics import count_error
+
+GRAPH_SELECT = """
+    SELECT c.id, c.detection_id, c.related_accounts, t.vip_id, t.platform, t.threat_type, c.created_at
+    FROM campaign_networks c
+    JOIN threat_detections t ON t.id = c.detection_id
+"""
+
+
+def account_key(account: str) -> str:
+    """Canonical node name for a related_accounts entry"""
+    return account.strip().lower().lstrip('@')
+
+
+class _Component:
+    """Members and running totals of one connected component, kept on its union-find root"""
+    __slots__ = ('members', 'edges', 'detections', 'vip_ids', 'threat_types', 'top')
+
+    def __init__(self, node: int):
+        self.members = [node]
+        self.edges = 0
+        self.detections = set()
+        self.vip_ids = set()
+        self.threat_types = set()
+        self.top = None
+
+    def absorb(self, other: '_Component'):
+        self.members.extend(other.members)
+        self.edges += other.edges
+        self.detections |= other.detections
+        self.vip_ids |= other.vip_ids
+        self.threat_types |= other.threat_types
+        self.top = None
+
+
+class CampaignGraph:
+    """Accounts as nodes, joined when they appear in the same detection
+
+    Node ids are dense ints; each node keeps a ``{neighbor: shared
+    detections}`` dict and the detections it appears in. Union-find keeps
+    connected components current as links arrive, and each component's
+    members, edge count, detections and VIPs are merged smaller-into-larger
+    on union, so component queries never walk the component. Detections
+    naming more than ``max_group`` accounts are linked as a star around
+    their first account rather than a clique, which keeps reachability but
+    not degree for those accounts.
+
+    Links are only ever added; rebuild the graph to drop deleted rows.
+    Rankings are cached until the next ``add``.
+    """
+
+    def __init__(self, max_group: int = 500):
+        self.max_group = max_group
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.adjacency: List[Dict[int, int]] = []
+        self.node_detections: List[array] = []
+        # detection index -> (detection_id, vip_id, platform, threat_type)
+        self.detections: List[tuple] = []
+        self.detection_ids: Dict[str, int] = {}
+        self.links = set()
+        self.edges = 0
+
+        self._parent = array('l')
+        self._components: Dict[int, _Component] = {}
+        self._ranking = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _node(self, name: str) -> int:
+        node = self.ids.get(name)
+        if node is None:
+            node = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.adjacency.append({})
+            self.node_detections.append(array('l'))
+            self._parent.append(node)
+            self._components[node] = _Component(node)
+        return node
+
+    def _find(self, node: int) -> int:
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _link(self, a: int, b: int):
+        if a == b:
+            return
+        weight = self.adjacency[a].get(b)
+        self.adjacency[a][b] = self.adjacency[b][a] = (weight or 0) + 1
+        if weight is not None:
+            return
+
+        self.edges += 1
+        a, b = self._find(a), self._find(b)
+        if a != b:
+            if len(self._components[a].members) < len(self._components[b].members):
+                a, b = b, a
+            self._parent[b] = a
+            self._components[a].absorb(self._components.pop(b))
+        self._components[a].edges += 1
+
+    def add(self, rows: Iterable[tuple]) -> int:
+        """Add campaign_networks rows (GRAPH_SELECT order); returns how many were new"""
+        added = 0
+        with self._lock:
+            for link_id, detection_id, accounts, vip_id, platform, threat_type, _ in rows:
+                link_id = str(link_id)
+                if link_id in self.links:
+                    continue
+                self.links.add(link_id)
+                added += 1
+
+                nodes = list(dict.fromkeys(self._node(account_key(account)) for account in accounts or ()
+                                           if account and account_key(account)))
+                if not nodes:
+                    continue
+                detection_id = str(detection_id)
+                detection = self.detection_ids.get(detection_id)
+                if detection is None:
+                    detection = self.detection_ids[detection_id] = len(self.detections)
+                    self.detections.append((detection_id, str(vip_id), platform, threat_type))
+
+                for node in nodes:
+                    self.node_detections[node].append(detection)
+                if len(nodes) > self.max_group:
+                    for node in nodes[1:]:
+                        self._link(nodes[0], node)
+                else:
+                    for i, a in enumerate(nodes):
+                        for b in nodes[i + 1:]:
+                            self._link(a, b)
+
+                component = self._components[self._find(nodes[0])]
+                component.detections.add(detection)
+                component.vip_ids.add(str(vip_id))
+                component.threat_types.add(threat_type)
+                component.top = None
+            if added:
+                self._ranking = None
+        return added
+
+    def node(self, name: str) -> Optional[int]:
+        return self.ids.get(account_key(name))
+
+    def describe(self, node: int) -> dict:
+        detections = self.node_detections[node]
+        return {
+            'account': self.names[node],
+            'degree': len(self.adjacency[node]),
+            'detections': len(detections),
+            'vip_ids': sorted({self.detections[d][1] for d in detections})
+        }
+
+    def neighborhood(self, name: str, hops: int = 1, limit: int = 1000) -> Optional[dict]:
+        """Accounts within ``hops`` of ``name`` by breadth-first search, nearest first"""
+        with self._lock:
+            start = self.node(name)
+            if start is None:
+                return None
+            distance = {start: 0}
+            queue = deque([start])
+            truncated = False
+            while queue and not truncated:
+                node = queue.popleft()
+                if distance[node] >= hops:
+                    continue
+                for neighbor in self.adjacency[node]:
+                    if neighbor in distance:
+                        continue
+                    if len(distance) >= limit:
+                        truncated = True
+                        break
+                    distance[neighbor] = distance[node] + 1
+                    queue.append(neighbor)
+
+            nodes = [dict(self.describe(node), hops=hops_away) for node, hops_away in distance.items()]
+            edges = [(self.names[a], self.names[b], weight) for a in distance
+                     for b, weight in self.adjacency[a].items() if a < b and b in distance]
+            return {'account': self.names[start], 'hops': hops, 'nodes': nodes, 'edges': edges,
+                    'truncated': truncated}
+
+    def component(self, name: str, limit: int = 1000) -> Optional[dict]:
+        """The connected component containing ``name``, most central accounts first"""
+        with self._lock:
+            start = self.node(name)
+            if start is None:
+                return None
+            return self._describe_component(self._components[self._find(start)], limit)
+
+    def components(self, min_size: int = 2, limit: int = 20, members: int = 10) -> List[dict]:
+        """Largest connected components with their most central accounts"""
+        with self._lock:
+            largest = heapq.nlargest(limit, (component for component in self._components.values()
+                                             if len(component.members) >= min_size),
+                                     key=lambda component: len(component.members))
+            return [self._describe_component(component, members) for component in largest]
+
+    def _describe_component(self, component: _Component, limit: int) -> dict:
+        if component.top is None or len(component.top) < min(limit, len(component.members)):
+            component.top = heapq.nlargest(max(limit, 100), component.members,
+                                           key=lambda node: len(self.adjacency[node]))
+        return {
+            'size': len(component.members),
+            'edges': component.edges,
+            'detections': len(component.detections),
+            'vip_ids': sorted(component.vip_ids),
+            'threat_types': sorted(component.threat_types),
+            'accounts': [self.describe(node) for node in component.top[:limit]]
+        }
+
+    def central(self, limit: int = 20) -> List[dict]:
+        """Accounts with the most distinct co-occurring accounts (degree centrality)"""
+        with self._lock:
+            if self._ranking is None or len(self._ranking) < min(limit, len(self.names)):
+                size = max(limit, len(self._ranking or ()), 100)
+                self._ranking = heapq.nlargest(size, range(len(self.names)), key=lambda node: len(self.adjacency[node]))
+            return [dict(self.describe(node), component_size=len(self._components[self._find(node)].members))
+                    for node in self._ranking[:limit]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'accounts': len(self.names),
+                'edges': self.edges,
+                'detections': len(self.detections),
+                'links': len(self.links),
+                'components': len(self._components),
+                'largest_component': max((len(component.members) for component in self._components.values()),
+                                         default=0)
+            }
+
+
+def load_links(db_manager, since: Optional[datetime] = None, fetch_size: int = 5000):
+    """Yield campaign_networks rows created at or after ``since`` (all when None); errors are re-raised"""
+    sql = GRAPH_SELECT + (" WHERE c.created_at >= %s" if since is not None else '') + " ORDER BY c.created_at"
+    try:
+        with db_manager.connection() as conn:
+            cursor = conn.cursor(name='campaign_graph')
+            cursor.itersize = fetch_size
+            cursor.execute(sql, (since,) if since is not None else None)
+            rows = cursor.fetchmany(fetch_size)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(fetch_size)
+            cursor.close()
+            conn.rollback()
+
+    except psycopg2.Error as e:
+        print(f"Campaign graph load error: {e}")
+        count_error('database', e)
+        raise
+
+
+class CampaignGraphIndex:
+    """Keeps a CampaignGraph in step with campaign_networks
+
+    A background thread adds links created since the last poll (with
+    ``overlap`` seconds of slack for late commits; rows already in the
+    graph are skipped). Every ``full_sync_every`` polls a fresh graph is
+    built off to the side and swapped in, dropping deleted detections.
+    """
+
+    def __init__(self, get_db_manager: Callable, refresh_interval: float = 30.0, full_sync_every: int = 120,
+                 overlap: float = 60.0, max_group: int = 500):
+        self.get_db_manager = get_db_manager
+        self.refresh_interval = refresh_interval
+        self.full_sync_every = full_sync_every
+        self.overlap = timedelta(seconds=overlap)
+        self.max_group = max_group
+        self.graph = CampaignGraph(max_group)
+
+        self._watermark = None
+        self._polls = 0
+        self._loaded_at = None
+        self._load_seconds = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def load(self, rows: Iterable[tuple], full: bool = False) -> int:
+        """Add rows to the live graph, or with ``full`` replace it with a graph of just these rows"""
+        watermark = [self._watermark]
+
+        def tracked(rows):
+            for row in rows:
+                if row[6] is not None and (watermark[0] is None or row[6] > watermark[0]):
+                    watermark[0] = row[6]
+                yield row
+
+        started = time.perf_counter()
+        if full:
+            # Built off to the side; queries keep using the old graph until the swap
+            graph = CampaignGraph(self.max_group)
+            added = graph.add(tracked(rows))
+            self.graph = graph
+        else:
+            # Fetch first so the graph lock isn't held across database reads
+            added = self.graph.add(list(tracked(rows)))
+        self._watermark = watermark[0]
+        self._load_seconds = time.perf_counter() - started
+        self._loaded_at = datetime.now()
+        return added
+
+    def refresh(self) -> bool:
+        db_manager = self.get_db_manager()
+        if db_manager is None:
+            return False
+        full = self._watermark is None or self._polls % self.full_sync_every == 0
+        self._polls += 1
+        try:
+            added = self.load(load_links(db_manager, None if full else self._watermark - self.overlap), full=full)
+        except psycopg2.Error:
+            return False
+        if added:
+            print(f"Campaign graph: {len(self.graph)} accounts ({added} new links)")
+        return True
+
+    def start(self):
+        """Build the graph and keep it current in this process"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='campaign-graph', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Campaign graph refresh error: {e}")
+                count_error('campaign_graph', e)
+            time.sleep(self.refresh_interval)
+
+    def stats(self) -> dict:
+        stats = self.graph.stats()
+        stats['load_seconds'] = round(self._load_seconds, 4)
+        stats['loaded_at'] = self._loaded_at.isoformat() if self._loaded_at else None
+        return stats
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -14,6 +15,133 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'Postgre123@')
     DB_PORT = os.getenv('DB_PORT', '5432')
     
+    # Supabase Postgres (threat_detections); exports of it return 503 when unset
+    SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL', '')
+    SUPABASE_DB_POOL_MAX_SIZE = int(os.getenv('SUPABASE_DB_POOL_MAX_SIZE', '4'))
+    
+    # Connection pool
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '5'))              # seconds to wait for a free connection
+    DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))  # recycle connections older than this
+    DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', '300'))          # recycle connections idle longer than this
+    DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))  # ping idle connections before reuse
+    
+    # Write-behind verification logging
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    LOG_BATCH_SIZE = int(os.getenv('LOG_BATCH_SIZE', '500'))
+    LOG_FLUSH_INTERVAL = float(os.getenv('LOG_FLUSH_INTERVAL', '1'))        # seconds between flushes
+    LOG_ENQUEUE_TIMEOUT = float(os.getenv('LOG_ENQUEUE_TIMEOUT', '0.05'))   # backpressure wait before spilling
+    LOG_SPILL_PATH = os.getenv('LOG_SPILL_PATH', 'verification_logs.spill')
+    LOG_RETRY_INTERVAL = float(os.getenv('LOG_RETRY_INTERVAL', '30'))       # seconds between spill replays
+    
+    # Suspicious activity detection
+    SUSPICIOUS_WINDOW = float(os.getenv('SUSPICIOUS_WINDOW', '3600'))              # sliding window in seconds
+    SUSPICIOUS_EMAIL_THRESHOLD = int(os.getenv('SUSPICIOUS_EMAIL_THRESHOLD', '3'))  # failed attempts per email
+    SUSPICIOUS_IP_THRESHOLD = int(os.getenv('SUSPICIOUS_IP_THRESHOLD', '20'))       # failed attempts per IP
+    SUSPICIOUS_RESYNC_INTERVAL = float(os.getenv('SUSPICIOUS_RESYNC_INTERVAL', '0'))  # re-seed from DB; 0 disables
+    # Reverse proxies/load balancers in front of the app; their X-Forwarded-For gives the client IP
+    # used for the IP threshold, rate limits and logs. Leave 0 when clients connect directly.
+    TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+    
+    # Statistics cache
+    STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '5'))  # seconds a cached snapshot is fresh
+    STATS_STALE_WHILE_REVALIDATE = os.getenv('STATS_STALE_WHILE_REVALIDATE', 'True').lower() == 'true'
+    STATS_MAX_STALE = float(os.getenv('STATS_MAX_STALE', '60'))  # how long past the TTL a stale snapshot may be served
+    
+    # verify_vip_user result cache
+    VIP_USER_CACHE_SIZE = int(os.getenv('VIP_USER_CACHE_SIZE', '10000'))           # max cached lookups; 0 disables
+    VIP_USER_CACHE_TTL = float(os.getenv('VIP_USER_CACHE_TTL', '300'))            # seconds a found user is cached
+    VIP_USER_CACHE_NEGATIVE_TTL = float(os.getenv('VIP_USER_CACHE_NEGATIVE_TTL', '30'))  # seconds a miss is cached
+    VIP_USER_CACHE_LISTEN = os.getenv('VIP_USER_CACHE_LISTEN', 'False').lower() == 'true'  # LISTEN for vip_users changes
+    VIP_USER_CACHE_CHANNEL = os.getenv('VIP_USER_CACHE_CHANNEL', 'vip_users_changed')
+    
+    # Keys for exports, detection ingest, /scan, /campaigns, security events and internal stats
+    # (comma-separated); those endpoints answer 503 when unset
+    ADMIN_API_KEYS = [key.strip() for key in os.getenv('ADMIN_API_KEYS', '').split(',') if key.strip()]
+    METRICS_REQUIRE_API_KEY = os.getenv('METRICS_REQUIRE_API_KEY', 'False').lower() == 'true'  # else firewall /api/metrics
+    
+    # Streaming exports
+    EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '10000'))   # rows per keyset page (one short transaction each)
+    EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '1000'))  # rows serialized per response chunk
+    
+    # Rate limiting: "<count>/<period>[:<burst>]", e.g. "30/minute" or "5/second:20"; empty disables a limit
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', '')       # redis://... shares buckets across workers
+    RATE_LIMIT_GLOBAL = os.getenv('RATE_LIMIT_GLOBAL', '')                 # all limited endpoints together, per store
+    RATE_LIMIT_DEFAULT_IP = os.getenv('RATE_LIMIT_DEFAULT_IP', '300/minute')
+    RATE_LIMIT_DEFAULT_EMAIL = os.getenv('RATE_LIMIT_DEFAULT_EMAIL', '')
+    # Per-endpoint overrides as JSON: {"api.verify_vip": {"ip": "60/minute", "email": "10/minute"}}
+    RATE_LIMIT_RULES = os.getenv('RATE_LIMIT_RULES', json.dumps({
+        'api.verify_vip': {'ip': '60/minute', 'email': '10/minute'},
+        'api.verify_vip_batch': {'ip': '10/minute'},
+        'api.get_user_activity': {'ip': '120/minute', 'email': '30/minute'}
+    }))
+    RATE_LIMIT_EXEMPT = os.getenv('RATE_LIMIT_EXEMPT', 'index,api.health_check,api.readiness_check,metrics').split(',')
+    RATE_LIMIT_LOG_INTERVAL = float(os.getenv('RATE_LIMIT_LOG_INTERVAL', '60'))  # seconds per aggregated log row
+    
+    # Threat detection ingestion (Supabase threat_detections)
+    INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '50000'))        # queued rows before 503 backpressure
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '2000'))         # rows per COPY/upsert transaction
+    INGEST_FLUSH_INTERVAL = float(os.getenv('INGEST_FLUSH_INTERVAL', '0.5'))  # max seconds a row waits for a batch
+    INGEST_MAX_REQUEST_ITEMS = int(os.getenv('INGEST_MAX_REQUEST_ITEMS', '5000'))
+    
+    # VIP keyword/handle matching for /api/scan (Supabase vips)
+    SCAN_REFRESH_INTERVAL = float(os.getenv('SCAN_REFRESH_INTERVAL', '30'))  # seconds between vips change polls
+    SCAN_FULL_SYNC_EVERY = int(os.getenv('SCAN_FULL_SYNC_EVERY', '20'))      # polls between full re-reads (catch deletes)
+    SCAN_FUZZY_MIN_LENGTH = int(os.getenv('SCAN_FUZZY_MIN_LENGTH', '5'))     # shortest handle matched within one edit
+    SCAN_MAX_TEXTS = int(os.getenv('SCAN_MAX_TEXTS', '500'))
+    SCAN_MAX_TEXT_LENGTH = int(os.getenv('SCAN_MAX_TEXT_LENGTH', '20000'))
+    
+    # Campaign account graph (Supabase campaign_networks)
+    CAMPAIGN_GRAPH_REFRESH_INTERVAL = float(os.getenv('CAMPAIGN_GRAPH_REFRESH_INTERVAL', '30'))  # seconds between polls
+    CAMPAIGN_GRAPH_FULL_SYNC_EVERY = int(os.getenv('CAMPAIGN_GRAPH_FULL_SYNC_EVERY', '120'))    # polls between rebuilds
+    CAMPAIGN_GRAPH_MAX_GROUP = int(os.getenv('CAMPAIGN_GRAPH_MAX_GROUP', '500'))  # larger detections link as a star
+    CAMPAIGN_GRAPH_MAX_HOPS = int(os.getenv('CAMPAIGN_GRAPH_MAX_HOPS', '3'))
+    CAMPAIGN_GRAPH_MAX_NODES = int(os.getenv('CAMPAIGN_GRAPH_MAX_NODES', '5000'))  # per neighborhood/component response
+    
+    # Dashboard time series (rollup tables)
+    ROLLUP_COMPACT_INTERVAL = float(os.getenv('ROLLUP_COMPACT_INTERVAL', '10'))  # seconds; 0 when cron compacts instead
+    TIMESERIES_MAX_POINTS = int(os.getenv('TIMESERIES_MAX_POINTS', '2400'))      # buckets per series (100 days hourly)
+    
+    # Future verification_logs partitions, created by every worker
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+    PARTITION_MAINTENANCE_INTERVAL = float(os.getenv('PARTITION_MAINTENANCE_INTERVAL', '3600'))  # seconds; 0 when cron runs verification_log_retention.py
+    
+    # Security events (batched writes and /api/security-events/stream)
+    SECURITY_EVENT_QUEUE_SIZE = int(os.getenv('SECURITY_EVENT_QUEUE_SIZE', '20000'))
+    SECURITY_EVENT_BATCH_SIZE = int(os.getenv('SECURITY_EVENT_BATCH_SIZE', '500'))
+    SECURITY_EVENT_FLUSH_INTERVAL = float(os.getenv('SECURITY_EVENT_FLUSH_INTERVAL', '1.0'))   # seconds low/medium events may wait
+    SECURITY_EVENT_MAX_SUBSCRIBERS = int(os.getenv('SECURITY_EVENT_MAX_SUBSCRIBERS', '50'))    # open streams per worker
+    SECURITY_EVENT_SUBSCRIBER_QUEUE = int(os.getenv('SECURITY_EVENT_SUBSCRIBER_QUEUE', '1000'))  # buffered per stream; oldest dropped
+    SECURITY_EVENT_STREAM_KEEPALIVE = float(os.getenv('SECURITY_EVENT_STREAM_KEEPALIVE', '15'))  # seconds between SSE comments
+    SECURITY_EVENT_STREAM_MAX_AGE = float(os.getenv('SECURITY_EVENT_STREAM_MAX_AGE', '300'))    # close streams after; clients reconnect
+    SECURITY_EVENTS_MAX_LIMIT = int(os.getenv('SECURITY_EVENTS_MAX_LIMIT', '1000'))
+    SECURITY_EVENT_CHANNEL = os.getenv('SECURITY_EVENT_CHANNEL', 'security_events')  # NOTIFY relay between workers; '' disables
+    
+    # Response cache for polled read endpoints: TTL in seconds per endpoint, 0 disables one
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_TTLS = os.getenv('RESPONSE_CACHE_TTLS', json.dumps({
+        'api.get_vip_stats': 5,
+        'api.get_security_status': 5,
+        'api.get_user_activity': 2,
+        'api.health_check': 1
+    }))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    RESPONSE_CACHE_MIN_COMPRESS_SIZE = int(os.getenv('RESPONSE_CACHE_MIN_COMPRESS_SIZE', '1024'))  # bytes
+    
+    # Startup warm-up: failed checks back off from WARMUP_RETRY_INTERVAL to WARMUP_MAX_RETRY_INTERVAL
+    WARMUP_RETRY_INTERVAL = float(os.getenv('WARMUP_RETRY_INTERVAL', '1'))          # seconds
+    WARMUP_MAX_RETRY_INTERVAL = float(os.getenv('WARMUP_MAX_RETRY_INTERVAL', '30'))  # seconds
+    
+    # Bulk verification
+    VERIFY_BATCH_MAX_SIZE = int(os.getenv('VERIFY_BATCH_MAX_SIZE', '1000'))
+    
+    # Verification rules: 'default', 'file' or 'database'
+    VERIFICATION_RULES_SOURCE = os.getenv('VERIFICATION_RULES_SOURCE', 'default')
+    VERIFICATION_RULES_PATH = os.getenv('VERIFICATION_RULES_PATH', os.path.join(os.path.dirname(__file__), 'verification_rules.json'))
+    VERIFICATION_RULES_RELOAD_INTERVAL = float(os.getenv('VERIFICATION_RULES_RELOAD_INTERVAL', '30'))  # seconds between reload checks
+    
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
 
@@ -22,6 +150,18 @@ class DevelopmentConfig(Config):
 
 class ProductionConfig(Config):
     DEBUG = False
+    
+    # Gunicorn process model, see gunicorn_conf.py
+    BIND = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+    WORKERS = int(os.getenv('GUNICORN_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+    THREADS = int(os.getenv('GUNICORN_THREADS', '4'))                  # > 1 selects the gthread worker
+    KEEPALIVE = int(os.getenv('GUNICORN_KEEPALIVE', '5'))              # seconds to hold idle keep-alive connections
+    TIMEOUT = int(os.getenv('GUNICORN_TIMEOUT', '30'))                 # kill workers silent for this long
+    GRACEFUL_TIMEOUT = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))  # time to finish requests on reload/stop
+    MAX_REQUESTS = int(os.getenv('GUNICORN_MAX_REQUESTS', '10000'))    # recycle workers after this many requests
+    MAX_REQUESTS_JITTER = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '1000'))
+    PRELOAD_APP = os.getenv('GUNICORN_PRELOAD_APP', 'False').lower() == 'true'
+    PRE_FORK_HOOK = os.getenv('GUNICORN_PRE_FORK_HOOK', '')           # optional 'module:function' called before each fork
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,197 @@
+"""
+Streaming exports of audit tables as NDJSON or CSV
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import psycopg2
+
+from .metrics import count_error, registry
+
+EXPORT_ROWS = registry.counter('guardiq_export_rows_total', 'Rows streamed by export endpoints', ('table', 'format'))
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """An exportable table: its columns and the filters it accepts
+
+    ``filters`` maps a query parameter to the SQL comparison it applies,
+    with one ``%s`` for the value. Rows are always ordered by
+    ``(created_at, id)``, which is also the keyset pagination key.
+    """
+    name: str
+    columns: Tuple[str, ...]
+    filters: Tuple[Tuple[str, str], ...]
+
+    @property
+    def select_list(self) -> str:
+        return ', '.join(self.columns)
+
+
+VERIFICATION_LOGS = ExportTable(
+    name='verification_logs',
+    columns=('id', 'email', 'access_code', 'verification_status', 'ip_address', 'user_agent', 'created_at'),
+    filters=(
+        ('status', 'verification_status = %s'),
+        ('email', 'email = %s')
+    )
+)
+
+THREAT_DETECTIONS = ExportTable(
+    name='threat_detections',
+    columns=('id', 'vip_id', 'platform', 'threat_type', 'content_url', 'content_text', 'evidence_urls',
+             'confidence_score', 'status', 'metadata', 'created_at', 'updated_at'),
+    filters=(
+        ('status', 'status = %s::detection_status'),
+        ('vip_id', 'vip_id = %s::uuid')
+    )
+)
+
+
+def build_page_query(table: ExportTable, filters: dict, since: Optional[datetime], until: Optional[datetime],
+                     after: Optional[tuple], limit: int) -> Tuple[str, list]:
+    """SQL and parameters for one keyset page strictly after ``after`` = (created_at, id)"""
+    clauses, params = [], []
+    for name, clause in table.filters:
+        if filters.get(name) is not None:
+            clauses.append(clause)
+            params.append(filters[name])
+    if since is not None:
+        clauses.append('created_at >= %s')
+        params.append(since)
+    if until is not None:
+        clauses.append('created_at < %s')
+        params.append(until)
+    if after is not None:
+        clauses.append('(created_at, id) > (%s, %s)')
+        params.extend(after)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    sql = f"""
+        SELECT {table.select_list} FROM {table.name}
+        {where}
+        ORDER BY created_at, id
+        LIMIT %s
+    """
+    params.append(limit)
+    return sql, params
+
+
+def stream_rows(db_manager, table: ExportTable, filters: dict, since: Optional[datetime] = None,
+                until: Optional[datetime] = None, page_size: int = 10000,
+                fetch_size: int = 2000) -> Iterator[tuple]:
+    """Yield matching rows in (created_at, id) order, one keyset page at a time
+
+    Each page is read through a server-side cursor ``fetch_size`` rows at a
+    time, in its own short transaction; the pooled connection is returned
+    between pages, so a slow client never pins a snapshot or a connection
+    for the whole export. Database errors are logged and re-raised.
+    """
+    created_at_index = table.columns.index('created_at')
+    id_index = table.columns.index('id')
+    after = None
+
+    while True:
+        sql, params = build_page_query(table, filters, since, until, after, page_size)
+        try:
+            with db_manager.connection() as conn:
+                cursor = conn.cursor(name=f'export_{table.name}')
+                cursor.itersize = fetch_size
+                cursor.execute(sql, params)
+                page = 0
+                last = None
+                rows = cursor.fetchmany(fetch_size)
+                while rows:
+                    page += len(rows)
+                    last = rows[-1]
+                    yield from rows
+                    rows = cursor.fetchmany(fetch_size)
+                cursor.close()
+                conn.rollback()
+
+        except psycopg2.Error as e:
+            print(f"Export error for {table.name}: {e}")
+            count_error('database', e)
+            raise
+
+        if page < page_size:
+            return
+        after = (last[created_at_index], last[id_index])
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunks(columns: Sequence[str], rows: Iterator[tuple], chunk_rows: int = 1000) -> Iterator[str]:
+    """Serialize rows as one JSON object per line, yielding ``chunk_rows`` lines at a time"""
+    encode = json.JSONEncoder(default=_json_value, separators=(',', ':')).encode
+    buffer: List[str] = []
+    for row in rows:
+        buffer.append(encode(dict(zip(columns, row))))
+        if len(buffer) >= chunk_rows:
+            buffer.append('')
+            yield '\n'.join(buffer)
+            buffer = []
+    if buffer:
+        buffer.append('')
+        yield '\n'.join(buffer)
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterator[tuple], chunk_rows: int = 1000) -> Iterator[str]:
+    """Serialize rows as CSV with a header line, yielding ``chunk_rows`` rows at a time"""
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(columns)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_rows:
+            writer.writerows(batch)
+            batch = []
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+    writer.writerows(batch)
+    yield out.getvalue()
+
+
+def export_chunks(db_manager, table: ExportTable, fmt: str, filters: dict, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None, page_size: int = 10000, chunk_rows: int = 1000,
+                  on_error: Optional[Callable[[Exception], Optional[str]]] = None) -> Iterator[str]:
+    """Response body chunks for an export; a mid-stream error ends the body early
+
+    ``on_error`` may return a final chunk describing the failure.
+    """
+    serialize = ndjson_chunks if fmt == 'ndjson' else csv_chunks
+
+    def counted(rows):
+        count = 0
+        try:
+            for count, row in enumerate(rows, 1):
+                yield row
+        finally:
+            EXPORT_ROWS.inc(table.name, fmt, amount=count)
+
+    try:
+        yield from serialize(table.columns, counted(stream_rows(db_manager, table, filters, since, until, page_size)),
+                             chunk_rows)
+    except psycopg2.Error as e:
+        tail = on_error(e) if on_error is not None else None
+        if tail:
+            yield tail
@@ -0,0 +1,75 @@
+"""
+Gunicorn settings for GuardIQ, driven by ProductionConfig
+
+    gunicorn -c python:backend.gunicorn_conf backend.wsgi:application
+
+Send SIGHUP to the master for a graceful reload and SIGTERM for a graceful
+shutdown; workers get GRACEFUL_TIMEOUT seconds to finish in-flight requests.
+"""
+import importlib
+import os
+
+from .config import ProductionConfig
+
+bind = ProductionConfig.BIND
+workers = ProductionConfig.WORKERS
+threads = ProductionConfig.THREADS
+worker_class = 'gthread' if ProductionConfig.THREADS > 1 else 'sync'
+keepalive = ProductionConfig.KEEPALIVE
+timeout = ProductionConfig.TIMEOUT
+graceful_timeout = ProductionConfig.GRACEFUL_TIMEOUT
+max_requests = ProductionConfig.MAX_REQUESTS
+max_requests_jitter = ProductionConfig.MAX_REQUESTS_JITTER
+preload_app = ProductionConfig.PRELOAD_APP
+accesslog = '-'
+errorlog = '-'
+
+# Each open /api/security-events/stream holds one of a worker's threads for up
+# to SECURITY_EVENT_STREAM_MAX_AGE seconds; keep two free for other requests
+max_event_streams = min(ProductionConfig.SECURITY_EVENT_MAX_SUBSCRIBERS, max(0, threads - 2))
+if max_event_streams < ProductionConfig.SECURITY_EVENT_MAX_SUBSCRIBERS and 'SECURITY_EVENT_MAX_SUBSCRIBERS' in os.environ:
+    print(f"SECURITY_EVENT_MAX_SUBSCRIBERS={ProductionConfig.SECURITY_EVENT_MAX_SUBSCRIBERS} would starve "
+          f"{threads} worker threads; allowing {max_event_streams} event stream(s) per worker")
+
+
+def _load_hook(path: str):
+    """Resolve a 'module:function' string"""
+    module_name, _, func_name = path.partition(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+_custom_pre_fork = _load_hook(ProductionConfig.PRE_FORK_HOOK) if ProductionConfig.PRE_FORK_HOOK else None
+
+
+def pre_fork(server, worker):
+    """Runs in the master before each worker is forked"""
+    if preload_app:
+        # Never let workers inherit sockets the master opened while loading the app
+        from .api_routes import db_manager
+        db_manager.pool.reset()
+
+    if _custom_pre_fork is not None:
+        _custom_pre_fork(server, worker)
+
+
+def post_fork(server, worker):
+    """Runs in each worker: DB pools and background threads are created here"""
+    from .api_routes import security_event_bus, start_background_services
+    security_event_bus.max_subscribers = max_event_streams
+    start_background_services()
+
+
+def worker_exit(server, worker):
+    """Drain queued verification logs before the worker goes away"""
+    from .api_routes import (
+        detection_ingestor, log_writer, partition_maintainer, rate_limiter, rollup_compactor, security_event_bus,
+        security_event_writer, warmup
+    )
+    warmup.stop()
+    security_event_bus.close()
+    rollup_compactor.close()
+    partition_maintainer.close()
+    rate_limiter.close()
+    log_writer.close()
+    detection_ingestor.close()
+    security_event_writer.close()
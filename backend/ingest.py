@@ -0,0 +1,324 @@
+"""
+Bulk ingestion pipeline for Supabase threat_detections
+"""
+import csv
+import io
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, List, Optional, Tuple
+
+import psycopg2
+
+from .metrics import count_error, registry
+
+# Mirrors the enums in supabase/migrations
+THREAT_TYPES = frozenset(('impersonation', 'misinformation', 'data_leak', 'deepfake',
+                          'coordinated_campaign', 'harassment'))
+PLATFORMS = frozenset(('twitter', 'facebook', 'instagram', 'linkedin', 'telegram', 'discord',
+                       'github', 'pastebin', 'whatsapp', 'tiktok'))
+DETECTION_STATUSES = frozenset(('active', 'resolved', 'investigating', 'false_positive'))
+
+INGEST_ROWS = registry.counter(
+    'guardiq_ingest_detections_total', 'Threat detections by ingestion outcome', ('outcome',)
+)
+INGEST_STAGE_LATENCY = registry.histogram(
+    'guardiq_ingest_stage_duration_seconds', 'Threat detection ingestion latency by stage', ('stage',)
+)
+
+# Staging columns, in COPY order
+STAGE_COLUMNS = ('id', 'vip_id', 'platform', 'threat_type', 'content_url', 'content_text',
+                 'evidence_urls', 'confidence_score', 'status', 'metadata',
+                 'related_accounts', 'network_analysis')
+
+
+def validate_detection(item) -> Tuple[Optional[tuple], Optional[str]]:
+    """Check one detection payload, returning (staging row, error)"""
+    if not isinstance(item, dict):
+        return None, 'Detection must be an object'
+
+    try:
+        vip_id = str(uuid.UUID(str(item.get('vip_id') or item.get('vipId') or '')))
+    except ValueError:
+        return None, 'vip_id must be a UUID'
+
+    platform = str(item.get('platform') or '').strip().lower()
+    if platform not in PLATFORMS:
+        return None, f"platform must be one of: {', '.join(sorted(PLATFORMS))}"
+
+    threat_type = str(item.get('threat_type') or item.get('threatType') or '').strip().lower()
+    if threat_type not in THREAT_TYPES:
+        return None, f"threat_type must be one of: {', '.join(sorted(THREAT_TYPES))}"
+
+    status = str(item.get('status') or 'active').strip().lower()
+    if status not in DETECTION_STATUSES:
+        return None, f"status must be one of: {', '.join(sorted(DETECTION_STATUSES))}"
+
+    confidence = item.get('confidence_score', item.get('confidenceScore'))
+    if confidence is not None:
+        if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+            return None, 'confidence_score must be a number between 0 and 1'
+
+    evidence_urls = item.get('evidence_urls') or item.get('evidenceUrls') or []
+    related_accounts = item.get('related_accounts') or item.get('relatedAccounts') or []
+    for name, values in (('evidence_urls', evidence_urls), ('related_accounts', related_accounts)):
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            return None, f'{name} must be a list of strings'
+
+    metadata = item.get('metadata') or {}
+    network_analysis = item.get('network_analysis') or item.get('networkAnalysis') or {}
+    if not isinstance(metadata, dict) or not isinstance(network_analysis, dict):
+        return None, 'metadata and network_analysis must be objects'
+
+    content_url = str(item.get('content_url') or item.get('contentUrl') or '').strip() or None
+    content_text = item.get('content_text') or item.get('contentText') or None
+
+    return (
+        str(uuid.uuid4()), vip_id, platform, threat_type, content_url,
+        str(content_text) if content_text is not None else None,
+        evidence_urls, confidence, status, metadata,
+        related_accounts, network_analysis if (related_accounts or network_analysis) else None
+    ), None
+
+
+def _pg_array(values: List[str]) -> str:
+    """Postgres text[] literal"""
+    return '{' + ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values) + '}'
+
+
+def _copy_buffer(rows: List[tuple]) -> io.StringIO:
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    for row in rows:
+        (id_, vip_id, platform, threat_type, content_url, content_text, evidence_urls,
+         confidence, status, metadata, related_accounts, network_analysis) = row
+        writer.writerow((
+            id_, vip_id, platform, threat_type, content_url, content_text, _pg_array(evidence_urls),
+            confidence, status, json.dumps(metadata),
+            _pg_array(related_accounts), json.dumps(network_analysis) if network_analysis is not None else None
+        ))
+    out.seek(0)
+    return out
+
+
+def dedupe(rows: List[tuple]) -> Tuple[List[tuple], int]:
+    """Collapse rows sharing (vip_id, platform, content_url) within a batch, keeping the first
+
+    Rows without a content_url are never duplicates, matching the unique index.
+    """
+    seen = set()
+    unique = []
+    for row in rows:
+        if row[4] is not None:
+            key = (row[1], row[2], row[4])
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(row)
+    return unique, len(rows) - len(unique)
+
+
+def write_batch(conn, rows: List[tuple]) -> dict:
+    """COPY a batch into a staging table, upsert threat_detections and link campaign_networks
+
+    Runs in one transaction on ``conn``; the caller commits.
+    """
+    rows, duplicates = dedupe(rows)
+    cursor = conn.cursor()
+
+    started = time.perf_counter()
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS detection_stage (
+            id UUID, vip_id UUID, platform TEXT, threat_type TEXT, content_url TEXT, content_text TEXT,
+            evidence_urls TEXT[], confidence_score NUMERIC, status TEXT, metadata JSONB,
+            related_accounts TEXT[], network_analysis JSONB
+        ) ON COMMIT DELETE ROWS
+    """)
+    cursor.copy_expert(
+        f"COPY detection_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        _copy_buffer(rows)
+    )
+    INGEST_STAGE_LATENCY.observe(time.perf_counter() - started, 'copy')
+
+    # Existing rows with the same key keep their id and merge the new evidence. Detections
+    # that reported network context get one campaign_networks row unless they already have one.
+    # Rows for a vip_id that does not exist are skipped: one of them would otherwise fail the
+    # foreign key and with it every other request's rows merged into this batch.
+    started = time.perf_counter()
+    cursor.execute("""
+        WITH upserted AS (
+            INSERT INTO threat_detections
+            (id, vip_id, platform, threat_type, content_url, content_text, evidence_urls,
+             confidence_score, status, metadata)
+            SELECT id, vip_id, platform::platform_type, threat_type::threat_type, content_url, content_text,
+                   evidence_urls, confidence_score, status::detection_status, metadata
+            FROM detection_stage s
+            WHERE EXISTS (SELECT 1 FROM vips v WHERE v.id = s.vip_id)
+            ON CONFLICT (vip_id, platform, content_url) DO UPDATE SET
+                confidence_score = GREATEST(threat_detections.confidence_score, EXCLUDED.confidence_score),
+                evidence_urls = ARRAY(
+                    SELECT DISTINCT unnest(threat_detections.evidence_urls || EXCLUDED.evidence_urls)
+                ),
+                updated_at = now()
+            RETURNING id, vip_id, platform, content_url, (xmax = 0) AS inserted
+        ),
+        mapped AS (
+            SELECT u.id AS detection_id, s.related_accounts, s.network_analysis
+            FROM upserted u JOIN detection_stage s ON s.id = u.id
+            UNION ALL
+            SELECT u.id, s.related_accounts, s.network_analysis
+            FROM upserted u JOIN detection_stage s
+              ON NOT u.inserted AND s.vip_id = u.vip_id AND s.platform::platform_type = u.platform
+              AND s.content_url = u.content_url
+        ),
+        linked AS (
+            INSERT INTO campaign_networks (detection_id, related_accounts, network_analysis)
+            SELECT m.detection_id, m.related_accounts, m.network_analysis
+            FROM mapped m
+            WHERE m.network_analysis IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM campaign_networks c WHERE c.detection_id = m.detection_id)
+            RETURNING 1
+        )
+        SELECT
+            (SELECT count(*) FROM upserted WHERE inserted),
+            (SELECT count(*) FROM upserted),
+            (SELECT count(*) FROM linked),
+            (SELECT count(*) FROM detection_stage s WHERE NOT EXISTS (SELECT 1 FROM vips v WHERE v.id = s.vip_id))
+    """)
+    inserted, upserted, linked, unknown_vip = cursor.fetchone()
+    INGEST_STAGE_LATENCY.observe(time.perf_counter() - started, 'upsert')
+    cursor.close()
+
+    return {
+        'inserted': inserted,
+        'updated': upserted - inserted,
+        'deduplicated': duplicates,
+        'linked': linked,
+        'unknown_vip': unknown_vip
+    }
+
+
+class DetectionIngestor:
+    """Bounded, backpressured write pipeline for threat detections
+
+    ``submit`` accepts a whole batch of validated rows or none of it: when
+    the queue cannot take every row the caller is told to retry later
+    (HTTP 503) instead of letting memory grow. A worker thread drains up to
+    ``batch_size`` rows at a time and writes them with ``write_batch``;
+    failed batches are retried ``max_retries`` times before being dropped.
+    """
+
+    def __init__(self, get_db_manager: Callable, max_queue: int = 50000, batch_size: int = 2000,
+                 flush_interval: float = 0.5, max_retries: int = 3, retry_delay: float = 2.0):
+        self.get_db_manager = get_db_manager
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._rows = deque()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._pid = None
+        self._stop = threading.Event()
+
+        self._stats = {'accepted': 0, 'rejected_backpressure': 0, 'inserted': 0, 'updated': 0,
+                       'deduplicated': 0, 'linked': 0, 'unknown_vip': 0, 'failed': 0, 'batches': 0}
+
+    def start(self):
+        with self._cond:
+            if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Rows inherited from the parent are the parent's to write
+                self._rows.clear()
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='detection-ingest', daemon=True)
+            self._worker.start()
+
+    def submit(self, rows: List[tuple]) -> bool:
+        """Queue validated rows; False means the pipeline is full and nothing was queued"""
+        self.start()
+        with self._cond:
+            if len(self._rows) + len(rows) > self.max_queue:
+                self._stats['rejected_backpressure'] += len(rows)
+                INGEST_ROWS.inc('rejected_backpressure', amount=len(rows))
+                return False
+            now = time.perf_counter()
+            self._rows.extend((now, row) for row in rows)
+            self._stats['accepted'] += len(rows)
+            self._cond.notify()
+        INGEST_ROWS.inc('accepted', amount=len(rows))
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop after writing what is queued (up to ``timeout`` seconds)"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {'queued': len(self._rows), 'max_queue': self.max_queue, **self._stats}
+
+    def _take(self) -> List[tuple]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._rows) < self.batch_size and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and self._rows:
+                    break
+                self._cond.wait(remaining if remaining > 0 else self.flush_interval)
+            count = min(self.batch_size, len(self._rows))
+            batch = [self._rows.popleft() for _ in range(count)]
+
+        now = time.perf_counter()
+        for queued_at, _ in batch:
+            INGEST_STAGE_LATENCY.observe(now - queued_at, 'queue')
+        return [row for _, row in batch]
+
+    def _run(self):
+        while True:
+            rows = self._take()
+            if not rows:
+                if self._stop.is_set():
+                    return
+                continue
+            self._write(rows)
+
+    def _write(self, rows: List[tuple]):
+        for attempt in range(self.max_retries + 1):
+            db_manager = self.get_db_manager()
+            if db_manager is None:
+                break
+            started = time.perf_counter()
+            try:
+                with db_manager.connection() as conn:
+                    result = write_batch(conn, rows)
+                    conn.commit()
+                INGEST_STAGE_LATENCY.observe(time.perf_counter() - started, 'batch')
+                with self._cond:
+                    self._stats['batches'] += 1
+                    for key, value in result.items():
+                        self._stats[key] += value
+                for key, value in result.items():
+                    INGEST_ROWS.inc(key, amount=value)
+                return
+            except psycopg2.Error as e:
+                print(f"Detection ingest error (attempt {attempt + 1}): {e}")
+                count_error('database', e)
+                if attempt < self.max_retries and self._stop.wait(self.retry_delay * (attempt + 1)):
+                    # Shutting down: give up on this batch rather than hold up the exit
+                    break
+
+        with self._cond:
+            self._stats['failed'] += len(rows)
+        INGEST_ROWS.inc('failed', amount=len(rows))
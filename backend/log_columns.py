@@ -0,0 +1,163 @@
+"""
+Columnar storage for large verification_logs result sets
+"""
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, Optional, Sequence
+
+from .models import VerificationLog, VerificationLogRecord
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up aggregation and to_numpy
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# Matches numpy's NaT, so missing ids/timestamps survive to_numpy() as NaT
+_NULL = -2 ** 63
+
+
+class _DictColumn:
+    """Dictionary-encoded string column: one code per row plus the distinct values"""
+    __slots__ = ('values', 'index', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+        self.codes = array('I')
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def extend(self, values: Iterable):
+        index = self.index
+        distinct = self.values
+        codes = []
+        for value in values:
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(distinct)
+                distinct.append(value)
+            codes.append(code)
+        self.codes.extend(codes)
+
+    def __getitem__(self, i: int):
+        return self.values[self.codes[i]]
+
+    def counts(self) -> Dict[str, int]:
+        if np is not None and self.codes:
+            tally = np.bincount(np.frombuffer(self.codes, dtype=np.uint32), minlength=len(self.values))
+            return {value: int(n) for value, n in zip(self.values, tally) if n}
+        return {self.values[code]: n for code, n in Counter(self.codes).items()}
+
+
+class VerificationLogColumns:
+    """Verification logs stored column-wise instead of one object per row
+
+    ``id`` and ``created_at`` (microseconds since the epoch, naive like the
+    column) are ``array('q')``; string columns are dictionary-encoded, which
+    also keeps repeated emails, statuses and user agents stored once.
+    ``to_numpy`` exposes the columns as NumPy arrays without per-row
+    objects when NumPy is installed.
+    """
+
+    FIELDS = VerificationLogRecord._fields
+    _STRING_FIELDS = ('email', 'access_code', 'verification_status', 'ip_address', 'user_agent')
+
+    def __init__(self):
+        self.ids = array('q')
+        self.created_at = array('q')
+        self.strings = {name: _DictColumn() for name in self._STRING_FIELDS}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'VerificationLogColumns':
+        columns = cls()
+        columns.extend_rows(rows)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, log):
+        """Append a VerificationLog or VerificationLogRecord"""
+        self.ids.append(log.id if log.id is not None else _NULL)
+        self.created_at.append(_to_micros(log.created_at))
+        for name, column in self.strings.items():
+            column.append(getattr(log, name))
+
+    def extend_rows(self, rows: Iterable[Sequence]):
+        """Append result tuples in VerificationLogRecord column order"""
+        rows = rows if isinstance(rows, list) else list(rows)
+        if not rows:
+            return
+        ids, emails, access_codes, statuses, ips, user_agents, created_at = zip(*rows)
+        self.ids.extend(_NULL if value is None else value for value in ids)
+        self.created_at.extend(map(_to_micros, created_at))
+        for name, values in zip(self._STRING_FIELDS, (emails, access_codes, statuses, ips, user_agents)):
+            self.strings[name].extend(values)
+
+    def record(self, i: int) -> VerificationLogRecord:
+        return VerificationLogRecord(
+            None if self.ids[i] == _NULL else self.ids[i],
+            *(self.strings[name][i] for name in self._STRING_FIELDS),
+            _from_micros(self.created_at[i])
+        )
+
+    def __getitem__(self, i: int) -> VerificationLogRecord:
+        return self.record(range(len(self))[i])
+
+    def __iter__(self) -> Iterator[VerificationLogRecord]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def to_models(self) -> Iterator[VerificationLog]:
+        """Mutable VerificationLog objects, e.g. to resubmit through the log writer"""
+        for record in self:
+            yield VerificationLog(*record)
+
+    def column(self, name: str) -> list:
+        """Decoded values of one column"""
+        if name == 'id':
+            return [None if value == _NULL else value for value in self.ids]
+        if name == 'created_at':
+            return [_from_micros(value) for value in self.created_at]
+        column = self.strings[name]
+        values = column.values
+        return [values[code] for code in column.codes]
+
+    def counts(self, name: str) -> Dict[str, int]:
+        """Rows per distinct value of a string column, e.g. ``counts('verification_status')``"""
+        return self.strings[name].counts()
+
+    def to_numpy(self) -> Optional[dict]:
+        """Zero-copy NumPy views: ids, datetime64[us] timestamps, and (codes, categories) per string column
+
+        Returns None when NumPy is not installed.
+        """
+        if np is None:
+            return None
+        result = {
+            'id': np.frombuffer(self.ids, dtype=np.int64),
+            'created_at': np.frombuffer(self.created_at, dtype=np.int64).view('datetime64[us]')
+        }
+        for name, column in self.strings.items():
+            result[name] = (np.frombuffer(column.codes, dtype=np.uint32), list(column.values))
+        return result
+
+
+def _to_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return _NULL
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    return None if value == _NULL else _EPOCH + timedelta(microseconds=value)
@@ -0,0 +1,348 @@
+"""
+Write-behind pipeline for verification_logs inserts
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import psycopg2
+
+from .metrics import count_error
+from .models import DatabaseManager, VerificationLog
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows: spill files are then coordinated per process only
+    fcntl = None
+
+
+# The database refused a row, as opposed to not being reachable at all
+BAD_ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError, ValueError)
+
+
+class VerificationLogWriter:
+    """Buffers verification logs in memory and inserts them in batches
+
+    Handlers call ``submit`` and return immediately. A background worker
+    flushes the queue whenever ``batch_size`` logs are pending or
+    ``flush_interval`` seconds have passed. When the queue is full the
+    caller waits up to ``enqueue_timeout`` seconds before the log is
+    spilled to ``spill_path``; batches that fail to insert are spilled as
+    well and replayed once the database accepts writes again.
+
+    The spill file may be shared by every worker process. Appends and the
+    rename that claims it for replay take a lock on ``spill_path.lock``,
+    and only one process replays at a time, so no log is inserted twice.
+
+    A batch the database refuses for its data (a value too long for its
+    column, say) is split in halves until the refused rows are isolated.
+    Those rows, and spill lines that cannot be parsed, are moved to
+    ``spill_path.rejected`` so they cannot hold back the logs behind them.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_queue: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0,
+                 enqueue_timeout: float = 0.05, spill_path: str = 'verification_logs.spill',
+                 retry_interval: float = 30.0):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.spill_path = spill_path
+        self.retry_interval = retry_interval
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._worker = None
+        self._pid = None
+        self._last_replay = 0.0
+        self._atexit_registered = False
+
+        self._written = 0
+        self._spilled = 0
+        self._replayed = 0
+        self._rejected = 0
+        self._failed_flushes = 0
+
+    def start(self):
+        """Start the background flush worker if it is not running in this process"""
+        if self._running():
+            return
+        with self._start_lock:
+            if self._running():
+                return
+
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._worker = threading.Thread(
+                target=self._run, name='verification-log-writer', daemon=True
+            )
+            self._worker.start()
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+
+    def _running(self) -> bool:
+        worker = self._worker
+        return worker is not None and self._pid == os.getpid() and worker.is_alive()
+
+    def submit(self, log: VerificationLog) -> bool:
+        """Queue a log for insertion; returns False if it had to be spilled to disk"""
+        if log.created_at is None:
+            # UTC-aware, so Postgres converts it to its own time zone like CURRENT_TIMESTAMP
+            log.created_at = datetime.now(timezone.utc)
+
+        self.start()
+        try:
+            self._queue.put(log, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self._spill([log])
+            return False
+
+    def close(self, timeout: float = 10.0):
+        """Stop the worker after draining everything still queued"""
+        self._stop.set()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout)
+
+        # Anything left behind (worker never started or timed out) goes to disk
+        leftover = self._drain(self._queue.qsize())
+        if leftover:
+            self._spill(leftover)
+
+    def stats(self) -> dict:
+        """Queue depth and write counters"""
+        return {
+            'queued': self._queue.qsize(),
+            'capacity': self._queue.maxsize,
+            'written': self._written,
+            'spilled': self._spilled,
+            'replayed': self._replayed,
+            'rejected': self._rejected,
+            'failed_flushes': self._failed_flushes,
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                batch = self._collect()
+                if batch:
+                    self._flush(batch)
+                else:
+                    self._maybe_replay()
+            except Exception as e:
+                # Never let one bad batch or spill file stop the writer for good
+                print(f"Log writer error: {e}")
+                count_error('log_writer', e)
+                self._stop.wait(1.0)
+
+        # Shutdown: flush whatever is still queued
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                break
+            self._flush(batch)
+
+    def _collect(self) -> List[VerificationLog]:
+        """Wait for the first log, then gather more until the batch is full or the interval ends"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self, limit: int) -> List[VerificationLog]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch: List[VerificationLog]):
+        written, unsent = self._insert(batch)
+        self._written += written
+        if unsent:
+            self._failed_flushes += 1
+            self._spill(unsent)
+        else:
+            self._maybe_replay()
+
+    def _insert(self, logs: List[VerificationLog]) -> Tuple[int, List[VerificationLog]]:
+        """Insert logs, returning how many were written and those left unsent
+
+        Logs are left unsent only when the database cannot be reached.
+        Refused rows are found by splitting the batch and are rejected.
+        """
+        try:
+            self.db_manager.insert_verification_logs(logs)
+            return len(logs), []
+        except BAD_ROW_ERRORS as e:
+            if len(logs) == 1:
+                print(f"Log writer: rejected a verification log ({e})")
+                count_error('log_writer', e)
+                self._reject([self._to_json(logs[0])])
+                return 0, []
+            middle = len(logs) // 2
+            written, unsent = self._insert(logs[:middle])
+            if unsent:
+                return written, unsent + logs[middle:]
+            more, unsent = self._insert(logs[middle:])
+            return written + more, unsent
+        except psycopg2.Error as e:
+            print(f"Batch logging error: {e}")
+            count_error('database', e)
+            return 0, logs
+
+    def _spill(self, logs: List[VerificationLog]):
+        """Append logs to the local spill file as JSON lines"""
+        if self._append([self._to_json(log) for log in logs]):
+            self._spilled += len(logs)
+
+    def _append(self, lines: List[str]) -> bool:
+        try:
+            with self._locked(self.spill_path + '.lock'):
+                with open(self.spill_path, 'a', encoding='utf-8') as spill:
+                    spill.writelines(lines)
+            return True
+        except OSError as e:
+            print(f"Log spill error: {e}")
+            return False
+
+    def _reject(self, lines: List[str]):
+        try:
+            with open(self.spill_path + '.rejected', 'a', encoding='utf-8') as rejects:
+                rejects.writelines(lines)
+        except OSError as e:
+            print(f"Log reject error: {e}")
+        self._rejected += len(lines)
+
+    @contextmanager
+    def _locked(self, lock_path: str):
+        """Hold ``_spill_lock`` and, across processes, an flock on ``lock_path``"""
+        with self._spill_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(lock_path, 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _maybe_replay(self):
+        """Re-insert spilled logs, at most once per ``retry_interval``"""
+        now = time.monotonic()
+        replay_path = self.spill_path + '.replay'
+        if now - self._last_replay < self.retry_interval:
+            return
+        if not os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+            return
+        self._last_replay = now
+
+        replay_lock = None
+        try:
+            # Another worker already replaying is left to it
+            if fcntl is not None:
+                replay_lock = open(self.spill_path + '.replay.lock', 'a')
+                try:
+                    fcntl.flock(replay_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return
+            with self._locked(self.spill_path + '.lock'):
+                if not os.path.exists(replay_path):
+                    os.replace(self.spill_path, replay_path)
+            self._replay(replay_path)
+        except OSError as e:
+            print(f"Log replay error: {e}")
+        finally:
+            if replay_lock is not None:
+                replay_lock.close()
+
+    def _replay(self, replay_path: str):
+        """Insert a claimed spill file ``batch_size`` lines at a time"""
+        unreadable = 0
+        with open(replay_path, encoding='utf-8', errors='replace') as spill:
+            batch = []
+            for line in spill:
+                if not line.strip():
+                    continue
+                try:
+                    batch.append(self._from_json(line))
+                except (ValueError, TypeError, KeyError, AttributeError):
+                    # Truncated or corrupt, e.g. written by a process killed mid-append
+                    self._reject([line if line.endswith('\n') else line + '\n'])
+                    unreadable += 1
+                if len(batch) < self.batch_size:
+                    continue
+                if not self._replay_batch(batch, spill):
+                    break
+                batch = []
+            else:
+                if batch:
+                    self._replay_batch(batch, spill)
+        if unreadable:
+            print(f"Log replay: moved {unreadable} unreadable line(s) to {self.spill_path}.rejected")
+
+        try:
+            os.remove(replay_path)
+        except OSError as e:
+            print(f"Log replay cleanup error: {e}")
+
+    def _replay_batch(self, batch: List[VerificationLog], spill) -> bool:
+        """Insert one replayed batch; if the database is down, keep it and the unread lines"""
+        written, unsent = self._insert(batch)
+        self._replayed += written
+        if not unsent:
+            return True
+        # Back into the spill file for the next attempt, without counting them twice
+        self._append([self._to_json(log) for log in unsent])
+        while True:
+            lines = spill.readlines(1 << 20)
+            if not lines:
+                return False
+            if not lines[-1].endswith('\n'):
+                lines[-1] += '\n'
+            self._append(lines)
+
+    @staticmethod
+    def _to_json(log: VerificationLog) -> str:
+        return json.dumps({
+            'email': log.email,
+            'access_code': log.access_code,
+            'verification_status': log.verification_status,
+            'ip_address': log.ip_address,
+            'user_agent': log.user_agent,
+            'created_at': log.created_at.isoformat() if log.created_at else None,
+        }) + '\n'
+
+    @staticmethod
+    def _from_json(line: str) -> VerificationLog:
+        row = json.loads(line)
+        created_at = row.pop('created_at')
+        return VerificationLog(
+            created_at=datetime.fromisoformat(created_at) if created_at else None,
+            **row
+        )
@@ -0,0 +1,482 @@
+"""
+Multi-pattern matching of content against every active VIP's names, keywords and handles
+"""
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import psycopg2
+
+from .metrics import count_error, registry
+
+SCAN_HITS = registry.counter('guardiq_scan_hits_total', 'Candidate threats returned by /api/scan', ('threat_type',))
+
+# Terms that, next to a VIP's name or keyword, suggest a threat_type
+THREAT_CUES = {
+    'impersonation': ('official account', 'real account', 'backup account', 'new account', 'giveaway',
+                      'dm me', 'send me', 'verify your wallet'),
+    'misinformation': ('fake news', 'hoax', 'rumor', 'rumour', 'conspiracy', 'cover up', 'exposed',
+                       'confirmed dead', 'secretly'),
+    'data_leak': ('leak', 'leaked', 'dox', 'doxx', 'doxxed', 'password', 'passwords', 'home address',
+                  'phone number', 'ssn', 'database dump', 'credentials'),
+    'deepfake': ('deepfake', 'deep fake', 'ai generated', 'ai-generated', 'face swap', 'voice clone',
+                 'synthetic video'),
+    'harassment': ('kill', 'threat', 'hunt down', 'stalk', 'destroy', 'hate', 'die'),
+    'coordinated_campaign': ('retweet this', 'share this', 'spread the word', 'mass report', 'everyone report',
+                             'make this trend', 'boycott')
+}
+
+# Look-alike letters mapped to the Latin letter they imitate (after casefolding)
+_CONFUSABLES = str.maketrans({
+    'а': 'a', 'е': 'e', 'ё': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'с': 'c', 'т': 't',
+    'у': 'y', 'х': 'x', 'ѕ': 's', 'і': 'i', 'ї': 'i', 'ј': 'j', 'ԁ': 'd', 'ӏ': 'l', 'ԛ': 'q', 'ԝ': 'w',
+    'α': 'a', 'β': 'b', 'ε': 'e', 'ι': 'i', 'κ': 'k', 'ν': 'v', 'ο': 'o', 'ρ': 'p', 'τ': 't', 'υ': 'u',
+    'χ': 'x', 'ω': 'w', 'ı': 'i', 'ɡ': 'g', 'ʟ': 'l'
+})
+# Handle skeletons also fold digits and symbols used as letters, and drop separators
+_SKELETON = str.maketrans({
+    '0': 'o', '1': 'l', 'i': 'l', '|': 'l', '!': 'l', '3': 'e', '4': 'a', '@': 'a', '5': 's', '$': 's',
+    '7': 't', '8': 'b', '9': 'g', '_': None, '.': None, '-': None
+})
+
+_HANDLE = re.compile(r'(?<![\w@])@([^\s@,;:?()\[\]{}"\'<>/]{2,40})')
+_PROFILE_URL = re.compile(
+    r'\b(twitter|x|instagram|tiktok|facebook|github|linkedin)\.com/(?:in/)?@?([^\s/?#"\'<>]{2,40})'
+    r'|\bt\.me/([^\s/?#"\'<>]{2,40})'
+)
+_URL_PLATFORMS = {'x': 'twitter'}
+
+# Scores for impersonation candidates by how the handle was matched
+_HANDLE_SCORES = {'homoglyph': 0.9, 'edit': 0.75, 'contains': 0.6}
+
+
+def normalize_text(text: str) -> str:
+    """Casefold, strip accents and invisible characters, and map look-alike letters to Latin"""
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize('NFKD', unicodedata.normalize('NFKC', text).casefold())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch) and unicodedata.category(ch) != 'Cf')
+    return text.translate(_CONFUSABLES)
+
+
+def handle_skeleton(handle: str) -> str:
+    """Form of a handle shared by its look-alikes, e.g. ``@E1on_Musk`` and ``elonmusk``"""
+    skeleton = normalize_text(handle).lstrip('@').translate(_SKELETON)
+    return skeleton.replace('rn', 'm').replace('vv', 'w')
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """True if one insertion, deletion, substitution or adjacent swap turns ``a`` into ``b``"""
+    if abs(len(a) - len(b)) > 1 or a == b:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (i + 1 < len(a) and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:])
+
+
+def _deletions(word: str) -> set:
+    return {word} | {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == '_'
+
+
+class Automaton:
+    """Aho–Corasick automaton reporting every pattern occurrence in one pass over a text"""
+    __slots__ = ('_goto', '_fail', '_out')
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        goto: List[dict] = [{}]
+        out: List[list] = [[]]
+        for word, value in patterns:
+            if not word:
+                continue
+            node = 0
+            for ch in word:
+                child = goto[node].get(ch)
+                if child is None:
+                    child = goto[node][ch] = len(goto)
+                    goto.append({})
+                    out.append([])
+                node = child
+            out[node].append((len(word), value))
+
+        # Breadth-first failure links; each node also reports its longest proper suffix's patterns
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for node in queue:
+            for ch, child in goto[node].items():
+                state = fail[node]
+                while ch not in goto[state] and state:
+                    state = fail[state]
+                target = goto[state].get(ch, 0)
+                fail[child] = target if target != child else 0
+                out[child].extend(out[fail[child]])
+                queue.append(child)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(values) for values in out]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Yield (start, end, value) for every match, including overlapping ones"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield end - length, end, value
+
+
+class HandleRef(NamedTuple):
+    vip: int
+    platform: str
+    handle: str
+    skeleton: str
+
+
+class VIPPatterns(NamedTuple):
+    """One VIP's normalized terms and handles, derived once per row version"""
+    vip_id: str
+    updated_at: Optional[datetime]
+    terms: Tuple[Tuple[str, str], ...]           # (normalized term, 'name' | 'keyword' | 'handle')
+    handles: Tuple[Tuple[str, str, str], ...]    # (platform, normalized handle, skeleton)
+
+
+def compile_vip(row: tuple) -> Optional[VIPPatterns]:
+    """VIPPatterns for one vips row (id, full_name, display_name, keywords, social_handles, is_active, updated_at)
+
+    Returns None for inactive VIPs.
+    """
+    vip_id, full_name, display_name, keywords, social_handles, is_active, updated_at = row
+    if is_active is False:
+        return None
+
+    terms = {}
+    for name in (full_name, display_name):
+        if name and len(name.strip()) >= 3:
+            terms.setdefault(' '.join(normalize_text(name).split()), 'name')
+    for keyword in keywords or ():
+        if keyword and len(keyword.strip()) >= 3:
+            terms.setdefault(' '.join(normalize_text(keyword).split()), 'keyword')
+
+    handles = set()
+    for platform, values in (social_handles or {}).items():
+        for value in values if isinstance(values, list) else (values,):
+            if not isinstance(value, str):
+                continue
+            handle = normalize_text(value.strip()).lstrip('@').rstrip('/').rsplit('/', 1)[-1]
+            if len(handle) >= 2:
+                handles.add((str(platform).lower(), handle, handle_skeleton(handle)))
+                terms.setdefault(handle, 'handle')
+
+    return VIPPatterns(str(vip_id), updated_at, tuple(terms.items()), tuple(sorted(handles)))
+
+
+class MatchIndex:
+    """Compiled patterns for a set of VIPs; immutable once built
+
+    Names, keywords, exact handles and threat cues share one automaton, so
+    a text is read once however many VIPs there are. Handle-like tokens
+    (``@name`` and profile URLs) are compared by skeleton, which folds
+    homoglyphs and leetspeak, then within one edit through a deletion
+    index, then by containing a VIP's handle.
+
+    An index built with ``base`` is a delta layer: it holds only VIPs that
+    changed since ``base`` was built, and ``shadowed`` hides their old (or
+    deleted) entries in ``base``. Rebuilding a handful of changed VIPs then
+    costs nothing like recompiling the whole automaton.
+    """
+
+    def __init__(self, vips: Iterable[VIPPatterns], version: int = 0, fuzzy_min_length: int = 5,
+                 base: Optional['MatchIndex'] = None, shadowed: frozenset = frozenset()):
+        self.vips: List[VIPPatterns] = list(vips)
+        self.version = version
+        self.fuzzy_min_length = fuzzy_min_length
+        self.base = base
+        self.shadowed = shadowed
+
+        patterns = []
+        if base is None:
+            # Cues are VIP-independent, so only the base layer carries them
+            for threat_type, cues in THREAT_CUES.items():
+                for cue in cues:
+                    patterns.append((cue, ('cue', threat_type)))
+
+        self.exact_handles: Dict[str, List[int]] = defaultdict(list)
+        self.skeletons: Dict[str, List[HandleRef]] = defaultdict(list)
+        self.neighbors: Dict[str, List[HandleRef]] = defaultdict(list)
+        contained = []
+        for i, vip in enumerate(self.vips):
+            for term, kind in vip.terms:
+                patterns.append((term, ('term', i, kind)))
+            for platform, handle, skeleton in vip.handles:
+                ref = HandleRef(i, platform, handle, skeleton)
+                self.exact_handles[handle].append(i)
+                self.skeletons[skeleton].append(ref)
+                if len(skeleton) >= fuzzy_min_length:
+                    for variant in _deletions(skeleton):
+                        self.neighbors[variant].append(ref)
+                    contained.append((skeleton, ref))
+
+        self.automaton = Automaton(patterns)
+        self.handle_automaton = Automaton(contained)
+
+    def __len__(self) -> int:
+        if self.base is None:
+            return len(self.vips)
+        hidden = sum(vip.vip_id in self.shadowed for vip in self.base.vips)
+        return len(self.base) - hidden + len(self.vips)
+
+    def _layers(self) -> List[Tuple['MatchIndex', frozenset]]:
+        if self.base is None:
+            return [(self, frozenset())]
+        return [(self.base, self.shadowed), (self, frozenset())]
+
+    def scan(self, text: str) -> List[dict]:
+        """Candidate threats in ``text``, one per (VIP, threat_type), highest score first"""
+        normalized = normalize_text(text)
+        layers = self._layers()
+        hits: Dict[Tuple[str, str], dict] = {}
+        mentioned: Dict[str, List[dict]] = defaultdict(list)
+        cues: Dict[str, List[str]] = defaultdict(list)
+
+        for layer, skip in layers:
+            for start, end, value in layer.automaton.iter(normalized):
+                if (start > 0 and _is_word_char(normalized[start - 1])) or \
+                        (end < len(normalized) and _is_word_char(normalized[end])):
+                    continue
+                if value[0] == 'cue':
+                    cues[value[1]].append(normalized[start:end])
+                elif layer.vips[value[1]].vip_id not in skip:
+                    mentioned[layer.vips[value[1]].vip_id].append({'type': value[2], 'match': normalized[start:end]})
+
+        for platform, token in self._handle_tokens(normalized):
+            # A VIP's own handle is a mention, never an impersonation
+            if any(layer.vips[i].vip_id not in skip for layer, skip in layers
+                   for i in layer.exact_handles.get(token, ())):
+                continue
+            skeleton = handle_skeleton(token)
+            seen = set()
+            for layer, skip in layers:
+                for ref, reason in layer._impersonated(skeleton):
+                    vip_id = layer.vips[ref.vip].vip_id
+                    if vip_id in skip or vip_id in seen:
+                        continue
+                    seen.add(vip_id)
+                    evidence = {'type': 'handle', 'match': token, 'handle': ref.handle,
+                                'platform': ref.platform, 'reason': reason}
+                    if platform:
+                        evidence['seen_on'] = platform
+                    _add_hit(hits, vip_id, 'impersonation', _HANDLE_SCORES[reason], evidence)
+
+        # Names and keywords only count as threats next to a cue for that threat type
+        for vip_id, found in mentioned.items():
+            base = 0.6 if any(item['type'] != 'keyword' for item in found) else 0.45
+            for threat_type, terms in cues.items():
+                score = min(0.95, base + 0.1 * (len(set(terms)) - 1))
+                _add_hit(hits, vip_id, threat_type, score, *found,
+                         *({'type': 'cue', 'match': term} for term in dict.fromkeys(terms)))
+
+        results = sorted(hits.values(), key=lambda hit: -hit['score'])
+        for hit in results:
+            SCAN_HITS.inc(hit['threat_type'])
+        return results
+
+    @staticmethod
+    def _handle_tokens(normalized: str) -> Iterator[Tuple[Optional[str], str]]:
+        for match in _HANDLE.finditer(normalized):
+            yield None, match.group(1).rstrip('.')
+        for match in _PROFILE_URL.finditer(normalized):
+            if match.group(3):
+                yield 'telegram', match.group(3).rstrip('.')
+            else:
+                yield _URL_PLATFORMS.get(match.group(1), match.group(1)), match.group(2).rstrip('.')
+
+    def _impersonated(self, skeleton: str) -> Iterator[Tuple[HandleRef, str]]:
+        """Handles in this layer that a token with ``skeleton`` imitates, best match first"""
+        for ref in self.skeletons.get(skeleton, ()):
+            yield ref, 'homoglyph'
+        if len(skeleton) >= self.fuzzy_min_length:
+            for variant in _deletions(skeleton):
+                for ref in self.neighbors.get(variant, ()):
+                    if _one_edit_apart(skeleton, ref.skeleton):
+                        yield ref, 'edit'
+        for _, _, ref in self.handle_automaton.iter(skeleton):
+            if len(ref.skeleton) < len(skeleton):
+                yield ref, 'contains'
+
+
+def _add_hit(hits: dict, vip_id: str, threat_type: str, score: float, *evidence: dict):
+    hit = hits.get((vip_id, threat_type))
+    if hit is None:
+        hit = hits[(vip_id, threat_type)] = {'vip_id': vip_id, 'threat_type': threat_type, 'score': 0.0,
+                                             'evidence': []}
+    hit['score'] = round(max(hit['score'], score), 2)
+    hit['evidence'].extend(evidence)
+
+
+VIP_SELECT = """
+    SELECT id, full_name, display_name, keywords, social_handles, is_active, updated_at
+    FROM vips
+"""
+
+
+def load_vips(db_manager, since: Optional[datetime] = None) -> Optional[list]:
+    """vips rows changed at or after ``since`` (all rows when None), or None on error"""
+    try:
+        with db_manager.connection() as conn:
+            with conn.cursor() as cursor:
+                if since is None:
+                    cursor.execute(VIP_SELECT)
+                else:
+                    cursor.execute(VIP_SELECT + " WHERE updated_at >= %s", (since,))
+                rows = cursor.fetchall()
+            conn.rollback()
+            return rows
+
+    except psycopg2.Error as e:
+        print(f"VIP pattern load error: {e}")
+        count_error('database', e)
+        return None
+
+
+class VIPMatcher:
+    """Keeps a MatchIndex in step with the vips table
+
+    A background thread re-reads only rows whose ``updated_at`` moved since
+    the last poll (with ``overlap`` seconds of slack for transactions that
+    commit late) and recompiles just those VIPs into a delta layer over the
+    last full build. The layers are merged once more than ``max_delta``
+    VIPs (or 2% of them) have changed, or at the next full re-read, which
+    happens every ``full_sync_every`` polls and also drops deleted rows.
+    Each new index is swapped in whole, so scans never lock.
+    """
+
+    def __init__(self, get_db_manager: Callable, refresh_interval: float = 30.0, full_sync_every: int = 20,
+                 overlap: float = 60.0, fuzzy_min_length: int = 5, max_delta: int = 256):
+        self.get_db_manager = get_db_manager
+        self.refresh_interval = refresh_interval
+        self.full_sync_every = full_sync_every
+        self.overlap = timedelta(seconds=overlap)
+        self.fuzzy_min_length = fuzzy_min_length
+        self.max_delta = max_delta
+        self.current = MatchIndex((), 0, fuzzy_min_length)
+
+        self._vips: Dict[str, VIPPatterns] = {}
+        self._base = self.current
+        self._dirty = set()
+        self._watermark = None
+        self._polls = 0
+        self._loaded_at = None
+        self._build_seconds = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def load(self, rows: Iterable[tuple], full: bool = False) -> int:
+        """Apply vips rows and swap in a new index if anything changed; returns VIPs changed"""
+        with self._lock:
+            vips = {} if full else dict(self._vips)
+            changed = set()
+            for row in rows:
+                vip_id = str(row[0])
+                previous = self._vips.get(vip_id)
+                if previous is not None and previous.updated_at == row[6]:
+                    vips[vip_id] = previous
+                    continue
+                patterns = compile_vip(row)
+                if patterns is None:
+                    vips.pop(vip_id, None)
+                else:
+                    vips[vip_id] = patterns
+                    changed.add(vip_id)
+                if row[6] is not None and (self._watermark is None or row[6] > self._watermark):
+                    self._watermark = row[6]
+            # Deactivated, and after a full read also deleted, VIPs
+            changed |= self._vips.keys() - vips.keys()
+            self._dirty |= changed
+
+            version = self.current.version + 1
+            started = time.perf_counter()
+            if self._loaded_at is None or (self._dirty and (
+                    full or len(self._dirty) > max(self.max_delta, len(vips) // 50))):
+                self._base = self.current = MatchIndex(vips.values(), version, self.fuzzy_min_length)
+                self._dirty = set()
+            elif changed:
+                delta = [vips[vip_id] for vip_id in self._dirty if vip_id in vips]
+                self.current = MatchIndex(delta, version, self.fuzzy_min_length,
+                                          base=self._base, shadowed=frozenset(self._dirty))
+            if self.current.version == version:
+                self._build_seconds = time.perf_counter() - started
+            self._vips = vips
+            self._loaded_at = datetime.now()
+            return len(changed)
+
+    def refresh(self) -> bool:
+        db_manager = self.get_db_manager()
+        if db_manager is None:
+            return False
+        full = self._watermark is None or self._polls % self.full_sync_every == 0
+        self._polls += 1
+        rows = load_vips(db_manager, None if full else self._watermark - self.overlap)
+        if rows is None:
+            return False
+        # Full reads list every row, so rows missing from them were deleted
+        changed = self.load(rows, full=full)
+        if changed:
+            print(f"VIP match index v{self.current.version}: {len(self.current)} VIPs ({changed} changed)")
+        return True
+
+    def start(self):
+        """Load the VIPs and keep them current in this process"""
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='vip-matcher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"VIP matcher refresh error: {e}")
+                count_error('matching', e)
+            time.sleep(self.refresh_interval)
+
+    def scan(self, texts: List[str]) -> List[List[dict]]:
+        index = self.current
+        return [index.scan(text) for text in texts]
+
+    def stats(self) -> dict:
+        index = self.current
+        return {
+            'version': index.version,
+            'vips': len(index),
+            'delta_vips': len(index.vips) if index.base is not None else 0,
+            'automaton_states': sum(len(layer.automaton) for layer, _ in index._layers()),
+            'build_seconds': round(self._build_seconds, 4),
+            'loaded_at': self._loaded_at.isoformat() if self._loaded_at else None
+        }
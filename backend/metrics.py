@@ -0,0 +1,295 @@
+"""
+Low-overhead request and database instrumentation for GuardIQ
+
+Counters and histograms keep one shard per thread, so recording a value
+never takes a lock; shards are only summed when /api/metrics is scraped.
+When a thread exits its shard is folded into a shared total, so servers
+that start a thread per request do not accumulate shards.
+"""
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ShardOwner:
+    """Held in a thread's locals; collected, and its shard retired, when the thread exits"""
+    __slots__ = ('__weakref__',)
+
+
+class _Metric(ABC):
+    """Base class for metrics with per-thread shards"""
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = {}
+        # Values recorded by threads that have exited
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._lock:
+                self._shards[id(shard)] = shard
+            weakref.finalize(owner, self._retire, shard).atexit = False
+        return shard
+
+    def _retire(self, shard: dict):
+        with self._lock:
+            self._shards.pop(id(shard), None)
+            for labels, value in list(shard.items()):
+                self._retired[labels] = self._merge(self._retired.get(labels), value)
+
+    @staticmethod
+    def _merge(total, value):
+        """New combined value (never mutating ``total``, which scrapes may be reading)"""
+        return value if total is None else total + value
+
+    def _snapshots(self) -> Iterable[list]:
+        with self._lock:
+            shards = list(self._shards.values())
+            retired = list(self._retired.items())
+        # Copying items is atomic under the GIL, so writers never need to lock
+        return [retired] + [list(shard.items()) for shard in shards]
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, tuple, float]]:
+        """``(name suffix, labels, value)`` for every series, summed over all shards"""
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    type_name = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def samples(self):
+        totals = {}
+        for items in self._snapshots():
+            for labels, value in items:
+                totals[labels] = totals.get(labels, 0) + value
+        return [('', labels, value) for labels, value in sorted(totals.items())]
+
+
+class UpDownGauge(Counter):
+    """Gauge maintained by increments and decrements, e.g. in-flight requests"""
+    type_name = 'gauge'
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket histogram"""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    @staticmethod
+    def _merge(total, value):
+        return list(value) if total is None else [a + b for a, b in zip(total, value)]
+
+    def observe(self, value: float, *labels):
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # One slot per bucket plus +Inf, then the running sum
+            state = shard[labels] = [0] * (len(self.buckets) + 2)
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def time(self, *labels):
+        """Decorator recording the wrapped function's duration"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *labels)
+            return wrapper
+        return decorator
+
+    def samples(self):
+        totals = {}
+        for items in self._snapshots():
+            for labels, state in items:
+                merged = totals.setdefault(labels, [0] * len(state))
+                for i, value in enumerate(list(state)):
+                    merged[i] += value
+
+        samples = []
+        for labels, state in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                samples.append(('_bucket', labels + (('le', le),), cumulative))
+            samples.append(('_sum', labels, state[-1]))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class CallbackMetric:
+    """Metric whose samples are read from a callback at scrape time
+
+    The callback returns ``{label values tuple: value}`` or a single number.
+    """
+
+    def __init__(self, name: str, documentation: str, callback: Callable,
+                 labelnames: Sequence[str] = (), type_name: str = 'gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.type_name = type_name
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception as e:
+            print(f"Metrics callback error for {self.name}: {e}")
+            return []
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [('', labels, value) for labels, value in values.items() if value is not None]
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> UpDownGauge:
+        return self.register(UpDownGauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, callback: Callable,
+                 labelnames: Sequence[str] = (), type_name: str = 'gauge') -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, callback, labelnames, type_name))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(metric.labelnames, labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _format_labels(labelnames: tuple, labels: tuple) -> str:
+    pairs = []
+    for i, value in enumerate(labels):
+        if isinstance(value, tuple):
+            name, value = value
+        else:
+            name = labelnames[i]
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+# Process-wide registry and the core metrics recorded on every request
+registry = Registry()
+
+REQUESTS = registry.counter(
+    'guardiq_http_requests_total', 'HTTP requests by endpoint, method and status', ('endpoint', 'method', 'status')
+)
+REQUEST_LATENCY = registry.histogram(
+    'guardiq_http_request_duration_seconds', 'HTTP request latency by endpoint', ('endpoint', 'method')
+)
+IN_FLIGHT = registry.gauge('guardiq_http_requests_in_flight', 'HTTP requests currently being served')
+ERRORS = registry.counter('guardiq_errors_total', 'Errors by component and exception type', ('component', 'type'))
+DB_QUERY_LATENCY = registry.histogram(
+    'guardiq_db_query_duration_seconds', 'DatabaseManager call latency by method', ('method',)
+)
+
+
+def timed_query(name: str):
+    """Decorator timing a DatabaseManager method"""
+    return DB_QUERY_LATENCY.time(name)
+
+
+def count_error(component: str, error: BaseException):
+    ERRORS.inc(component, type(error).__name__)
+
+
+def init_app(app, path: str = '/api/metrics', protect: Optional[Callable] = None):
+    """Install request hooks and the Prometheus scrape endpoint
+
+    ``protect`` wraps the endpoint, e.g. with ``auth.require_api_key``.
+    """
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_started = time.perf_counter()
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _record_request(error=None):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        IN_FLIGHT.dec()
+
+        rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('_metrics_status', 500)
+        REQUESTS.inc(rule, request.method, str(status))
+        REQUEST_LATENCY.observe(time.perf_counter() - started, rule, request.method)
+        if error is not None:
+            count_error('http', error)
+
+    def metrics_endpoint():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule(path, 'metrics', protect(metrics_endpoint) if protect else metrics_endpoint, methods=['GET'])
@@ -1,11 +1,26 @@
 """
 Database models for GuardIQ VIP system
 """
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, is_dataclass
 from datetime import datetime
-from typing import Optional, List
+from operator import itemgetter
+from typing import Callable, Iterator, NamedTuple, Optional, List, Sequence
+import re
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_values
+from .pool import ConnectionPool
+from .metrics import count_error, timed_query
+from .statements import PreparedConnection, StatementRegistry
+from .user_cache import MISS
+
+# verification_logs column sizes; a longer value makes its whole log batch fail
+EMAIL_MAX_LENGTH = 255
+ACCESS_CODE_MAX_LENGTH = 100
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+def is_valid_email(email: str) -> bool:
+    """Email format and length accepted into verification_logs"""
+    return len(email) <= EMAIL_MAX_LENGTH and EMAIL_PATTERN.match(email) is not None
 
 @dataclass
 class VIPUser:
@@ -44,154 +59,610 @@ class SecurityEvent:
     ip_address: Optional[str] = None
     created_at: Optional[datetime] = None
 
+# Immutable, dict-free variants for bulk reads (exports, replay, analytics).
+# Same fields in the same order as the dataclasses above.
+class VIPUserRecord(NamedTuple):
+    """Read-only VIP user row"""
+    id: Optional[int] = None
+    full_name: str = ""
+    email: str = ""
+    phone: Optional[str] = None
+    organization: str = ""
+    security_clearance: str = ""
+    access_code: str = ""
+    created_at: Optional[datetime] = None
+    last_verified: Optional[datetime] = None
+    is_active: bool = True
+
+class VerificationLogRecord(NamedTuple):
+    """Read-only verification log row"""
+    id: Optional[int] = None
+    email: str = ""
+    access_code: str = ""
+    verification_status: str = ""
+    ip_address: Optional[str] = None
+    user_agent: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class SecurityEventRecord(NamedTuple):
+    """Read-only security event row"""
+    id: Optional[int] = None
+    event_type: str = ""
+    user_id: Optional[int] = None
+    email: str = ""
+    description: str = ""
+    severity: str = "low"
+    ip_address: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+_mappers = {}
+
+def _model_fields(model) -> tuple:
+    if is_dataclass(model):
+        return tuple((f.name, f.default) for f in fields(model))
+    return tuple((name, model._field_defaults.get(name)) for name in model._fields)
+
+def row_mapper(model, description) -> Callable[[tuple], object]:
+    """Build (once per model and column list) a function turning result tuples into ``model``
+
+    Columns are matched to fields by name; fields without a column get their
+    default. When the columns are exactly the fields of a NamedTuple model, in
+    order, rows are handed to ``_make`` with no per-row reshuffling.
+    """
+    columns = tuple(column[0] for column in description)
+    key = (model, columns)
+    mapper = _mappers.get(key)
+    if mapper is not None:
+        return mapper
+    
+    model_fields = _model_fields(model)
+    names = tuple(name for name, _ in model_fields)
+    if columns == names and hasattr(model, '_make'):
+        mapper = model._make
+    else:
+        position = {name: i for i, name in enumerate(columns)}
+        # Unmatched fields read their default from a constant tail appended to the row
+        tail = tuple(default for name, default in model_fields if name not in position)
+        indexes, extra = [], len(columns)
+        for name, _ in model_fields:
+            if name in position:
+                indexes.append(position[name])
+            else:
+                indexes.append(extra)
+                extra += 1
+        
+        getter = itemgetter(*indexes)
+        make = model._make if hasattr(model, '_make') else (lambda values: model(*values))
+        if len(indexes) == 1:
+            mapper = (lambda row: make((getter(row + tail),))) if tail else (lambda row: make((getter(row),)))
+        elif tail:
+            mapper = lambda row: make(getter(row + tail))
+        else:
+            mapper = lambda row: make(getter(row))
+    
+    _mappers[key] = mapper
+    return mapper
+
+VIP_USER_COLUMNS = (
+    'id, full_name, email, phone, organization, security_clearance, access_code, '
+    'created_at, last_verified, is_active'
+)
+
+# Hot queries, prepared once per pooled connection and executed by name
+STATEMENTS = {
+    'verify_vip_user': f"""
+        SELECT {VIP_USER_COLUMNS} FROM vip_users
+        WHERE email = $1 AND access_code = $2 AND is_active = TRUE
+    """,
+    'log_verification_attempt': """
+        INSERT INTO verification_logs
+        (email, access_code, verification_status, ip_address, user_agent)
+        VALUES ($1, $2, $3, $4, $5)
+    """,
+    'update_last_verified': """
+        UPDATE vip_users SET last_verified = CURRENT_TIMESTAMP WHERE id = $1
+    """,
+    'get_vip_statistics': "SELECT * FROM get_vip_statistics()",
+    'check_suspicious_activity': "SELECT * FROM check_suspicious_activity($1)",
+    'check_suspicious_activity_many': """
+        SELECT u.email, s.*
+        FROM unnest($1::varchar[]) AS u(email)
+        CROSS JOIN LATERAL check_suspicious_activity(u.email) s
+    """,
+    'count_ip_failures': """
+        SELECT COUNT(*) FROM verification_logs
+        WHERE ip_address = $1 AND verification_status = 'failed' AND created_at >= $2
+    """,
+    'get_recent_failures': """
+        SELECT email, ip_address, verification_status, created_at
+        FROM verification_logs
+        WHERE verification_status IN ('failed', 'blocked')
+        AND created_at >= $1 AND created_at < $2
+        ORDER BY created_at
+    """,
+    # Rollups plus deltas not yet compacted into them (scripts/07_verification_rollups.sql)
+    'get_verification_timeseries_hour': """
+        SELECT bucket, SUM(success)::BIGINT, SUM(failed)::BIGINT, SUM(blocked)::BIGINT
+        FROM (
+            SELECT bucket, success, failed, blocked FROM verification_rollups_hourly
+            WHERE bucket >= $1 AND bucket < $2
+            UNION ALL
+            SELECT bucket, success, failed, blocked FROM verification_rollup_deltas
+            WHERE bucket >= $1 AND bucket < $2
+        ) r
+        GROUP BY bucket ORDER BY bucket
+    """,
+    'get_verification_timeseries_day': """
+        SELECT bucket, SUM(success)::BIGINT, SUM(failed)::BIGINT, SUM(blocked)::BIGINT
+        FROM (
+            SELECT bucket, success, failed, blocked FROM verification_rollups_daily
+            WHERE bucket >= $1::date AND bucket < $2::date
+            UNION ALL
+            SELECT bucket::date, success, failed, blocked FROM verification_rollup_deltas
+            WHERE bucket >= $1 AND bucket < $2
+        ) r
+        GROUP BY bucket ORDER BY bucket
+    """,
+    'compact_verification_rollups': "SELECT compact_verification_rollups($1)",
+    'create_verification_log_partitions': "SELECT create_verification_log_partitions($1)",
+}
+
 class DatabaseManager:
     """Database operations manager"""
     
-    def __init__(self, db_config: dict):
+    def __init__(self, db_config: dict, pool_config: Optional[dict] = None, user_cache=None):
         self.db_config = db_config
+        self.user_cache = user_cache
+        self.pool = ConnectionPool(self.get_connection_or_raise, **(pool_config or {}))
+        self.statements = StatementRegistry()
+        for name, sql in STATEMENTS.items():
+            self.statements.register(name, sql)
     
     def get_connection(self):
-        """Get database connection"""
+        """Get a standalone database connection that bypasses the pool"""
         try:
             return psycopg2.connect(**self.db_config)
         except psycopg2.Error as e:
             print(f"Database connection error: {e}")
+            count_error('database', e)
             return None
     
+    def get_connection_or_raise(self):
+        """Open a new database connection, raising on failure"""
+        return psycopg2.connect(connection_factory=PreparedConnection, **self.db_config)
+    
+    def connection(self):
+        """Borrow a pooled connection: ``with db_manager.connection() as conn``"""
+        return self.pool.connection()
+    
+    def pool_stats(self) -> dict:
+        """Connection pool gauges and counters"""
+        return self.pool.stats()
+    
+    def warm_up(self) -> bool:
+        """Open the pool's ``min_size`` connections and check one with SELECT 1"""
+        try:
+            self.pool.fill()
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
+                conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            print(f"Database warm-up error: {e}")
+            count_error('database', e)
+            return False
+    
+    def statement_stats(self) -> dict:
+        """Per-statement call counts and timings"""
+        return self.statements.stats()
+    
+    def invalidate_vip_user(self, email: Optional[str] = None, user_id: Optional[int] = None):
+        """Drop cached verify_vip_user results; call after any vip_users change"""
+        if self.user_cache is None:
+            return
+        if email is not None:
+            self.user_cache.invalidate_email(email)
+        if user_id is not None:
+            self.user_cache.invalidate_user(user_id)
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.closeall()
+    
+    @timed_query('verify_vip_user')
     def verify_vip_user(self, email: str, access_code: str) -> Optional[VIPUser]:
         """Verify VIP user credentials"""
-        conn = self.get_connection()
-        if not conn:
-            return None
+        if self.user_cache is not None:
+            cached = self.user_cache.get(email, access_code)
+            if cached is not MISS:
+                return cached
+            generation = self.user_cache.generation
         
         try:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("""
-                SELECT * FROM vip_users 
-                WHERE email = %s AND access_code = %s AND is_active = TRUE
-            """, (email.lower().strip(), access_code.strip()))
-            
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            
-            if result:
-                return VIPUser(
-                    id=result['id'],
-                    full_name=result['full_name'],
-                    email=result['email'],
-                    phone=result['phone'],
-                    organization=result['organization'],
-                    security_clearance=result['security_clearance'],
-                    access_code=result['access_code'],
-                    created_at=result['created_at'],
-                    last_verified=result['last_verified'],
-                    is_active=result['is_active']
+            with self.connection() as conn:
+                result = self.statements.fetchone(
+                    conn, 'verify_vip_user', (email.lower().strip(), access_code.strip())
                 )
-            return None
+            
+            user = VIPUser(*result) if result else None
+            if self.user_cache is not None:
+                self.user_cache.put(email, access_code, user, generation)
+            return user
             
         except psycopg2.Error as e:
             print(f"Database query error: {e}")
-            if conn:
-                conn.close()
+            count_error('database', e)
             return None
     
+    @timed_query('log_verification_attempt')
     def log_verification_attempt(self, log: VerificationLog) -> bool:
         """Log verification attempt"""
-        conn = self.get_connection()
-        if not conn:
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'log_verification_attempt', (
+                    log.email,
+                    log.access_code,
+                    log.verification_status,
+                    log.ip_address,
+                    log.user_agent
+                ))
+                
+                conn.commit()
+                cursor.close()
+            return True
+            
+        except psycopg2.Error as e:
+            print(f"Logging error: {e}")
+            count_error('database', e)
             return False
-        
+    
+    def log_verification_attempts(self, logs: List[VerificationLog]) -> bool:
+        """Log a batch of verification attempts with a single multi-row INSERT"""
         try:
+            self.insert_verification_logs(logs)
+            return True
+            
+        except (psycopg2.Error, ValueError) as e:
+            print(f"Batch logging error: {e}")
+            count_error('database', e)
+            return False
+    
+    @timed_query('log_verification_attempts')
+    def insert_verification_logs(self, logs: List[VerificationLog]):
+        """Insert a batch of verification logs, raising whatever the insert raised
+        
+        psycopg2.DataError and IntegrityError (and ValueError for strings
+        psycopg2 cannot send) mean a row was refused; other psycopg2.Error
+        subclasses mean the database could not be reached.
+        """
+        if not logs:
+            return
+        
+        with self.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
+            execute_values(cursor, """
                 INSERT INTO verification_logs 
-                (email, access_code, verification_status, ip_address, user_agent)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
+                (email, access_code, verification_status, ip_address, user_agent, created_at)
+                VALUES %s
+            """, [(
                 log.email,
                 log.access_code,
                 log.verification_status,
                 log.ip_address,
-                log.user_agent
-            ))
+                log.user_agent,
+                log.created_at
+            ) for log in logs],
+                template="(%s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))",
+                page_size=len(logs))
             
             conn.commit()
             cursor.close()
-            conn.close()
+    
+    @timed_query('log_security_events')
+    def log_security_events(self, events: List[SecurityEvent], notifications: Sequence[tuple] = ()) -> bool:
+        """Insert a batch of security events with a single multi-row INSERT
+        
+        ``notifications`` are ``(channel, payload)`` pairs sent with NOTIFY
+        in the same transaction, so listeners only hear about committed rows.
+        """
+        if not events:
+            return True
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                execute_values(cursor, """
+                    INSERT INTO security_events
+                    (event_type, user_id, email, description, severity, ip_address, created_at)
+                    VALUES %s
+                """, [(
+                    event.event_type,
+                    event.user_id,
+                    event.email,
+                    event.description,
+                    event.severity,
+                    event.ip_address,
+                    event.created_at
+                ) for event in events],
+                    template="(%s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))",
+                    page_size=len(events))
+                for channel, payload in notifications:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+                
+                conn.commit()
+                cursor.close()
             return True
             
         except psycopg2.Error as e:
-            print(f"Logging error: {e}")
-            if conn:
-                conn.rollback()
-                conn.close()
+            print(f"Security event logging error: {e}")
+            count_error('database', e)
             return False
     
+    @timed_query('update_last_verified')
     def update_last_verified(self, user_id: int) -> bool:
         """Update user's last verified timestamp"""
-        conn = self.get_connection()
-        if not conn:
-            return False
-        
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE vip_users 
-                SET last_verified = CURRENT_TIMESTAMP 
-                WHERE id = %s
-            """, (user_id,))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'update_last_verified', (user_id,))
+                
+                conn.commit()
+                cursor.close()
+            self.invalidate_vip_user(user_id=user_id)
             return True
             
         except psycopg2.Error as e:
             print(f"Update error: {e}")
-            if conn:
-                conn.rollback()
-                conn.close()
+            count_error('database', e)
             return False
     
+    @timed_query('get_vip_statistics')
     def get_vip_statistics(self) -> dict:
         """Get VIP system statistics"""
-        conn = self.get_connection()
-        if not conn:
-            return {}
-        
         try:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("SELECT * FROM get_vip_statistics()")
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                result = self.statements.fetchone(conn, 'get_vip_statistics')
             
-            return dict(result) if result else {}
+            return result._asdict() if result else {}
             
         except psycopg2.Error as e:
             print(f"Statistics error: {e}")
-            if conn:
-                conn.close()
+            count_error('database', e)
             return {}
     
+    @timed_query('check_suspicious_activity')
     def check_suspicious_activity(self, email: str) -> dict:
         """Check for suspicious activity for a user"""
-        conn = self.get_connection()
-        if not conn:
+        try:
+            with self.connection() as conn:
+                result = self.statements.fetchone(conn, 'check_suspicious_activity', (email,))
+            
+            return result._asdict() if result else {}
+            
+        except psycopg2.Error as e:
+            print(f"Suspicious activity check error: {e}")
+            count_error('database', e)
+            return {}
+    
+    @timed_query('check_suspicious_activity_many')
+    def check_suspicious_activity_many(self, emails: List[str]) -> dict:
+        """Check suspicious activity for many users in one query, keyed by email"""
+        if not emails:
             return {}
         
         try:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("SELECT * FROM check_suspicious_activity(%s)", (email,))
-            result = cursor.fetchone()
-            cursor.close()
-            conn.close()
+            with self.connection() as conn:
+                rows = self.statements.fetchall(conn, 'check_suspicious_activity_many', (list(emails),))
             
-            return dict(result) if result else {}
+            # First column is the email; the rest mirror check_suspicious_activity()
+            return {row[0]: dict(zip(row._fields[1:], row[1:])) for row in rows}
             
         except psycopg2.Error as e:
-            print(f"Suspicious activity check error: {e}")
-            if conn:
-                conn.close()
+            print(f"Bulk suspicious activity check error: {e}")
+            count_error('database', e)
             return {}
+    
+    @timed_query('count_ip_failures')
+    def count_ip_failures(self, ip_address: str, since: datetime) -> Optional[int]:
+        """Failed attempts from an IP address since a point in time"""
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'count_ip_failures', (ip_address, since))
+                count = cursor.fetchone()[0]
+                cursor.close()
+            
+            return count
+            
+        except psycopg2.Error as e:
+            print(f"IP failure count error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('get_recent_failures')
+    def get_recent_failures(self, since: datetime, until: datetime) -> Optional[List[tuple]]:
+        """Get (email, ip_address, verification_status, created_at) for failed/blocked attempts in a time range"""
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'get_recent_failures', (since, until))
+                rows = cursor.fetchall()
+                cursor.close()
+            
+            return rows
+            
+        except psycopg2.Error as e:
+            print(f"Recent failures query error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('get_security_events')
+    def get_security_events(self, severities: Optional[List[str]] = None, event_type: Optional[str] = None,
+                            email: Optional[str] = None, since: Optional[datetime] = None,
+                            before_id: Optional[int] = None, limit: int = 100) -> Optional[List[SecurityEventRecord]]:
+        """Get security events newest first, paged by ``before_id``"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT id, event_type, user_id, email, description, severity, ip_address, created_at
+                    FROM security_events
+                    WHERE (%(severities)s::varchar[] IS NULL OR severity = ANY(%(severities)s::varchar[]))
+                    AND (%(event_type)s::varchar IS NULL OR event_type = %(event_type)s)
+                    AND (%(email)s::varchar IS NULL OR email = %(email)s)
+                    AND (%(since)s::timestamp IS NULL OR created_at >= %(since)s)
+                    AND (%(before_id)s::integer IS NULL OR id < %(before_id)s)
+                    ORDER BY id DESC
+                    LIMIT %(limit)s
+                """, {'severities': severities, 'event_type': event_type, 'email': email, 'since': since,
+                      'before_id': before_id, 'limit': limit})
+                rows = cursor.fetchall()
+                to_record = row_mapper(SecurityEventRecord, cursor.description)
+                cursor.close()
+            
+            return [to_record(row) for row in rows]
+            
+        except psycopg2.Error as e:
+            print(f"Security events query error: {e}")
+            count_error('database', e)
+            return None
+    
+    def iter_verification_logs(self, since: datetime, until: datetime,
+                               batch_size: int = 10000) -> Iterator[VerificationLogRecord]:
+        """Stream verification logs in a time range as VerificationLogRecords
+        
+        Rows are read through a server-side cursor ``batch_size`` at a time, and
+        a pooled connection is held until the iterator is exhausted or closed.
+        Database errors are logged and re-raised, since a partial stream can't
+        be told apart from a short one.
+        """
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor(name='iter_verification_logs')
+                cursor.itersize = batch_size
+                cursor.execute("""
+                    SELECT id, email, access_code, verification_status, ip_address, user_agent, created_at
+                    FROM verification_logs
+                    WHERE created_at >= %s AND created_at < %s
+                    ORDER BY created_at, id
+                """, (since, until))
+                
+                rows = cursor.fetchmany(batch_size)
+                to_record = row_mapper(VerificationLogRecord, cursor.description) if rows else None
+                while rows:
+                    yield from map(to_record, rows)
+                    rows = cursor.fetchmany(batch_size)
+                cursor.close()
+                conn.rollback()
+            
+        except psycopg2.Error as e:
+            print(f"Verification log stream error: {e}")
+            count_error('database', e)
+            raise
+    
+    @timed_query('get_verification_log_columns')
+    def get_verification_log_columns(self, since: datetime, until: datetime,
+                                     statuses: Optional[List[str]] = None, batch_size: int = 10000):
+        """Load verification logs in a time range into a VerificationLogColumns container"""
+        from .log_columns import VerificationLogColumns
+        
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor(name='verification_log_columns')
+                cursor.itersize = batch_size
+                cursor.execute("""
+                    SELECT id, email, access_code, verification_status, ip_address, user_agent, created_at
+                    FROM verification_logs
+                    WHERE created_at >= %s AND created_at < %s
+                    AND (%s::varchar[] IS NULL OR verification_status = ANY(%s::varchar[]))
+                    ORDER BY created_at, id
+                """, (since, until, statuses, statuses))
+                
+                columns = VerificationLogColumns()
+                rows = cursor.fetchmany(batch_size)
+                while rows:
+                    columns.extend_rows(rows)
+                    rows = cursor.fetchmany(batch_size)
+                cursor.close()
+                conn.rollback()
+            
+            return columns
+            
+        except psycopg2.Error as e:
+            print(f"Verification log columns query error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('get_verification_timeseries')
+    def get_verification_timeseries(self, interval: str, since: datetime, until: datetime) -> Optional[List[tuple]]:
+        """Get (bucket, success, failed, blocked) per hour or day in [since, until) from the rollup tables"""
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, f'get_verification_timeseries_{interval}', (since, until))
+                rows = cursor.fetchall()
+                cursor.close()
+            
+            return rows
+            
+        except psycopg2.Error as e:
+            print(f"Verification timeseries query error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('compact_verification_rollups')
+    def compact_verification_rollups(self, max_rows: int = 100000) -> Optional[int]:
+        """Fold pending rollup deltas into the rollup tables; -1 if another session is compacting"""
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'compact_verification_rollups', (max_rows,))
+                folded = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
+            
+            return folded
+            
+        except psycopg2.Error as e:
+            print(f"Rollup compaction error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('create_verification_log_partitions')
+    def create_verification_log_partitions(self, months_ahead: int = 3) -> Optional[int]:
+        """Create missing monthly verification_logs partitions up to ``months_ahead``; returns how many"""
+        try:
+            with self.connection() as conn:
+                cursor = self.statements.execute(conn, 'create_verification_log_partitions', (months_ahead,))
+                created = cursor.fetchone()[0]
+                conn.commit()
+                cursor.close()
+            
+            return created
+            
+        except psycopg2.Error as e:
+            print(f"Partition maintenance error: {e}")
+            count_error('database', e)
+            return None
+    
+    @timed_query('get_verification_rules')
+    def get_verification_rules(self) -> Optional[tuple]:
+        """Get (rules, platforms) from the verification_rules and verification_platforms tables"""
+        try:
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT role, platform, min_followers FROM verification_rules
+                    WHERE is_active = TRUE
+                """)
+                rules = [
+                    {'role': role, 'platform': platform, 'min_followers': min_followers}
+                    for role, platform, min_followers in cursor.fetchall()
+                ]
+                cursor.execute("SELECT platform FROM verification_platforms WHERE is_active = TRUE")
+                platforms = [row[0] for row in cursor.fetchall()]
+                cursor.close()
+            
+            return rules, platforms
+            
+        except psycopg2.Error as e:
+            print(f"Verification rules query error: {e}")
+            count_error('database', e)
+            return None
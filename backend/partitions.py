@@ -0,0 +1,71 @@
+"""
+Scheduled creation of future verification_logs partitions
+"""
+import os
+import threading
+from datetime import datetime
+
+from .metrics import count_error, registry
+
+PARTITIONS_CREATED = registry.counter(
+    'guardiq_verification_log_partitions_created_total', 'Monthly verification_logs partitions created'
+)
+
+
+class PartitionMaintainer:
+    """Keeps ``months_ahead`` months of verification_logs partitions created
+
+    Runs ``create_verification_log_partitions()`` once at start and then
+    every ``interval`` seconds, so inserts never depend on someone
+    scheduling verification_log_retention.py. Every worker may run one;
+    the function serializes itself with an advisory lock.
+    """
+
+    def __init__(self, db_manager, months_ahead: int = 3, interval: float = 3600.0):
+        self.db_manager = db_manager
+        self.months_ahead = months_ahead
+        self.interval = interval
+        self.last_created = 0
+        self.last_run = None
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def run_once(self) -> bool:
+        created = self.db_manager.create_verification_log_partitions(self.months_ahead)
+        if created is None:
+            return False
+        if created:
+            print(f"Created {created} verification_logs partition(s)")
+            PARTITIONS_CREATED.inc(amount=created)
+        self.last_created = created
+        self.last_run = datetime.now()
+        return True
+
+    def start(self):
+        if not self.interval:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='partition-maintainer', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.wait(delay):
+            try:
+                ok = self.run_once()
+            except Exception as e:
+                print(f"Partition maintenance error: {e}")
+                count_error('partitions', e)
+                ok = False
+            # Retry sooner while the database is unreachable
+            delay = self.interval if ok else min(60.0, self.interval)
@@ -0,0 +1,306 @@
+"""
+Thread-safe PostgreSQL connection pool for GuardIQ
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+import psycopg2
+from psycopg2.pool import PoolError
+
+
+class PoolTimeout(PoolError):
+    """Raised when no connection could be checked out in time"""
+
+
+class ConnectionPool:
+    """Bounded connection pool with checkout timeout and stale connection recycling
+
+    Connections are opened lazily, so building a pool never touches the
+    database, and a pool inherited across ``fork()`` starts empty in the
+    child instead of sharing the parent's sockets. Idle connections older than ``max_lifetime`` or unused for
+    longer than ``max_idle`` are closed instead of being handed out, and
+    connections idle for more than ``health_check_after`` seconds are
+    probed with ``SELECT 1`` before they are returned to a caller.
+    """
+
+    def __init__(self, connect: Callable, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, max_lifetime: float = 1800.0,
+                 max_idle: float = 300.0, health_check_after: float = 30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size bounds")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.health_check_after = health_check_after
+
+        self._cond = threading.Condition(threading.Lock())
+        # Idle entries are (connection, created_at, returned_at); newest on the right
+        self._idle = deque()
+        # id(connection) -> created_at for connections checked out by callers
+        self._in_use = {}
+        # Slots reserved for connections that are being opened
+        self._opening = 0
+        self._waiting = 0
+        self._closed = False
+        self._pid = os.getpid()
+        # Connections inherited from a parent process; kept referenced so that
+        # garbage collection never sends a Terminate on the parent's socket
+        self._inherited = []
+
+        self._created = 0
+        self._recycled = 0
+        self._failed_checks = 0
+        self._checkouts = 0
+        self._timeouts = 0
+
+    @property
+    def size(self) -> int:
+        """Number of open connections, idle or in use"""
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def getconn(self):
+        """Check out a connection, waiting up to ``timeout`` seconds"""
+        if self._pid != os.getpid():
+            self._after_fork()
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                entry = self._acquire_slot(deadline)
+
+            if entry is None:
+                # A slot was reserved for a brand new connection
+                return self._open_reserved()
+
+            conn, created_at, returned_at = entry
+            if self._is_usable(conn, created_at, returned_at):
+                return conn
+
+            # Stale or broken; drop it and try again
+            self._discard(conn, checked_out=True)
+
+    def putconn(self, conn, close: bool = False):
+        """Return a connection to the pool"""
+        if not close and not conn.closed:
+            try:
+                # Never park a connection with an open or aborted transaction
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                close = True
+
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            if created_at is None:
+                raise PoolError("Trying to put unkeyed connection")
+
+            close = close or self._closed or bool(conn.closed)
+            if close:
+                self._recycled += 1
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+        if close:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a ``with`` block"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def fill(self) -> int:
+        """Open connections until ``min_size`` is reached, returning how many were opened"""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self.size >= self.min_size:
+                    return opened
+                self._opening += 1
+
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._opening -= 1
+                    self._cond.notify()
+                raise
+
+            with self._cond:
+                self._opening -= 1
+                self._created += 1
+                self._idle.append((conn, time.monotonic(), time.monotonic()))
+                self._cond.notify()
+            opened += 1
+
+    def prune(self) -> int:
+        """Close idle connections past their lifetime, keeping ``min_size`` open"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            keep = deque()
+            while self._idle:
+                conn, created_at, returned_at = self._idle.popleft()
+                surplus = self.size + len(keep) + 1 > self.min_size
+                if surplus and self._is_stale(created_at, returned_at, now):
+                    expired.append(conn)
+                else:
+                    keep.append((conn, created_at, returned_at))
+            self._idle = keep
+            self._recycled += len(expired)
+            self._cond.notify_all()
+
+        for conn in expired:
+            self._close_quietly(conn)
+        return len(expired)
+
+    def reset(self):
+        """Close idle connections but keep the pool usable, e.g. before forking workers"""
+        with self._cond:
+            idle, self._idle = self._idle, deque()
+            self._recycled += len(idle)
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        """Snapshot of pool gauges and counters"""
+        with self._cond:
+            return {
+                'size': self.size,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'idle': len(self._idle),
+                'in_use': len(self._in_use),
+                'waiting': self._waiting,
+                'created': self._created,
+                'recycled': self._recycled,
+                'failed_health_checks': self._failed_checks,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+            }
+
+    def _after_fork(self):
+        """Forget connections opened by the parent process"""
+        self._inherited.extend(conn for conn, _, _ in self._idle)
+        self._idle = deque()
+        self._in_use = {}
+        self._opening = 0
+        self._waiting = 0
+        # The parent's lock may have been held at fork time
+        self._cond = threading.Condition(threading.Lock())
+        self._pid = os.getpid()
+
+    def _acquire_slot(self, deadline: float):
+        """Pop an idle entry or reserve room for a new connection; caller holds the lock"""
+        while True:
+            if self._closed:
+                raise PoolError("Connection pool is closed")
+
+            if self._idle:
+                entry = self._idle.pop()
+                self._in_use[id(entry[0])] = entry[1]
+                self._checkouts += 1
+                return entry
+
+            if self.size < self.max_size:
+                self._opening += 1
+                return None
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._timeouts += 1
+                raise PoolTimeout(
+                    f"Timed out after {self.timeout}s waiting for a database connection"
+                )
+
+            self._waiting += 1
+            try:
+                self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+    def _open_reserved(self):
+        """Open a connection in a slot reserved by ``_acquire_slot``"""
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._opening -= 1
+            self._created += 1
+            self._checkouts += 1
+            self._in_use[id(conn)] = time.monotonic()
+        return conn
+
+    def _is_stale(self, created_at: float, returned_at: float, now: float) -> bool:
+        if self.max_lifetime and now - created_at > self.max_lifetime:
+            return True
+        return bool(self.max_idle) and now - returned_at > self.max_idle
+
+    def _is_usable(self, conn, created_at: float, returned_at: float) -> bool:
+        """Decide whether a freshly checked out idle connection can be handed out"""
+        if conn.closed:
+            return False
+
+        now = time.monotonic()
+        if self._is_stale(created_at, returned_at, now):
+            return False
+
+        if now - returned_at < self.health_check_after:
+            return True
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            with self._cond:
+                self._failed_checks += 1
+            return False
+
+    def _discard(self, conn, checked_out: bool = False):
+        with self._cond:
+            if checked_out:
+                # A stale idle connection dropped by getconn was never handed out
+                self._in_use.pop(id(conn), None)
+                self._checkouts -= 1
+            self._recycled += 1
+            self._cond.notify()
+        self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
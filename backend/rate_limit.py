@@ -0,0 +1,340 @@
+"""
+Token-bucket rate limiting for the GuardIQ API
+
+Buckets are kept per client IP, per email and globally. Each endpoint can
+set its own limits. Buckets live in a sharded in-process store by default;
+with a Redis URL every worker draws from the same buckets.
+"""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from flask import jsonify, request
+
+from .metrics import count_error, registry
+from .models import VerificationLog, is_valid_email
+
+try:
+    import redis
+except ImportError:  # only needed for a shared store
+    redis = None
+
+RATE_LIMITED = registry.counter(
+    'guardiq_rate_limited_total', 'Requests rejected by the rate limiter', ('endpoint', 'scope')
+)
+
+_PERIODS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60, 'h': 3600, 'hour': 3600,
+            'd': 86400, 'day': 86400}
+_LIMIT = re.compile(r'^\s*(\d+)\s*/\s*(\d*)\s*([a-z]+)\s*(?::\s*(\d+))?\s*$')
+
+
+class Limit:
+    """``count`` requests per ``period`` seconds with bursts up to ``burst``"""
+    __slots__ = ('rate', 'burst', 'text')
+
+    def __init__(self, count: int, period: float, burst: Optional[int] = None, text: str = ''):
+        if count <= 0 or period <= 0:
+            raise ValueError('Rate limits must be positive')
+        self.rate = count / period
+        self.burst = burst if burst is not None else count
+        self.text = text or f"{count}/{period}s"
+
+    def __repr__(self):
+        return f"Limit({self.text!r})"
+
+
+def parse_limit(text: Optional[str]) -> Optional[Limit]:
+    """Parse ``"30/minute"``, ``"5/second:20"`` (burst 20) or ``"100/10s"``; empty means unlimited"""
+    if not text or text.strip().lower() in ('0', 'none', 'off'):
+        return None
+    match = _LIMIT.match(text.lower())
+    if match is None or match.group(3) not in _PERIODS:
+        raise ValueError(f"Invalid rate limit '{text}'")
+    count, multiplier, unit, burst = match.groups()
+    period = int(multiplier or 1) * _PERIODS[unit]
+    return Limit(int(count), period, int(burst) if burst else None, text.strip())
+
+
+class MemoryStore:
+    """Token buckets in process memory, sharded so concurrent clients rarely share a lock"""
+
+    def __init__(self, shards: int = 16, sweep_every: int = 10000):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._sweep_every = sweep_every
+        self._ops = 0
+
+    def take(self, requests: Sequence[Tuple[str, Limit]], cost: float = 1.0) -> Tuple[int, float]:
+        """Take ``cost`` tokens from every bucket, or from none
+
+        Returns (-1, 0) when allowed, otherwise the index of the first
+        exhausted bucket and the seconds until it has enough tokens.
+        """
+        now = time.monotonic()
+        # Lock each involved shard once, in shard order, so multi-bucket takes can't deadlock
+        shard_ids = sorted({hash(key) % len(self._shards) for key, _ in requests})
+        locks = [self._shards[i][1] for i in shard_ids]
+        for lock in locks:
+            lock.acquire()
+        try:
+            # Bucket state is [tokens, updated_at, full_at]
+            states = []
+            for i, (key, limit) in enumerate(requests):
+                buckets = self._shards[hash(key) % len(self._shards)][0]
+                state = buckets.get(key)
+                if state is None:
+                    state = buckets[key] = [float(limit.burst), now, now]
+                else:
+                    state[0] = min(limit.burst, state[0] + (now - state[1]) * limit.rate)
+                    state[1] = now
+                if state[0] < cost:
+                    return i, (cost - state[0]) / limit.rate
+                states.append((state, limit))
+            for state, limit in states:
+                state[0] -= cost
+                state[2] = now + (limit.burst - state[0]) / limit.rate
+            return -1, 0.0
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+            self._ops += 1
+            if self._ops % self._sweep_every == 0:
+                self.sweep()
+
+    def sweep(self):
+        """Drop buckets that have refilled completely; they are indistinguishable from new ones"""
+        now = time.monotonic()
+        for buckets, lock in self._shards:
+            with lock:
+                for key in [key for key, state in buckets.items() if state[2] <= now]:
+                    del buckets[key]
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets, _ in self._shards)
+
+
+# All-or-nothing take across several buckets, timed by the Redis server clock
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    level = math.min(burst, level + math.max(0, now - ts) * rate)
+    if level < cost then
+        return {i - 1, tostring((cost - level) / rate)}
+    end
+    tokens[i] = level
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    redis.call('HSET', key, 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000) + 1000)
+end
+return {-1, '0'}
+"""
+
+
+class RedisStore:
+    """Token buckets in Redis so every worker and host shares the same limits
+
+    Fails open: if Redis is unreachable the request is allowed and the error counted.
+    """
+
+    def __init__(self, url: str, prefix: str = 'guardiq:ratelimit:'):
+        if redis is None:
+            raise RuntimeError('RATE_LIMIT_STORAGE_URL is set but the redis package is not installed')
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.5)
+        self.prefix = prefix
+        self._script = self.client.register_script(_TAKE_SCRIPT)
+
+    def take(self, requests: Sequence[Tuple[str, Limit]], cost: float = 1.0) -> Tuple[int, float]:
+        args = [cost]
+        for _, limit in requests:
+            args.extend((limit.rate, limit.burst))
+        try:
+            index, wait = self._script(keys=[self.prefix + key for key, _ in requests], args=args)
+            return int(index), float(wait)
+        except redis.RedisError as e:
+            print(f"Rate limit store error: {e}")
+            count_error('rate_limit', e)
+            return -1, 0.0
+
+
+class RejectionLog:
+    """Aggregates rejected requests and writes one verification_logs row per key and interval
+
+    Each row has status ``blocked``, ``access_code`` ``rate_limited:<count>`` and
+    ``user_agent`` ``rate_limit:<scope>:<endpoint>``, so a flood costs one
+    insert per client per interval instead of one per request.
+    """
+
+    def __init__(self, submit: Callable[[VerificationLog], object], interval: float = 60.0):
+        self.submit = submit
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._counts: Dict[tuple, list] = {}
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def add(self, endpoint: str, scope: str, ip_address: Optional[str], email: Optional[str]):
+        if email and not is_valid_email(email):
+            email = None
+        key = (endpoint, scope, ip_address, email or '')
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None:
+                self._counts[key] = [1, datetime.now(timezone.utc)]
+            else:
+                entry[0] += 1
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Counts inherited across a fork belong to the parent
+                self._counts = {}
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rate-limit-log', daemon=True)
+            self._thread.start()
+
+    def flush(self) -> int:
+        """Submit the aggregated rows; returns how many were written"""
+        with self._lock:
+            counts, self._counts = self._counts, {}
+        for (endpoint, scope, ip_address, email), (count, first_seen) in counts.items():
+            self.submit(VerificationLog(
+                email=email,
+                access_code=f"rate_limited:{count}",
+                verification_status='blocked',
+                ip_address=ip_address,
+                user_agent=f"rate_limit:{scope}:{endpoint}",
+                created_at=first_seen
+            ))
+        return len(counts)
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+
+class RateLimiter:
+    """Applies global, per-IP and per-email limits for each endpoint
+
+    ``rules`` maps endpoint names (e.g. ``api.verify_vip``) to
+    ``{'ip': Limit, 'email': Limit}``; endpoints without a rule use
+    ``default``. ``exempt`` endpoints are never limited.
+    """
+
+    SCOPES = ('global', 'ip', 'email')
+
+    def __init__(self, store, global_limit: Optional[Limit] = None, default: Optional[dict] = None,
+                 rules: Optional[Dict[str, dict]] = None, exempt: Sequence[str] = (),
+                 rejection_log: Optional[RejectionLog] = None):
+        self.store = store
+        self.global_limit = global_limit
+        self.default = default or {}
+        self.rules = rules or {}
+        self.exempt = frozenset(exempt)
+        self.rejection_log = rejection_log
+
+    def check(self, endpoint: str, ip_address: Optional[str], email: Optional[str] = None,
+              cost: float = 1.0) -> Optional[Tuple[str, float]]:
+        """Take tokens for one request; returns None if allowed, else (scope, retry_after)"""
+        if endpoint in self.exempt:
+            return None
+        rule = self.rules.get(endpoint, self.default)
+
+        requests: List[Tuple[str, Limit]] = []
+        scopes = []
+        if self.global_limit is not None:
+            requests.append(('global', self.global_limit))
+            scopes.append('global')
+        if rule.get('ip') is not None and ip_address:
+            requests.append((f"ip:{endpoint}:{ip_address}", rule['ip']))
+            scopes.append('ip')
+        if rule.get('email') is not None and email:
+            requests.append((f"email:{endpoint}:{email}", rule['email']))
+            scopes.append('email')
+        if not requests:
+            return None
+
+        index, retry_after = self.store.take(requests, cost)
+        if index < 0:
+            return None
+
+        scope = scopes[index]
+        RATE_LIMITED.inc(endpoint, scope)
+        if self.rejection_log is not None:
+            self.rejection_log.add(endpoint, scope, ip_address, email)
+        return scope, retry_after
+
+    def start(self):
+        if self.rejection_log is not None:
+            self.rejection_log.start()
+
+    def close(self):
+        if self.rejection_log is not None:
+            self.rejection_log.close()
+
+
+def request_email() -> Optional[str]:
+    """Email the current request is about, from the URL or the JSON body"""
+    email = (request.view_args or {}).get('email')
+    if email is None and request.is_json:
+        # Flask caches the parsed body, so the handler doesn't parse it again
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            email = data.get('email')
+    if not isinstance(email, str):
+        return None
+    # Rejections are logged to verification_logs, so only a well-formed email is kept
+    email = email.strip().lower()
+    return email if is_valid_email(email) else None
+
+
+def init_app(app, limiter: RateLimiter):
+    """Enforce ``limiter`` before every request handler runs"""
+
+    @app.before_request
+    def _rate_limit():
+        if request.endpoint is None or request.method == 'OPTIONS':
+            return None
+        result = limiter.check(request.endpoint, request.remote_addr, request_email())
+        if result is None:
+            return None
+
+        scope, retry_after = result
+        response = jsonify({'error': 'Too many requests', 'scope': scope})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+        return response
+
+
+def build_rules(default_ip: Optional[str], default_email: Optional[str], overrides: Dict[str, dict]) -> tuple:
+    """(default rule, per-endpoint rules) from limit strings"""
+    default = {'ip': parse_limit(default_ip), 'email': parse_limit(default_email)}
+    rules = {}
+    for endpoint, limits in overrides.items():
+        rule = dict(default)
+        for scope, text in limits.items():
+            if scope not in ('ip', 'email'):
+                raise ValueError(f"Unknown rate limit scope '{scope}' for {endpoint}")
+            rule[scope] = parse_limit(text)
+        rules[endpoint] = rule
+    return default, rules
@@ -0,0 +1,182 @@
+"""
+Response cache with ETags and precompressed bodies for polled read endpoints
+"""
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from flask import Response, g, request
+
+from .metrics import registry
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always offered
+    brotli = None
+
+RESPONSE_CACHE = registry.counter(
+    'guardiq_response_cache_total', 'Cached endpoint lookups by result', ('endpoint', 'result')
+)
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def accepted_encodings(header: Optional[str]) -> set:
+    """Codings the client accepts (q > 0) from an Accept-Encoding header"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against ``etag``"""
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    return any((tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip()) == opaque
+               for tag in header.split(','))
+
+
+class CachedResponse:
+    """One cached body, its ETag, and its compressed forms, each built once on first request"""
+    __slots__ = ('body', 'etag', 'mimetype', 'expires', '_encoded', '_lock')
+
+    def __init__(self, body: bytes, mimetype: str, expires: float):
+        self.body = body
+        # Weak, so the gzip and brotli forms share it
+        self.etag = 'W/"%s"' % hashlib.sha1(body).hexdigest()[:20]
+        self.mimetype = mimetype
+        self.expires = expires
+        self._encoded: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, coding: str) -> bytes:
+        body = self._encoded.get(coding)
+        if body is None:
+            with self._lock:
+                body = self._encoded.get(coding)
+                if body is None:
+                    if coding == 'br':
+                        body = brotli.compress(self.body, quality=5)
+                    else:
+                        body = gzip.compress(self.body, compresslevel=6, mtime=0)
+                    self._encoded[coding] = body
+        return body
+
+
+class ResponseCache:
+    """Caches successful JSON responses of selected endpoints for a per-endpoint TTL
+
+    Entries are keyed by endpoint, path and query arguments, and evicted
+    least recently used beyond ``max_entries``. Every response from a cached
+    endpoint carries an ETag; ``If-None-Match`` gets an empty 304, and
+    bodies of at least ``min_compress_size`` bytes are sent with brotli or
+    gzip as the client accepts, compressed once per entry.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 10000, min_compress_size: int = 1024):
+        self.ttls = {endpoint: float(ttl) for endpoint, ttl in ttls.items() if float(ttl) > 0}
+        self.max_entries = max_entries
+        self.min_compress_size = min_compress_size
+
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key() -> tuple:
+        return request.endpoint, request.path, tuple(sorted(request.args.items(multi=True)))
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries}
+
+    def respond(self, entry: CachedResponse, response: Optional[Response] = None) -> Response:
+        """A 304 or the entry's body in the best accepted encoding, reusing ``response`` if given"""
+        if etag_matches(request.headers.get('If-None-Match'), entry.etag):
+            response = Response(status=304)
+        else:
+            body, coding = entry.body, None
+            if len(entry.body) >= self.min_compress_size:
+                accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+                if brotli is not None and 'br' in accepted:
+                    coding = 'br'
+                elif 'gzip' in accepted:
+                    coding = 'gzip'
+                if coding is not None:
+                    body = entry.encoded(coding)
+            if response is None:
+                response = Response(mimetype=entry.mimetype)
+            response.set_data(body)
+            if coding is not None:
+                response.headers['Content-Encoding'] = coding
+        response.headers['ETag'] = entry.etag
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def init_app(self, app):
+        """Serve cached endpoints from the cache and store what they return"""
+
+        @app.before_request
+        def _serve_cached():
+            if request.method not in ('GET', 'HEAD') or request.endpoint not in self.ttls:
+                return None
+            key = self.key()
+            entry = self.get(key)
+            if entry is None:
+                g._response_cache_key = key
+                RESPONSE_CACHE.inc(request.endpoint, 'miss')
+                return None
+            not_modified = etag_matches(request.headers.get('If-None-Match'), entry.etag)
+            RESPONSE_CACHE.inc(request.endpoint, 'not_modified' if not_modified else 'hit')
+            return self.respond(entry)
+
+        @app.after_request
+        def _store(response):
+            key = g.pop('_response_cache_key', None)
+            if key is None or response.status_code != 200 or response.is_streamed \
+                    or response.headers.get('Content-Encoding'):
+                return response
+            entry = CachedResponse(response.get_data(), response.mimetype,
+                                   time.monotonic() + self.ttls[key[0]])
+            self.put(key, entry)
+            return self.respond(entry, response)
@@ -0,0 +1,231 @@
+"""
+Data-driven verification rules for GuardIQ VIP decisions
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Sequence
+
+# numpy only speeds up evaluate_columns; imported on first use, since it
+# is most of this module's import time
+_np = None
+
+WILDCARD = '*'
+
+# Outcome codes returned by RuleSet.evaluate
+SUCCESS = 'success'
+FAILED = 'failed'
+INVALID_ROLE = 'invalid_role'
+INVALID_PLATFORM = 'invalid_platform'
+
+# Built-in rules, used when no rules file or table is configured
+DEFAULT_PLATFORMS = ('twitter', 'instagram', 'youtube', 'tiktok', 'linkedin', 'facebook', 'twitch')
+DEFAULT_RULES = (
+    {'role': 'celebrity', 'platform': WILDCARD, 'min_followers': 100000},      # 100K+ followers
+    {'role': 'influencer', 'platform': WILDCARD, 'min_followers': 50000},      # 50K+ followers
+    {'role': 'vip', 'platform': WILDCARD, 'min_followers': 25000},             # 25K+ followers
+    {'role': 'executive', 'platform': WILDCARD, 'min_followers': 10000},       # 10K+ followers
+    {'role': 'content-creator', 'platform': WILDCARD, 'min_followers': 75000}, # 75K+ followers
+    {'role': 'public-figure', 'platform': WILDCARD, 'min_followers': 30000},   # 30K+ followers
+)
+DEFAULT_THRESHOLD = 100000  # Default high threshold for unknown roles
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Compiled, immutable role x platform follower thresholds
+
+    Wildcard rules are expanded at compile time so every valid
+    ``(role, platform)`` pair resolves with a single dict lookup.
+    """
+    roles: frozenset
+    platforms: frozenset
+    thresholds: Mapping = field(repr=False)
+    default_threshold: int = DEFAULT_THRESHOLD
+    version: str = ''
+
+    def threshold_for(self, role: str, platform: str) -> int:
+        return self.thresholds.get((role, platform), self.default_threshold)
+
+    def evaluate(self, role: str, platform: str, followers: int) -> str:
+        """Validate and decide in one lookup, returning an outcome code"""
+        threshold = self.thresholds.get((role, platform))
+        if threshold is None:
+            return INVALID_ROLE if role not in self.roles else INVALID_PLATFORM
+        return SUCCESS if followers >= threshold else FAILED
+
+    def evaluate_many(self, rows: Iterable[Sequence]) -> List[str]:
+        """Evaluate ``(role, platform, followers)`` rows"""
+        evaluate = self.evaluate
+        return [evaluate(role, platform, followers) for role, platform, followers in rows]
+
+    def evaluate_columns(self, roles: Sequence[str], platforms: Sequence[str], followers: Sequence[int]):
+        """Evaluate parallel columns, vectorized with numpy when it is installed
+
+        Returns a list of outcome codes, or a numpy array of them when numpy is
+        available.
+        """
+        np = _numpy()
+        if np is None:
+            return self.evaluate_many(zip(roles, platforms, followers))
+
+        lookup = self.thresholds.get
+        thresholds = np.fromiter(
+            (lookup(pair, -1) for pair in zip(roles, platforms)),
+            dtype=np.int64, count=len(roles)
+        )
+        counts = np.asarray(followers, dtype=np.int64)
+
+        outcomes = np.where(counts >= thresholds, SUCCESS, FAILED).astype(object)
+        unknown = thresholds < 0
+        if unknown.any():
+            valid_roles = self.roles
+            for i in np.flatnonzero(unknown):
+                outcomes[i] = INVALID_ROLE if roles[i] not in valid_roles else INVALID_PLATFORM
+        return outcomes
+
+
+def _numpy():
+    """The numpy module, or None when it is not installed"""
+    global _np
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _np = numpy
+    return _np or None
+
+
+def compile_rules(rules: Iterable[dict], platforms: Iterable[str],
+                  default_threshold: int = DEFAULT_THRESHOLD) -> RuleSet:
+    """Compile rule rows into a RuleSet
+
+    Each rule has ``role``, ``platform`` (``*`` for any platform) and
+    ``min_followers``. Platform-specific rules override the wildcard rule
+    for the same role. An empty rule or platform list raises ValueError,
+    since that RuleSet would reject every verification.
+    """
+    platforms = frozenset(p.strip().lower() for p in platforms)
+    rules = [
+        (str(rule['role']).strip().lower(), str(rule.get('platform') or WILDCARD).strip().lower(),
+         int(rule['min_followers']))
+        for rule in rules
+    ]
+    if not rules or not platforms:
+        raise ValueError(f"Refusing an empty rule set ({len(rules)} rules, {len(platforms)} platforms)")
+
+    thresholds = {}
+    # Wildcards first so specific rules win
+    for role, platform, min_followers in sorted(rules, key=lambda r: r[1] != WILDCARD):
+        if platform == WILDCARD:
+            for name in platforms:
+                thresholds[(role, name)] = min_followers
+        elif platform in platforms:
+            thresholds[(role, platform)] = min_followers
+        else:
+            raise ValueError(f"Rule for role '{role}' names unknown platform '{platform}'")
+
+    digest = hashlib.sha1(
+        json.dumps([sorted(platforms), sorted(rules), default_threshold]).encode()
+    ).hexdigest()[:12]
+
+    return RuleSet(
+        roles=frozenset(role for role, _, _ in rules),
+        platforms=platforms,
+        thresholds=MappingProxyType(thresholds),
+        default_threshold=default_threshold,
+        version=digest
+    )
+
+
+def default_rules() -> RuleSet:
+    return compile_rules(DEFAULT_RULES, DEFAULT_PLATFORMS)
+
+
+def load_rules_file(path: str) -> RuleSet:
+    """Load rules from a JSON file: {"platforms": [...], "rules": [...], "default_threshold": n}"""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    return compile_rules(
+        data['rules'],
+        data.get('platforms', DEFAULT_PLATFORMS),
+        data.get('default_threshold', DEFAULT_THRESHOLD)
+    )
+
+
+class RuleEngine:
+    """Holds the active RuleSet and hot-reloads it from a file or the database
+
+    Requests read ``current`` without locking; reloads compile a new RuleSet
+    and swap the reference. A background thread polls the rules file's
+    mtime, or re-reads the rules tables, every ``reload_interval`` seconds.
+    A failed reload keeps serving the previous rules.
+    """
+
+    def __init__(self, path: Optional[str] = None, db_manager=None, reload_interval: float = 30.0):
+        self.path = path
+        self.db_manager = db_manager
+        self.reload_interval = reload_interval
+        self.current = default_rules()
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._poller = None
+        self._pid = None
+
+    def reload(self) -> bool:
+        """Load and compile the configured rules source"""
+        try:
+            if self.path:
+                mtime = os.path.getmtime(self.path)
+                rules = load_rules_file(self.path)
+                self._mtime = mtime
+            elif self.db_manager is not None:
+                loaded = self.db_manager.get_verification_rules()
+                if loaded is None:
+                    return False
+                rows, platforms = loaded
+                rules = compile_rules(rows, platforms)
+            else:
+                return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Rules reload error: {e}")
+            return False
+
+        if rules.version != self.current.version:
+            self.current = rules
+            print(f"Loaded verification rules {rules.version}")
+        return True
+
+    def start(self):
+        """Load the rules now and start polling for changes in this process"""
+        with self._lock:
+            if self._poller is not None and self._pid == os.getpid() and self._poller.is_alive():
+                return
+            if self.path:
+                # Reading a local file is cheap; avoid serving defaults first
+                self.reload()
+            self._pid = os.getpid()
+            self._poller = threading.Thread(target=self._poll, name='rules-reloader', daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        if not self.path:
+            self.reload()
+        if not self.reload_interval or not (self.path or self.db_manager):
+            return
+        while True:
+            time.sleep(self.reload_interval)
+            if self.path:
+                try:
+                    changed = os.path.getmtime(self.path) != self._mtime
+                except OSError:
+                    changed = False
+                if not changed:
+                    continue
+            self.reload()
@@ -4,46 +4,35 @@ GuardIQ Flask Application Runner
 """
 import os
 import sys
+import threading
+import time
 from backend.app import create_app   # instead of just from app import create_app
-from .api_routes import api
-from .config import Config
-from .models import DatabaseManager
+from .api_routes import api, warmup
 
 
-def check_database_connection():
-    """Check if database is accessible"""
-    db_config = {
-        'host': Config.DB_HOST,
-        'database': Config.DB_NAME,
-        'user': Config.DB_USER,
-        'password': Config.DB_PASSWORD,
-        'port': Config.DB_PORT
-    }
-    
-    db_manager = DatabaseManager(db_config)
-    conn = db_manager.get_connection()
-    
-    if conn:
-        conn.close()
-        print("✓ Database connection successful")
-        return True
-    else:
-        print("✗ Database connection failed")
+def check_database_connection(timeout: float = 10.0):
+    """Report whether the database is reachable, without holding up startup"""
+    def report():
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if warmup.ready:
+                print("✓ Database connection successful")
+                return
+            time.sleep(0.25)
+        print("✗ Database not reachable yet; the server is up and will connect when it is")
         print("Please check your database configuration and ensure PostgreSQL is running")
-        return False
+        print("GET /api/ready returns 200 once the database is connected")
+
+    threading.Thread(target=report, name='database-check', daemon=True).start()
 
 def main():
     """Main application runner"""
     print("GuardIQ VIP API Server")
     print("=" * 30)
     
-    # Check database connection
-    if not check_database_connection():
-        print("\nPlease fix database connection issues before starting the server.")
-        sys.exit(1)
-    
-    # Create Flask app
+    # Create Flask app; the database is connected by the background warm-up
     app = create_app()
+    check_database_connection()
     
     # Get configuration
     host = os.getenv('FLASK_HOST', '0.0.0.0')
@@ -52,8 +41,10 @@ def main():
     
     print(f"\nStarting server on http://{host}:{port}")
     print(f"Debug mode: {debug}")
+    print("Development server; use `python -m backend.serve` in production")
     print("\nAPI Endpoints:")
     print("  GET  /api/health           - Health check")
+    print("  GET  /api/ready            - Readiness check")
     print("  POST /api/verify-vip       - Verify VIP status")
     print("  GET  /api/vip-stats        - Get VIP statistics")
     print("  GET  /api/security-status  - Get security status")
@@ -19,6 +19,7 @@ def main():
     print(f"🌐 Server running on: http://localhost:{port}")
     print("📊 Database: PostgreSQL")
     print("🔒 Security: Enabled")
+    print("⚠️  Development server; use `python -m backend.serve` in production")
     print("-" * 50)
     
     # Run the Flask app
@@ -0,0 +1,350 @@
+"""
+Security event pipeline: batched writes to security_events and in-process fan-out
+"""
+import itertools
+import json
+import os
+import select
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import asdict
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import psycopg2
+
+from .metrics import count_error, registry
+from .models import DatabaseManager, SecurityEvent
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+# Written without waiting for a full batch, and allowed past a full queue
+URGENT = frozenset(('high', 'critical'))
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7500
+
+SECURITY_EVENTS = registry.counter(
+    'guardiq_security_events_total', 'Security events by pipeline outcome', ('outcome',)
+)
+
+
+def severities_from(minimum: str) -> tuple:
+    """Severities at or above ``minimum``"""
+    return SEVERITIES[SEVERITIES.index(minimum):]
+
+
+def event_payload(event) -> dict:
+    """JSON-ready dict for a SecurityEvent or SecurityEventRecord"""
+    payload = event._asdict() if hasattr(event, '_asdict') else asdict(event)
+    payload['created_at'] = event.created_at.isoformat() if event.created_at else None
+    return payload
+
+
+def event_from_payload(payload: dict) -> SecurityEvent:
+    created_at = payload.pop('created_at', None)
+    return SecurityEvent(created_at=datetime.fromisoformat(created_at) if created_at else None, **payload)
+
+
+def process_origin() -> str:
+    """Identifies this worker in relayed notifications"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def notify_payloads(events: List[SecurityEvent], origin: str) -> List[str]:
+    """``{"origin": ..., "events": [...]}`` JSON payloads, each under MAX_NOTIFY_PAYLOAD bytes"""
+    head = f'{{"origin": {json.dumps(origin)}, "events": ['
+    payloads, current, size = [], [], len(head) + 2
+    for event in events:
+        encoded = json.dumps(event_payload(event))
+        if len(encoded) + len(head) + 2 > MAX_NOTIFY_PAYLOAD:
+            continue
+        if current and size + len(encoded) + 2 > MAX_NOTIFY_PAYLOAD:
+            payloads.append(head + ', '.join(current) + ']}')
+            current, size = [], len(head) + 2
+        current.append(encoded)
+        size += len(encoded) + 2
+    if current:
+        payloads.append(head + ', '.join(current) + ']}')
+    return payloads
+
+
+class Subscription:
+    """One subscriber's bounded queue of ``(sequence, event)`` pairs
+
+    When a slow subscriber falls ``maxlen`` events behind, the oldest are
+    dropped and counted rather than blocking publishers.
+    """
+
+    def __init__(self, severities: tuple, maxlen: int):
+        self.severities = frozenset(severities)
+        self.dropped = 0
+        self.closed = False
+        self._events = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+
+    def deliver(self, item: tuple):
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+                SECURITY_EVENTS.inc('dropped_subscriber')
+            self._events.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: float) -> tuple:
+        """Wait up to ``timeout`` seconds for events; returns (events, dropped since the last call)"""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            dropped, self.dropped = self.dropped, 0
+        return events, dropped
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class EventBus:
+    """In-process publish/subscribe for security events
+
+    ``publish`` never blocks: the subscriber list is copy-on-write and each
+    subscriber has its own bounded queue. At most ``max_subscribers`` may
+    be attached at once.
+    """
+
+    def __init__(self, max_subscribers: int = 50, queue_size: int = 1000):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self._subscribers = ()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+        self._published = 0
+
+    def subscribe(self, min_severity: str = 'low') -> Optional[Subscription]:
+        """Attach a subscriber, or None when ``max_subscribers`` are already attached"""
+        subscription = Subscription(severities_from(min_severity), self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers = self._subscribers + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def publish(self, event: SecurityEvent):
+        item = (next(self._sequence), event)
+        self._published += 1
+        for subscription in self._subscribers:
+            if event.severity in subscription.severities:
+                subscription.deliver(item)
+
+    def close(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, ()
+        for subscription in subscribers:
+            subscription.close()
+
+    def stats(self) -> dict:
+        return {'subscribers': len(self._subscribers), 'max_subscribers': self.max_subscribers,
+                'published': self._published}
+
+
+class SecurityEventWriter:
+    """Batched inserts into security_events with severity-aware flushing
+
+    Low and medium events wait for ``batch_size`` events or
+    ``flush_interval`` seconds; a high or critical event flushes what is
+    queued right away. When ``max_queue`` events are waiting, further low
+    and medium events are dropped, while urgent ones may use a reserve of
+    ``max_queue // 10`` more slots. Failed batches are retried
+    ``max_retries`` times before being dropped. With ``channel`` set, each
+    batch is also sent with NOTIFY in the same transaction, for other
+    workers' SecurityEventRelay.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_queue: int = 20000, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_retries: int = 3, retry_delay: float = 1.0,
+                 channel: Optional[str] = None):
+        self.db_manager = db_manager
+        self.channel = channel
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+        self._events = deque()
+        self._urgent = 0
+        self._cond = threading.Condition()
+        self._worker = None
+        self._pid = None
+        self._stop = threading.Event()
+
+        self._stats = {'accepted': 0, 'dropped': 0, 'written': 0, 'failed': 0, 'batches': 0}
+
+    def start(self):
+        with self._cond:
+            if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+                return
+            if self._pid is not None and self._pid != os.getpid():
+                # Events inherited from the parent are the parent's to write
+                self._events.clear()
+                self._urgent = 0
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='security-event-writer', daemon=True)
+            self._worker.start()
+
+    def submit(self, event: SecurityEvent) -> bool:
+        """Queue an event; False means the queue was full and it was dropped"""
+        self.start()
+        urgent = event.severity in URGENT
+        limit = self.max_queue + (self.max_queue // 10 if urgent else 0)
+        with self._cond:
+            if len(self._events) >= limit:
+                self._stats['dropped'] += 1
+                SECURITY_EVENTS.inc('dropped_queue')
+                return False
+            self._events.append(event)
+            self._stats['accepted'] += 1
+            if urgent:
+                self._urgent += 1
+            if urgent or len(self._events) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop after writing what is queued (up to ``timeout`` seconds)"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            worker.join(timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {'queued': len(self._events), 'max_queue': self.max_queue, **self._stats}
+
+    def _take(self) -> List[SecurityEvent]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._events) < self.batch_size and not self._urgent and not self._stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and self._events:
+                    break
+                self._cond.wait(remaining if remaining > 0 else self.flush_interval)
+            count = min(self.batch_size, len(self._events))
+            batch = [self._events.popleft() for _ in range(count)]
+            self._urgent = max(0, self._urgent - sum(1 for event in batch if event.severity in URGENT))
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            if not batch:
+                if self._stop.is_set():
+                    return
+                continue
+            self._write(batch)
+
+    def _write(self, batch: List[SecurityEvent]):
+        notifications = [(self.channel, payload) for payload in notify_payloads(batch, process_origin())] \
+            if self.channel else ()
+        for attempt in range(self.max_retries + 1):
+            if self.db_manager.log_security_events(batch, notifications):
+                with self._cond:
+                    self._stats['written'] += len(batch)
+                    self._stats['batches'] += 1
+                SECURITY_EVENTS.inc('written', amount=len(batch))
+                return
+            if attempt < self.max_retries:
+                # Once stopping, the remaining attempts run back to back instead of waiting
+                self._stop.wait(self.retry_delay * (attempt + 1))
+
+        with self._cond:
+            self._stats['failed'] += len(batch)
+        SECURITY_EVENTS.inc('failed', amount=len(batch))
+
+
+class SecurityEventRelay:
+    """Publishes events written by other worker processes to the local EventBus
+
+    Listens on ``channel`` over a dedicated autocommit connection, the
+    same way VIPUserCacheListener does, and skips batches this process
+    sent itself (they were published when emitted). Events sent while
+    disconnected are not replayed.
+    """
+
+    def __init__(self, bus: EventBus, connect: Callable, channel: str = 'security_events',
+                 retry_interval: float = 5.0):
+        self.bus = bus
+        self.connect = connect
+        self.channel = channel
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='security-event-relay', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def handle(self, payload: str):
+        """Publish the events in one notification payload"""
+        try:
+            batch = json.loads(payload)
+            if batch.get('origin') == process_origin():
+                return
+            events = [event_from_payload(item) for item in batch.get('events', ())]
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Security event relay payload error: {e}")
+            return
+        for event in events:
+            self.bus.publish(event)
+        SECURITY_EVENTS.inc('relayed', amount=len(events))
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+                cursor.close()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle(conn.notifies.pop(0).payload)
+
+            except (psycopg2.Error, OSError) as e:
+                print(f"Security event relay error: {e}")
+                count_error('database', e)
+                self._stop.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+GuardIQ production server
+
+Runs create_app() under gunicorn with the settings in gunicorn_conf.py:
+
+    python -m backend.serve
+"""
+from gunicorn.app.base import BaseApplication
+
+from . import gunicorn_conf
+
+
+class GuardIQApplication(BaseApplication):
+    """Embedded gunicorn application using backend.gunicorn_conf"""
+
+    def load_config(self):
+        for key in dir(gunicorn_conf):
+            if key in self.cfg.settings:
+                self.cfg.set(key, getattr(gunicorn_conf, key))
+
+    def load(self):
+        from .wsgi import application
+        return application
+
+
+def main():
+    GuardIQApplication().run()
+
+
+if __name__ == '__main__':
+    main()
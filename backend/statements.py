@@ -0,0 +1,146 @@
+"""
+Prepared-statement registry for DatabaseManager
+
+Hot queries are registered once by name. The first time a pooled
+connection runs a statement it is PREPAREd on that connection; later calls
+send only ``EXECUTE name (...)`` so the server skips parsing and planning.
+Rows come back as namedtuples whose class is cached per column list.
+"""
+import re
+import time
+from collections import namedtuple
+from typing import Dict, Optional, Sequence
+
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+
+from .metrics import registry
+
+_PLACEHOLDER = re.compile(r'\$(\d+)')
+
+STATEMENT_LATENCY = registry.histogram(
+    'guardiq_db_statement_duration_seconds', 'Prepared statement execution latency by statement', ('statement',)
+)
+STATEMENT_PREPARES = registry.counter(
+    'guardiq_db_statement_prepares_total', 'PREPAREs issued by statement (once per pooled connection)', ('statement',)
+)
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+class Statement:
+    """A named query; ``sql`` uses $1, $2, ... placeholders"""
+    __slots__ = ('name', 'sql', 'param_types', 'params', 'prepare_sql', 'execute_sql', 'inline_sql')
+
+    def __init__(self, name: str, sql: str, param_types: Sequence[str] = ()):
+        self.name = name
+        self.sql = sql
+        self.param_types = tuple(param_types)
+        self.params = max((int(n) for n in _PLACEHOLDER.findall(sql)), default=0)
+        types = f" ({', '.join(self.param_types)})" if self.param_types else ''
+        self.prepare_sql = f"PREPARE {name}{types} AS {sql}"
+        self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * self.params)})" if self.params else f"EXECUTE {name}"
+        # Same query with psycopg2 placeholders, for connections that can't hold prepared statements
+        self.inline_sql = _PLACEHOLDER.sub(lambda m: f"%(p{m.group(1)})s", sql)
+
+    def inline_params(self, params: tuple) -> dict:
+        return {f"p{i}": value for i, value in enumerate(params, 1)}
+
+
+class StatementRegistry:
+    """Named statements prepared lazily on each connection and executed by name"""
+
+    def __init__(self):
+        self._statements: Dict[str, Statement] = {}
+        self._row_types = {}
+
+    def register(self, name: str, sql: str, param_types: Sequence[str] = ()) -> Statement:
+        statement = self._statements[name] = Statement(name, sql, param_types)
+        return statement
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._statements
+
+    def execute(self, conn, name: str, params: tuple = ()):
+        """Run a registered statement on ``conn`` and return its cursor"""
+        statement = self._statements[name]
+        prepared = getattr(conn, 'prepared', None)
+        cursor = conn.cursor()
+
+        started = time.perf_counter()
+        try:
+            if prepared is None:
+                # Plain connection (not from the pool): nothing to reuse
+                cursor.execute(statement.inline_sql, statement.inline_params(params))
+                return cursor
+
+            if name not in prepared:
+                self._prepare(conn, cursor, statement)
+            try:
+                cursor.execute(statement.execute_sql, params)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # The session lost its prepared statements (e.g. DISCARD ALL)
+                conn.rollback()
+                prepared.clear()
+                self._prepare(conn, cursor, statement)
+                cursor.execute(statement.execute_sql, params)
+            return cursor
+        finally:
+            STATEMENT_LATENCY.observe(time.perf_counter() - started, name)
+
+    def fetchone(self, conn, name: str, params: tuple = ()) -> Optional[tuple]:
+        cursor = self.execute(conn, name, params)
+        try:
+            row = cursor.fetchone()
+            return self.row_type(cursor.description)._make(row) if row is not None else None
+        finally:
+            cursor.close()
+
+    def fetchall(self, conn, name: str, params: tuple = ()) -> list:
+        cursor = self.execute(conn, name, params)
+        try:
+            make = self.row_type(cursor.description)._make
+            return [make(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def row_type(self, description):
+        """namedtuple class for a result's columns, created once per column list"""
+        columns = tuple(column.name for column in description)
+        row_type = self._row_types.get(columns)
+        if row_type is None:
+            row_type = self._row_types[columns] = namedtuple('Row', columns, rename=True)
+        return row_type
+
+    def stats(self) -> dict:
+        """Per-statement calls, total/mean seconds and PREPARE count"""
+        result = {name: {'calls': 0, 'total_time': 0.0, 'mean_time': 0.0, 'prepares': 0}
+                  for name in self._statements}
+        for suffix, labels, value in STATEMENT_LATENCY.samples():
+            entry = result.get(labels[0])
+            if entry is None:
+                continue
+            if suffix == '_count':
+                entry['calls'] = value
+            elif suffix == '_sum':
+                entry['total_time'] = value
+        for _, labels, value in STATEMENT_PREPARES.samples():
+            if labels[0] in result:
+                result[labels[0]]['prepares'] = value
+        for entry in result.values():
+            if entry['calls']:
+                entry['mean_time'] = entry['total_time'] / entry['calls']
+        return result
+
+    @staticmethod
+    def _prepare(conn, cursor, statement: Statement):
+        cursor.execute(statement.prepare_sql)
+        conn.prepared.add(statement.name)
+        STATEMENT_PREPARES.inc(statement.name)
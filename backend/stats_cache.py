@@ -0,0 +1,127 @@
+"""
+Shared, incrementally maintained cache for VIP system statistics
+"""
+import threading
+import time
+from datetime import date
+from typing import Callable
+
+from .models import VerificationLog
+
+
+class StatisticsCache:
+    """TTL cache around ``get_vip_statistics()`` with single-flight refresh
+
+    Concurrent misses wait for one in-flight query instead of issuing their
+    own. With ``stale_while_revalidate`` an expired value younger than
+    ``ttl + max_stale`` is served immediately while a background thread
+    refreshes it. Between refreshes the counters fed by the verification
+    path are bumped in place by ``record``; the window-based counters only
+    decay on the next full refresh, which the TTL bounds.
+    """
+
+    def __init__(self, loader: Callable[[], dict], ttl: float = 5.0,
+                 stale_while_revalidate: bool = True, max_stale: float = 60.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = 0.0
+        self._loaded_on = None
+        self._inflight = None
+
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+
+    def get(self) -> dict:
+        """Return cached statistics, refreshing them if needed"""
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            # failed_attempts_today resets at midnight, so a new day is always a miss
+            current = self._value is not None and self._loaded_on == date.today()
+
+            if current and age < self.ttl:
+                self._hits += 1
+                return dict(self._value)
+
+            if current and self.stale_while_revalidate and age < self.ttl + self.max_stale:
+                self._hits += 1
+                if self._inflight is None:
+                    self._inflight = threading.Event()
+                    threading.Thread(target=self._refresh, name='stats-refresh', daemon=True).start()
+                return dict(self._value)
+
+            self._misses += 1
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            self._refresh()
+        else:
+            inflight.wait()
+
+        with self._lock:
+            return dict(self._value) if self._value is not None else {}
+
+    def record(self, log: VerificationLog, high_risk: bool = False):
+        """Apply a verification outcome to the cached counters"""
+        with self._lock:
+            if self._value is None:
+                return
+            if log.verification_status == 'success':
+                self._bump('recent_verifications')
+            elif log.verification_status == 'failed':
+                self._bump('failed_attempts_today')
+            if high_risk:
+                self._bump('high_risk_events')
+
+    def record_high_risk(self, count: int = 1):
+        """Count high/critical security events raised outside ``record``"""
+        with self._lock:
+            if self._value is not None:
+                self._value['high_risk_events'] = self._value.get('high_risk_events', 0) + count
+
+    def invalidate(self):
+        """Force the next ``get`` to reload"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'refreshes': self._refreshes,
+                'age': round(time.monotonic() - self._loaded_at, 3) if self._value is not None else None,
+            }
+
+    def _refresh(self):
+        """Run the loader once and wake every waiter"""
+        try:
+            value = self.loader()
+        except Exception as e:
+            print(f"Statistics refresh error: {e}")
+            value = {}
+
+        with self._lock:
+            # An empty result means the query failed; keep serving the last good value
+            if value:
+                self._value = dict(value)
+                self._loaded_at = time.monotonic()
+                self._loaded_on = date.today()
+                self._refreshes += 1
+            inflight, self._inflight = self._inflight, None
+
+        if inflight is not None:
+            inflight.set()
+
+    def _bump(self, key: str):
+        self._value[key] = self._value.get(key, 0) + 1
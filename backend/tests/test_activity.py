@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from backend import activity
+from backend.activity import SuspiciousActivityDetector
+from backend.models import VerificationLog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(activity.time, 'time', clock)
+    return clock
+
+
+def attempt(clock, status='failed', email='user@example.com', ip='10.0.0.1'):
+    return VerificationLog(email=email, verification_status=status, ip_address=ip,
+                           created_at=datetime.fromtimestamp(clock.now))
+
+
+def warm_detector(clock, **kwargs):
+    detector = SuspiciousActivityDetector(**kwargs)
+    detector.load([], clock.now)
+    return detector
+
+
+def test_cold_detector_defers_to_sql(clock):
+    detector = SuspiciousActivityDetector()
+    assert detector.check('user@example.com', '10.0.0.1') is None
+    assert detector.ip_failed_attempts('10.0.0.1') is None
+
+
+def test_failures_expire_out_of_the_window(clock):
+    detector = warm_detector(clock, window=60, email_threshold=3)
+    for _ in range(3):
+        detector.record(attempt(clock))
+        clock.now += 10
+
+    result = detector.check('user@example.com')
+    assert result['is_suspicious'] and result['failed_attempts'] == 3
+
+    # The first failure was 30s ago; 31s later it leaves the window
+    clock.now += 31
+    result = detector.check('user@example.com')
+    assert not result['is_suspicious'] and result['failed_attempts'] == 2
+
+    clock.now += 60
+    assert detector.check('user@example.com')['failed_attempts'] == 0
+    assert 'user@example.com' not in detector._email_failures
+
+
+def test_only_failed_attempts_count_toward_the_ip_threshold(clock):
+    detector = warm_detector(clock, ip_threshold=3)
+    for i in range(2):
+        detector.record(attempt(clock, email=f'user{i}@example.com'))
+    for _ in range(5):
+        detector.record(attempt(clock, status='blocked'))
+        detector.record(attempt(clock, status='success'))
+
+    result = detector.check('other@example.com', '10.0.0.1')
+    assert result['ip_failed_attempts'] == 2 and not result['is_suspicious']
+
+    detector.record(attempt(clock, email='user9@example.com'))
+    assert detector.check('other@example.com', '10.0.0.1')['is_suspicious']
+    assert not detector.check('other@example.com', '10.0.0.2')['is_suspicious']
+
+
+def test_sql_results_get_the_same_ip_rule(clock):
+    detector = SuspiciousActivityDetector(ip_threshold=20)
+    sql_result = {'is_suspicious': False, 'failed_attempts': 1, 'risk_level': 'medium'}
+    assert detector.with_ip_failures(dict(sql_result), 19)['is_suspicious'] is False
+    assert detector.with_ip_failures(dict(sql_result), 20)['is_suspicious'] is True
+
+
+def test_load_keeps_failures_recorded_during_the_seed(clock):
+    detector = warm_detector(clock, email_threshold=5)
+    started = clock.now
+    clock.now += 1
+    detector.record(attempt(clock))
+
+    seeded = [('user@example.com', '10.0.0.1', 'failed', datetime.fromtimestamp(started - 5))]
+    detector.load(seeded, started)
+
+    assert detector.check('user@example.com')['failed_attempts'] == 2
@@ -0,0 +1,106 @@
+import json
+
+import psycopg2
+import pytest
+
+from backend.log_writer import VerificationLogWriter
+from backend.models import VerificationLog
+
+
+class FakeDatabase:
+    """Accepts rows until ``available`` is exhausted; refuses emails over 255 characters"""
+
+    def __init__(self, available=None):
+        self.rows = []
+        self.available = available
+
+    def insert_verification_logs(self, logs):
+        if self.available is not None and len(self.rows) + len(logs) > self.available:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        if any(len(log.email) > 255 for log in logs):
+            raise psycopg2.errors.StringDataRightTruncation('value too long for type character varying(255)')
+        self.rows.extend(logs)
+
+
+def logs(count, prefix='user'):
+    return [VerificationLog(email=f'{prefix}{i}@example.com', verification_status='failed') for i in range(count)]
+
+
+@pytest.fixture
+def spill_path(tmp_path):
+    return str(tmp_path / 'verification_logs.spill')
+
+
+def spilled_emails(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line)['email'] for line in f]
+
+
+def test_bad_row_is_rejected_and_the_rest_of_the_batch_written(spill_path):
+    db = FakeDatabase()
+    writer = VerificationLogWriter(db, spill_path=spill_path)
+    batch = logs(10)
+    batch[6].email = 'x' * 300 + '@example.com'
+
+    writer._flush(batch)
+
+    assert [log.email for log in db.rows] == [log.email for i, log in enumerate(batch) if i != 6]
+    assert spilled_emails(spill_path + '.rejected') == [batch[6].email]
+    assert writer.stats()['written'] == 9
+    assert writer.stats()['rejected'] == 1
+    assert writer.stats()['spilled'] == 0
+
+
+def test_unreachable_database_spills_and_replay_inserts(spill_path):
+    writer = VerificationLogWriter(FakeDatabase(available=0), spill_path=spill_path, retry_interval=0)
+    writer._flush(logs(5))
+    assert spilled_emails(spill_path) == [f'user{i}@example.com' for i in range(5)]
+
+    db = writer.db_manager = FakeDatabase()
+    writer._maybe_replay()
+
+    assert [log.email for log in db.rows] == [f'user{i}@example.com' for i in range(5)]
+    assert writer.stats()['replayed'] == 5
+
+
+def test_replay_keeps_unsent_lines_when_the_database_goes_away(spill_path):
+    writer = VerificationLogWriter(FakeDatabase(available=0), batch_size=3, spill_path=spill_path, retry_interval=0)
+    writer._flush(logs(10))
+
+    writer.db_manager = FakeDatabase(available=3)
+    writer._maybe_replay()
+    assert spilled_emails(spill_path) == [f'user{i}@example.com' for i in range(3, 10)]
+
+    db = writer.db_manager = FakeDatabase()
+    writer._maybe_replay()
+    assert [log.email for log in db.rows] == [f'user{i}@example.com' for i in range(3, 10)]
+    assert writer.stats()['replayed'] == 10
+    assert writer.stats()['spilled'] == 10
+
+
+def test_replay_does_not_get_stuck_behind_a_bad_row(spill_path):
+    writer = VerificationLogWriter(FakeDatabase(available=0), batch_size=4, spill_path=spill_path, retry_interval=0)
+    batch = logs(8)
+    batch[0].email = 'x' * 300 + '@example.com'
+    writer._flush(batch)
+    with open(spill_path, 'a', encoding='utf-8') as f:
+        f.write('{"email": "truncated\n')
+
+    db = writer.db_manager = FakeDatabase()
+    writer._maybe_replay()
+
+    assert len(db.rows) == 7
+    with open(spill_path + '.rejected', encoding='utf-8') as f:
+        assert len(f.readlines()) == 2
+    assert writer.stats()['rejected'] == 2
+
+
+def test_created_at_survives_the_spill_file(spill_path):
+    writer = VerificationLogWriter(FakeDatabase(available=0), spill_path=spill_path)
+    writer._running = lambda: True
+    log = VerificationLog(email='user@example.com')
+    writer.submit(log)
+    assert log.created_at.tzinfo is not None
+
+    line = VerificationLogWriter._to_json(log)
+    assert VerificationLogWriter._from_json(line).created_at == log.created_at
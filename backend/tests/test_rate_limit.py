@@ -0,0 +1,83 @@
+import pytest
+
+from backend import rate_limit
+from backend.rate_limit import MemoryStore, RejectionLog, parse_limit
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    return clock
+
+
+def test_parse_limit():
+    limit = parse_limit('30/minute')
+    assert limit.rate == 0.5 and limit.burst == 30
+    limit = parse_limit('5/second:20')
+    assert limit.rate == 5 and limit.burst == 20
+    assert parse_limit('100/10s').rate == 10
+    assert parse_limit('off') is None
+    with pytest.raises(ValueError):
+        parse_limit('10/fortnight')
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(clock):
+    store = MemoryStore()
+    limit = parse_limit('2/second:4')
+    requests = [('ip:verify:10.0.0.1', limit)]
+
+    assert [store.take(requests)[0] for _ in range(4)] == [-1] * 4
+    index, retry_after = store.take(requests)
+    assert index == 0
+    assert retry_after == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert store.take(requests)[0] == -1
+    assert store.take(requests)[0] == 0
+
+    # Refill stops at the burst size
+    clock.now += 60
+    assert [store.take(requests)[0] for _ in range(5)] == [-1] * 4 + [0]
+
+
+def test_take_is_all_or_nothing(clock):
+    store = MemoryStore()
+    roomy, tight = parse_limit('100/second'), parse_limit('1/minute')
+    assert store.take([('global', roomy), ('email:verify:a@example.com', tight)])[0] == -1
+
+    index, _ = store.take([('global', roomy), ('email:verify:a@example.com', tight)])
+    assert index == 1
+    # The refused request took nothing from the global bucket
+    assert [store.take([('global', roomy)])[0] for _ in range(99)] == [-1] * 99
+    assert store.take([('global', roomy)])[0] == 0
+
+
+def test_sweep_drops_full_buckets(clock):
+    store = MemoryStore()
+    store.take([('ip:verify:10.0.0.1', parse_limit('1/second'))])
+    assert len(store) == 1
+    clock.now += 2
+    store.sweep()
+    assert len(store) == 0
+
+
+def test_rejection_log_drops_invalid_emails():
+    rows = []
+    log = RejectionLog(rows.append)
+    log.add('api.verify_vip', 'ip', '10.0.0.1', 'x' * 300 + '@example.com')
+    log.add('api.verify_vip', 'ip', '10.0.0.1', 'user@example.com')
+    log.add('api.verify_vip', 'ip', '10.0.0.1', 'user@example.com')
+    log.flush()
+
+    assert sorted((row.email, row.access_code) for row in rows) == [
+        ('', 'rate_limited:1'), ('user@example.com', 'rate_limited:2')
+    ]
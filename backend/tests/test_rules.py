@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from backend.rules import INVALID_PLATFORM, INVALID_ROLE, SUCCESS, RuleEngine, compile_rules
+
+RULES = [
+    {'role': 'Celebrity', 'platform': '*', 'min_followers': 1000},
+    {'role': 'celebrity', 'platform': 'twitch', 'min_followers': 50},
+    {'role': 'executive', 'platform': 'linkedin', 'min_followers': 10},
+]
+PLATFORMS = ['twitter', 'twitch', 'LinkedIn']
+
+
+def test_specific_rules_override_wildcards():
+    rules = compile_rules(RULES, PLATFORMS)
+    assert rules.roles == {'celebrity', 'executive'}
+    assert rules.platforms == {'twitter', 'twitch', 'linkedin'}
+    assert rules.threshold_for('celebrity', 'twitter') == 1000
+    assert rules.threshold_for('celebrity', 'twitch') == 50
+    assert rules.threshold_for('executive', 'linkedin') == 10
+
+
+def test_evaluate():
+    rules = compile_rules(RULES, PLATFORMS)
+    assert rules.evaluate('celebrity', 'twitch', 50) == SUCCESS
+    assert rules.evaluate('celebrity', 'twitter', 999) != SUCCESS
+    assert rules.evaluate('astronaut', 'twitter', 10 ** 9) == INVALID_ROLE
+    assert rules.evaluate('celebrity', 'myspace', 10 ** 9) == INVALID_PLATFORM
+
+
+def test_version_follows_content_not_order():
+    assert compile_rules(RULES, PLATFORMS).version == compile_rules(RULES[::-1], PLATFORMS[::-1]).version
+    changed = RULES[:2] + [{'role': 'executive', 'platform': 'linkedin', 'min_followers': 11}]
+    assert compile_rules(changed, PLATFORMS).version != compile_rules(RULES, PLATFORMS).version
+
+
+@pytest.mark.parametrize('rules, platforms', [([], PLATFORMS), (RULES, []),
+                                              ([{'role': 'vip', 'platform': 'myspace', 'min_followers': 1}], PLATFORMS)])
+def test_invalid_rule_sets_raise(rules, platforms):
+    with pytest.raises(ValueError):
+        compile_rules(rules, platforms)
+
+
+class FakeDatabase:
+    def __init__(self, loaded):
+        self.loaded = loaded
+
+    def get_verification_rules(self):
+        return self.loaded
+
+
+def test_reload_from_the_database_keeps_the_last_good_rules():
+    engine = RuleEngine(db_manager=FakeDatabase((RULES, PLATFORMS)))
+    assert engine.reload()
+    good = engine.current
+    assert good.threshold_for('celebrity', 'twitch') == 50
+
+    for loaded in (None, ([], []), (RULES, []), ([{'role': 'vip', 'min_followers': 'many'}], PLATFORMS)):
+        engine.db_manager = FakeDatabase(loaded)
+        assert not engine.reload()
+        assert engine.current is good
+
+
+def test_reload_from_a_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps({'platforms': PLATFORMS, 'rules': RULES}))
+    engine = RuleEngine(path=str(path))
+    assert engine.reload()
+    assert engine.current.threshold_for('celebrity', 'twitter') == 1000
+
+    path.write_text(json.dumps({'platforms': PLATFORMS, 'rules': []}))
+    assert not engine.reload()
+    assert engine.current.threshold_for('celebrity', 'twitter') == 1000
+
+    path.write_text('{"rules": [')
+    os.utime(path)
+    assert not engine.reload()
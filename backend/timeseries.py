@@ -0,0 +1,175 @@
+"""
+Dashboard time series read from pre-aggregated rollup tables
+"""
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import psycopg2
+
+from .metrics import count_error, registry
+
+ROLLUP_DELTAS_FOLDED = registry.counter(
+    'guardiq_rollup_deltas_folded_total', 'verification_rollup_deltas rows compacted into the rollups'
+)
+
+INTERVALS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+VERIFICATION_STATUSES = ('success', 'failed', 'blocked')
+DETECTION_GROUPS = ('threat_type', 'platform')
+
+
+def bucket_floor(value: datetime, interval: str) -> datetime:
+    if interval == 'day':
+        return datetime(value.year, value.month, value.day)
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def time_range(interval: str, since: Optional[datetime], until: Optional[datetime], default_points: int,
+               max_points: int, utc: bool = False) -> Tuple[Optional[tuple], Optional[str]]:
+    """Bucket-aligned (since, until) as naive local (or UTC) datetimes, or an error
+
+    ``until`` is exclusive and defaults to the end of the current bucket.
+    """
+    step = INTERVALS[interval]
+    bounds = []
+    for value in (since, until):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc if utc else None).replace(tzinfo=None)
+        bounds.append(value)
+    since, until = bounds
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None) if utc else datetime.now()
+    until = bucket_floor(until, interval) if until is not None else bucket_floor(now, interval) + step
+    if until != bounds[1] and bounds[1] is not None:
+        # A partial bucket at the end is included whole
+        until += step
+    since = bucket_floor(since, interval) if since is not None else until - step * default_points
+
+    points = (until - since) // step
+    if points <= 0:
+        return None, 'since must be before until'
+    if points > max_points:
+        return None, f"Range exceeds {max_points} {interval} buckets"
+    return (since, until), None
+
+
+def dense(rows: Sequence[tuple], since: datetime, until: datetime, interval: str, names: Sequence[str]) -> dict:
+    """Zero-filled series from (bucket, value per name) rows, aligned to one bucket list"""
+    step = INTERVALS[interval]
+    buckets = []
+    index = {}
+    current = since
+    while current < until:
+        key = current.date() if interval == 'day' else current
+        index[key] = len(buckets)
+        buckets.append(key.isoformat())
+        current += step
+
+    series = {name: [0] * len(buckets) for name in names}
+    for bucket, *values in rows:
+        if isinstance(bucket, datetime) and interval == 'day':
+            bucket = bucket.date()
+        i = index.get(bucket)
+        if i is None:
+            continue
+        for name, value in zip(names, values):
+            series[name][i] += int(value or 0)
+    return {'buckets': buckets, 'series': series}
+
+
+def detection_rows(db_manager, interval: str, since: datetime, until: datetime, group_by: Optional[str],
+                   filters: Dict[str, Optional[str]]) -> Tuple[List[tuple], List[str]]:
+    """(bucket, count per group) rows and the group names from the Supabase detection rollups
+
+    Database errors are logged and re-raised.
+    """
+    table = 'threat_detection_rollups_hourly' if interval == 'hour' else 'threat_detection_rollups_daily'
+    clauses, params = ['bucket >= %s', 'bucket < %s'], [since, until]
+    for name in DETECTION_GROUPS:
+        if filters.get(name):
+            clauses.append(f"{name}::text = %s")
+            params.append(filters[name])
+    group = f"{group_by}::text" if group_by else "'total'"
+
+    try:
+        with db_manager.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT bucket, {group}, SUM(detections)::BIGINT FROM {table}
+                WHERE {' AND '.join(clauses)}
+                GROUP BY 1, 2 ORDER BY 1
+            """, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            conn.rollback()
+
+    except psycopg2.Error as e:
+        print(f"Detection timeseries query error: {e}")
+        count_error('database', e)
+        raise
+
+    names = sorted({row[1] for row in rows})
+    column = {name: i for i, name in enumerate(names)}
+    pivoted: Dict[object, list] = {}
+    for bucket, name, count in rows:
+        values = pivoted.setdefault(bucket, [0] * len(names))
+        values[column[name]] += count
+    return [(bucket, *values) for bucket, values in pivoted.items()], names
+
+
+class RollupCompactor:
+    """Periodically folds verification_rollup_deltas into the hourly and daily rollups
+
+    Every worker may run one; an advisory lock inside
+    ``compact_verification_rollups()`` lets only one compact at a time.
+    """
+
+    def __init__(self, db_manager, interval: float = 10.0, max_rows: int = 100000):
+        self.db_manager = db_manager
+        self.interval = interval
+        self.max_rows = max_rows
+        self.last_folded = 0
+        self.last_run = None
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def compact(self) -> int:
+        """Fold deltas until none are left; returns how many rows were folded"""
+        total = 0
+        while True:
+            folded = self.db_manager.compact_verification_rollups(self.max_rows)
+            if folded is None or folded < 0:
+                break
+            total += folded
+            if folded < self.max_rows:
+                break
+        ROLLUP_DELTAS_FOLDED.inc(amount=total)
+        self.last_folded = total
+        self.last_run = datetime.now()
+        return total
+
+    def start(self):
+        if not self.interval:
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='rollup-compactor', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Rollup compaction error: {e}")
+                count_error('timeseries', e)
@@ -0,0 +1,231 @@
+"""
+Bounded LRU/TTL cache for verify_vip_user lookups, with LISTEN/NOTIFY invalidation
+"""
+import hashlib
+import json
+import os
+import select
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Tuple
+
+import psycopg2
+import psycopg2.extensions
+
+from .metrics import count_error
+
+# Returned by get() when the key is not cached (None is a cached negative result)
+MISS = object()
+
+
+class VIPUserCache:
+    """LRU cache of ``verify_vip_user`` results with positive and negative TTLs
+
+    Keys are the normalized email and a SHA-256 digest of the access code.
+    Cached users are stored with ``access_code`` blanked, so plaintext codes
+    never sit in memory; a hit fills in the code the caller already proved
+    it knows. Entries are dropped by email or user id when the roster
+    changes, and everything is cleared when invalidations may have been
+    missed.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, VIPUser or None), least recently used first
+        self._entries = OrderedDict()
+        # email -> keys cached for it; user id -> email
+        self._by_email = {}
+        self._emails_by_id = {}
+        # Bumped by every invalidation so lookups racing one are not cached
+        self._generation = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(email: str, access_code: str) -> Tuple[str, str]:
+        return email.lower().strip(), hashlib.sha256(access_code.strip().encode()).hexdigest()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, email: str, access_code: str):
+        """Return the cached VIPUser, None for a cached negative result, or MISS"""
+        key = self.key(email, access_code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self._hits += 1
+            user = entry[1]
+
+        return replace(user, access_code=access_code.strip()) if user is not None else None
+
+    def put(self, email: str, access_code: str, user, generation: int = None):
+        """Cache a lookup result; ``None`` records that no active VIP matched
+
+        Pass the ``generation`` read before querying; the result is dropped
+        if an invalidation happened in between.
+        """
+        key = self.key(email, access_code)
+        ttl = self.ttl if user is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        stored = replace(user, access_code='') if user is not None else None
+
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, stored)
+            self._by_email.setdefault(key[0], set()).add(key)
+            if stored is not None and stored.id is not None:
+                self._emails_by_id[stored.id] = key[0]
+
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate_email(self, email: str):
+        with self._lock:
+            self._invalidate_email(email.lower().strip())
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            email = self._emails_by_id.get(user_id)
+            if email is not None:
+                self._invalidate_email(email)
+            else:
+                self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_email.clear()
+            self._emails_by_id.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'invalidations': self._invalidations,
+                'evictions': self._evictions
+            }
+
+    def _invalidate_email(self, email: str):
+        """Drop every entry for ``email``; caller holds the lock"""
+        self._generation += 1
+        for key in list(self._by_email.get(email, ())):
+            self._remove(key)
+            self._invalidations += 1
+
+    def _remove(self, key: tuple):
+        """Drop one entry and its index references; caller holds the lock"""
+        _, user = self._entries.pop(key)
+        keys = self._by_email.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_email[key[0]]
+        if user is not None and self._emails_by_id.get(user.id) == key[0]:
+            del self._emails_by_id[user.id]
+
+
+class VIPUserCacheListener:
+    """Applies vip_users change notifications from other processes to a VIPUserCache
+
+    Listens on ``channel`` (see scripts/06_vip_user_notifications.sql) over a
+    dedicated autocommit connection. Payloads are ``{"id": ..., "email": ...}``
+    or ``*`` for a full flush. Whenever the connection is (re)established the
+    cache is cleared, since notifications sent while disconnected are lost.
+    """
+
+    def __init__(self, cache: VIPUserCache, connect, channel: str = 'vip_users_changed',
+                 retry_interval: float = 5.0):
+        self.cache = cache
+        self.connect = connect
+        self.channel = channel
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='vip-user-cache-listener', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def handle(self, payload: str):
+        """Apply one notification payload"""
+        if payload == '*':
+            self.cache.clear()
+            return
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            self.cache.clear()
+            return
+        if change.get('email'):
+            self.cache.invalidate_email(change['email'])
+        if change.get('old_email'):
+            self.cache.invalidate_email(change['old_email'])
+        if change.get('id') is not None:
+            self.cache.invalidate_user(change['id'])
+
+    def _run(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = self.connect()
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conn.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+                cursor.close()
+                self.cache.clear()
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.handle(conn.notifies.pop(0).payload)
+
+            except (psycopg2.Error, OSError) as e:
+                print(f"VIP user cache listener error: {e}")
+                count_error('database', e)
+                self.cache.clear()
+                self._stop.wait(self.retry_interval)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
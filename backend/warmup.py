@@ -0,0 +1,128 @@
+"""
+Background warm-up and readiness for GuardIQ workers
+"""
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .metrics import registry
+
+WARMUP_SECONDS = registry.histogram(
+    'guardiq_warmup_seconds', 'Time from worker start until each warm-up check passed', ('check',),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+
+
+class WarmupCheck:
+    """One named step; ``run`` returns True once it has succeeded"""
+    __slots__ = ('name', 'run', 'required', 'ok', 'attempts', 'error', 'seconds')
+
+    def __init__(self, name: str, run: Callable[[], bool], required: bool):
+        self.name = name
+        self.run = run
+        self.required = required
+        self.reset()
+
+    def reset(self):
+        self.ok = False
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+
+
+class Warmup:
+    """Runs warm-up checks in a background thread until each one passes
+
+    Failed checks are retried with exponential backoff from
+    ``retry_interval`` up to ``max_retry_interval`` seconds, so a worker
+    started while Postgres is unreachable keeps serving and becomes ready
+    once it is back. Checks run in the order they were added, and a
+    failing required check holds back the ones after it. The worker is
+    ready when every required check has passed; optional ones only prime
+    caches.
+    """
+
+    def __init__(self, retry_interval: float = 1.0, max_retry_interval: float = 30.0):
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self._checks: List[WarmupCheck] = []
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._started_at = None
+        self._stop = threading.Event()
+
+    def add(self, name: str, run: Callable[[], bool], required: bool = True):
+        self._checks.append(WarmupCheck(name, run, required))
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # Results inherited from the parent describe the parent's connections
+            for check in self._checks:
+                check.reset()
+            self._pid = os.getpid()
+            self._started_at = time.monotonic()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._thread is not None and self._pid == os.getpid() \
+            and all(check.ok for check in self._checks if check.required)
+
+    def status(self) -> dict:
+        """Readiness with a per-check breakdown"""
+        return {
+            'ready': self.ready,
+            'uptime_seconds': round(time.monotonic() - self._started_at, 3) if self._started_at else None,
+            'checks': {
+                check.name: {
+                    'ok': check.ok,
+                    'required': check.required,
+                    'attempts': check.attempts,
+                    'seconds': check.seconds,
+                    'error': check.error
+                }
+                for check in self._checks
+            }
+        }
+
+    def _attempt(self, check: WarmupCheck):
+        check.attempts += 1
+        try:
+            ok = bool(check.run())
+            error = None if ok else 'unavailable'
+        except Exception as e:
+            ok, error = False, str(e) or type(e).__name__
+        if ok:
+            check.seconds = round(time.monotonic() - self._started_at, 3)
+            check.error = None
+            check.ok = True
+            WARMUP_SECONDS.observe(check.seconds, check.name)
+            print(f"Warm-up: {check.name} ready after {check.seconds}s")
+        elif error != check.error:
+            check.error = error
+            print(f"Warm-up: {check.name} not ready ({error}), retrying")
+
+    def _run(self):
+        delay = self.retry_interval
+        while not self._stop.is_set():
+            pending = [check for check in self._checks if not check.ok]
+            if not pending:
+                return
+            for check in pending:
+                self._attempt(check)
+                if check.required and not check.ok:
+                    break
+            if all(check.ok for check in pending):
+                return
+            self._stop.wait(delay)
+            delay = min(delay * 2, self.max_retry_interval)
@@ -0,0 +1,10 @@
+"""
+WSGI entry point for GuardIQ under a production server
+
+    gunicorn -c python:backend.gunicorn_conf backend.wsgi:application
+"""
+import os
+from .app import create_app
+
+# Background services and DB pools are started per worker in post_fork
+application = create_app(os.getenv('FLASK_ENV', 'production'), start_services=False)
@@ -0,0 +1,33 @@
+-- Verification rules for the GuardIQ rule engine
+-- Loaded when VERIFICATION_RULES_SOURCE=database
+
+CREATE TABLE IF NOT EXISTS verification_platforms (
+    platform VARCHAR(50) PRIMARY KEY,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- platform = '*' applies to every platform; platform-specific rows override it
+CREATE TABLE IF NOT EXISTS verification_rules (
+    id SERIAL PRIMARY KEY,
+    role VARCHAR(50) NOT NULL,
+    platform VARCHAR(50) NOT NULL DEFAULT '*',
+    min_followers INTEGER NOT NULL CHECK (min_followers >= 0),
+    is_active BOOLEAN DEFAULT TRUE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (role, platform)
+);
+
+INSERT INTO verification_platforms (platform) VALUES
+('twitter'), ('instagram'), ('youtube'), ('tiktok'), ('linkedin'), ('facebook'), ('twitch')
+ON CONFLICT (platform) DO NOTHING;
+
+INSERT INTO verification_rules (role, platform, min_followers) VALUES
+('celebrity', '*', 100000),
+('influencer', '*', 50000),
+('vip', '*', 25000),
+('executive', '*', 10000),
+('content-creator', '*', 75000),
+('public-figure', '*', 30000)
+ON CONFLICT (role, platform) DO NOTHING;
+
+COMMENT ON TABLE verification_rules IS 'Follower thresholds per role and platform for VIP verification';
@@ -0,0 +1,126 @@
+-- Partition maintenance for verification_logs
+-- verification_logs is range-partitioned by created_at into monthly
+-- partitions named verification_logs_pYYYYMM (see setup_database.py)
+
+-- Rows outside every monthly partition (e.g. after the backend's partition
+-- job stopped running) land here instead of failing the insert
+CREATE TABLE IF NOT EXISTS verification_logs_default PARTITION OF verification_logs DEFAULT;
+
+-- Create monthly partitions from start_month up to months_ahead months from now.
+-- Rows for a new month already in verification_logs_default are moved into
+-- its partition. Called from setup, verification_log_retention.py and on a
+-- schedule by the backend (PARTITION_MAINTENANCE_INTERVAL).
+CREATE OR REPLACE FUNCTION create_verification_log_partitions(
+    months_ahead INTEGER DEFAULT 3,
+    start_month DATE DEFAULT CURRENT_DATE
+)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE := date_trunc('month', start_month)::DATE;
+    month_end DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::DATE;
+    partition_name TEXT;
+    created_count INTEGER := 0;
+BEGIN
+    -- Every worker runs this; one at a time
+    PERFORM pg_advisory_xact_lock(hashtext('create_verification_log_partitions'));
+
+    WHILE month_start <= last_month LOOP
+        partition_name := 'verification_logs_p' || to_char(month_start, 'YYYYMM');
+        month_end := (month_start + INTERVAL '1 month')::DATE;
+
+        IF to_regclass(partition_name) IS NULL THEN
+            IF to_regclass('verification_logs_default') IS NOT NULL AND EXISTS (
+                SELECT 1 FROM verification_logs_default
+                WHERE created_at >= month_start AND created_at < month_end
+            ) THEN
+                -- A partition overlapping rows in the default partition cannot
+                -- be created directly: build it, move the rows, then attach it
+                EXECUTE format(
+                    'CREATE TABLE %I (LIKE verification_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                    partition_name
+                );
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM verification_logs_default
+                                    WHERE created_at >= %L AND created_at < %L RETURNING *)
+                     INSERT INTO %I SELECT * FROM moved',
+                    month_start, month_end, partition_name
+                );
+                EXECUTE format(
+                    'ALTER TABLE verification_logs ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF verification_logs FOR VALUES FROM (%L) TO (%L)',
+                    partition_name, month_start, month_end
+                );
+            END IF;
+            created_count := created_count + 1;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+
+    RETURN created_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Detach partitions that end before the retention cutoff. Detached partitions
+-- are moved into archive_schema when given, otherwise dropped.
+CREATE OR REPLACE FUNCTION detach_old_verification_log_partitions(
+    months_to_keep INTEGER DEFAULT 3,
+    archive_schema TEXT DEFAULT NULL
+)
+RETURNS INTEGER AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => months_to_keep))::DATE;
+    part RECORD;
+    detached_count INTEGER := 0;
+BEGIN
+    IF archive_schema IS NOT NULL THEN
+        EXECUTE format('CREATE SCHEMA IF NOT EXISTS %I', archive_schema);
+    END IF;
+
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'verification_logs'::regclass
+        AND c.relname ~ '^verification_logs_p[0-9]{6}$'
+        AND to_date(substring(c.relname FROM '[0-9]{6}$'), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        EXECUTE format('ALTER TABLE verification_logs DETACH PARTITION %I', part.relname);
+
+        IF archive_schema IS NOT NULL THEN
+            EXECUTE format('ALTER TABLE %I SET SCHEMA %I', part.relname, archive_schema);
+        ELSE
+            EXECUTE format('DROP TABLE %I', part.relname);
+        END IF;
+
+        detached_count := detached_count + 1;
+    END LOOP;
+
+    RETURN detached_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Retention without bulk DELETEs on verification_logs: whole months are
+-- detached, so the cutoff is rounded to a month boundary. Returns the number
+-- of verification_logs partitions removed.
+CREATE OR REPLACE FUNCTION cleanup_old_logs(days_to_keep INTEGER DEFAULT 90)
+RETURNS INTEGER AS $$
+DECLARE
+    detached_count INTEGER;
+BEGIN
+    detached_count := detach_old_verification_log_partitions(CEIL(days_to_keep / 30.0)::INTEGER);
+
+    -- Delete old security events (keep critical events longer)
+    DELETE FROM security_events
+    WHERE created_at < NOW() - INTERVAL '1 day' * days_to_keep
+    AND severity NOT IN ('high', 'critical');
+
+    RETURN detached_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,39 @@
+-- Cross-process invalidation for the API's verify_vip_user cache
+-- Every change to vip_users is announced on the vip_users_changed channel;
+-- API workers LISTEN and drop the affected entries (see backend/user_cache.py)
+
+CREATE OR REPLACE FUNCTION notify_vip_users_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM pg_notify('vip_users_changed', '*');
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('vip_users_changed', json_build_object('id', OLD.id, 'email', OLD.email)::text);
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM pg_notify('vip_users_changed', json_build_object(
+            'id', NEW.id,
+            'email', NEW.email,
+            'old_email', CASE WHEN OLD.email IS DISTINCT FROM NEW.email THEN OLD.email END
+        )::text);
+    ELSE
+        PERFORM pg_notify('vip_users_changed', json_build_object('id', NEW.id, 'email', NEW.email)::text);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_notify_vip_users_changed ON vip_users;
+CREATE TRIGGER trigger_notify_vip_users_changed
+    AFTER INSERT OR UPDATE OR DELETE ON vip_users
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_vip_users_changed();
+
+DROP TRIGGER IF EXISTS trigger_notify_vip_users_truncated ON vip_users;
+CREATE TRIGGER trigger_notify_vip_users_truncated
+    AFTER TRUNCATE ON vip_users
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_vip_users_changed();
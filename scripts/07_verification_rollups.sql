@@ -0,0 +1,136 @@
+-- Hourly and daily verification counts for dashboard time series
+--
+-- Inserts into verification_logs append one pre-aggregated row per hour
+-- touched to verification_rollup_deltas (a statement-level trigger, so a
+-- batch insert or COPY adds a handful of rows, and writers never contend
+-- on a shared counter row). compact_verification_rollups() periodically
+-- folds the deltas into the rollup tables. Rows that arrive late carry
+-- their own hour, so they land in the right bucket whenever they are
+-- written. Readers add any not-yet-compacted deltas to the rollups.
+
+CREATE TABLE IF NOT EXISTS verification_rollups_hourly (
+    bucket TIMESTAMP PRIMARY KEY,
+    success BIGINT NOT NULL DEFAULT 0,
+    failed BIGINT NOT NULL DEFAULT 0,
+    blocked BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS verification_rollups_daily (
+    bucket DATE PRIMARY KEY,
+    success BIGINT NOT NULL DEFAULT 0,
+    failed BIGINT NOT NULL DEFAULT 0,
+    blocked BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS verification_rollup_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    bucket TIMESTAMP NOT NULL,
+    success BIGINT NOT NULL,
+    failed BIGINT NOT NULL,
+    blocked BIGINT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_verification_rollup_deltas_bucket
+ON verification_rollup_deltas (bucket);
+
+CREATE OR REPLACE FUNCTION record_verification_rollup_deltas()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO verification_rollup_deltas (bucket, success, failed, blocked)
+    SELECT date_trunc('hour', created_at),
+           COUNT(*) FILTER (WHERE verification_status = 'success'),
+           COUNT(*) FILTER (WHERE verification_status = 'failed'),
+           COUNT(*) FILTER (WHERE verification_status = 'blocked')
+    FROM new_logs
+    GROUP BY 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_verification_rollup_deltas ON verification_logs;
+CREATE TRIGGER trigger_verification_rollup_deltas
+    AFTER INSERT ON verification_logs
+    REFERENCING NEW TABLE AS new_logs
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION record_verification_rollup_deltas();
+
+-- Fold pending deltas into the hourly and daily rollups. Returns the number
+-- of delta rows folded, or -1 if another session is already compacting.
+CREATE OR REPLACE FUNCTION compact_verification_rollups(max_rows INTEGER DEFAULT 100000)
+RETURNS INTEGER AS $$
+DECLARE
+    folded INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('compact_verification_rollups')) THEN
+        RETURN -1;
+    END IF;
+
+    -- One statement, so deleting the deltas and adding them to the rollups commit together
+    WITH taken AS (
+        DELETE FROM verification_rollup_deltas
+        WHERE id IN (SELECT id FROM verification_rollup_deltas ORDER BY id LIMIT max_rows)
+        RETURNING bucket, success, failed, blocked
+    ),
+    batch AS (
+        SELECT bucket, SUM(success) AS success, SUM(failed) AS failed, SUM(blocked) AS blocked
+        FROM taken GROUP BY bucket
+    ),
+    hourly AS (
+        INSERT INTO verification_rollups_hourly AS r (bucket, success, failed, blocked)
+        SELECT bucket, success, failed, blocked FROM batch ORDER BY bucket
+        ON CONFLICT (bucket) DO UPDATE
+        SET success = r.success + EXCLUDED.success,
+            failed = r.failed + EXCLUDED.failed,
+            blocked = r.blocked + EXCLUDED.blocked
+        RETURNING 1
+    ),
+    daily AS (
+        INSERT INTO verification_rollups_daily AS r (bucket, success, failed, blocked)
+        SELECT bucket::DATE, SUM(success), SUM(failed), SUM(blocked)
+        FROM batch GROUP BY 1 ORDER BY 1
+        ON CONFLICT (bucket) DO UPDATE
+        SET success = r.success + EXCLUDED.success,
+            failed = r.failed + EXCLUDED.failed,
+            blocked = r.blocked + EXCLUDED.blocked
+        RETURNING 1
+    )
+    SELECT COUNT(*) INTO folded FROM taken;
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute rollups from verification_logs from since_hour onwards, e.g. after
+-- first installing this script or restoring logs. Briefly blocks log inserts.
+CREATE OR REPLACE FUNCTION rebuild_verification_rollups(since_hour TIMESTAMP DEFAULT '-infinity')
+RETURNS INTEGER AS $$
+DECLARE
+    hours INTEGER;
+BEGIN
+    LOCK TABLE verification_rollup_deltas IN EXCLUSIVE MODE;
+    since_hour := date_trunc('hour', since_hour);
+
+    DELETE FROM verification_rollup_deltas WHERE bucket >= since_hour;
+    DELETE FROM verification_rollups_hourly WHERE bucket >= since_hour;
+
+    INSERT INTO verification_rollups_hourly (bucket, success, failed, blocked)
+    SELECT date_trunc('hour', created_at),
+           COUNT(*) FILTER (WHERE verification_status = 'success'),
+           COUNT(*) FILTER (WHERE verification_status = 'failed'),
+           COUNT(*) FILTER (WHERE verification_status = 'blocked')
+    FROM verification_logs
+    WHERE created_at >= since_hour
+    GROUP BY 1;
+    GET DIAGNOSTICS hours = ROW_COUNT;
+
+    -- Days are rebuilt whole from the hourly rows, including the day since_hour falls in
+    DELETE FROM verification_rollups_daily WHERE bucket >= since_hour::DATE;
+    INSERT INTO verification_rollups_daily (bucket, success, failed, blocked)
+    SELECT bucket::DATE, SUM(success), SUM(failed), SUM(blocked)
+    FROM verification_rollups_hourly
+    WHERE bucket >= since_hour::DATE
+    GROUP BY 1;
+
+    RETURN hours;
+END;
+$$ LANGUAGE plpgsql;
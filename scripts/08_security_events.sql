@@ -0,0 +1,32 @@
+-- Security events written by the backend's SecurityEventWriter
+--
+-- The API reads them newest first (id DESC), filtered by severity, event
+-- type or email, so each filter has an (x, id) index for keyset paging.
+-- get_vip_statistics() counts recent high/critical events through
+-- idx_security_events_severity_time.
+
+CREATE TABLE IF NOT EXISTS security_events (
+    id SERIAL PRIMARY KEY,
+    event_type VARCHAR(50) NOT NULL,
+    user_id INTEGER REFERENCES vip_users(id) ON DELETE CASCADE,
+    email VARCHAR(255),
+    description TEXT,
+    severity VARCHAR(20) DEFAULT 'low' CHECK (severity IN ('low', 'medium', 'high', 'critical')),
+    ip_address VARCHAR(45),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_security_events_severity_time
+ON security_events (severity, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_security_events_severity_id
+ON security_events (severity, id);
+
+CREATE INDEX IF NOT EXISTS idx_security_events_type_id
+ON security_events (event_type, id);
+
+CREATE INDEX IF NOT EXISTS idx_security_events_email_id
+ON security_events (email, id);
+
+CREATE INDEX IF NOT EXISTS idx_security_events_created_at
+ON security_events (created_at);
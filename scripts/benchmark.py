@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Load-test and benchmark harness for the GuardIQ API
+
+Drives /api/verify-vip, /api/vip-stats, /api/security-status and
+/api/user-activity/<email> at a configurable concurrency and request mix,
+then reports throughput, p50/p95/p99 latency and database round-trips per
+request. Results can be stored as a baseline and later runs fail when they
+regress beyond a tolerance.
+
+Only 2xx responses count as successful; the 4xx rate and rate-limited
+requests are reported separately. All load comes from one client IP, so start the server with
+RATE_LIMIT_ENABLED=false, otherwise the run mostly measures rejections.
+
+Examples:
+    # Create the schema and 1M synthetic verification_logs rows
+    python scripts/benchmark.py --prepare-db --seed-logs 1000000
+
+    # Run against a server started separately and compare with the baseline
+    python scripts/benchmark.py --url http://localhost:5000 --duration 30 --concurrency 32
+
+    # Record a new baseline
+    python scripts/benchmark.py --update-baseline
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import psycopg2
+
+from setup_database import DATABASE_CONFIG, create_database, run_sql_file, setup_tables
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(SCRIPTS_DIR, 'benchmark_baseline.json')
+DEFAULT_MIX = 'verify=70,stats=10,security=10,activity=10'
+
+ROLES = ['influencer', 'celebrity', 'vip', 'executive', 'content-creator', 'public-figure']
+PLATFORMS = ['twitter', 'instagram', 'youtube', 'tiktok', 'linkedin', 'facebook', 'twitch']
+
+
+def prepare_database(seed_logs: int, emails: int):
+    """Create the schema and functions, then seed synthetic verification logs"""
+    if not create_database() or not setup_tables():
+        sys.exit(1)
+
+    conn = psycopg2.connect(**DATABASE_CONFIG)
+    cursor = conn.cursor()
+    # 03 replaces the partition-aware cleanup_old_logs, so 05 is applied again after it
+    for script in ('01_create_tables.sql', '03_functions_and_triggers.sql', '05_partition_verification_logs.sql'):
+        print(f"Applying {script}...")
+        run_sql_file(cursor, os.path.join(SCRIPTS_DIR, script))
+    conn.commit()
+
+    if seed_logs:
+        print(f"Seeding {seed_logs:,} synthetic verification logs...")
+        started = time.perf_counter()
+        # Synthetic rows span the last 30 days, so previous months need partitions
+        cursor.execute("SELECT create_verification_log_partitions(3, (CURRENT_DATE - 31))")
+        # Bulk seeding must not fire the per-row security event trigger
+        cursor.execute("ALTER TABLE verification_logs DISABLE TRIGGER USER")
+        cursor.execute("""
+            INSERT INTO verification_logs
+            (email, access_code, verification_status, ip_address, user_agent, created_at)
+            SELECT
+                'bench' || (g %% %s) || '@example.com',
+                'vip:twitter:' || (random() * 200000)::int,
+                (ARRAY['success', 'failed', 'failed', 'blocked'])[1 + (g %% 4)],
+                '10.' || (g %% 250) || '.' || (g / 250 %% 250) || '.1',
+                'guardiq-benchmark',
+                NOW() - (random() * INTERVAL '30 days')
+            FROM generate_series(1, %s) AS g
+        """, (emails, seed_logs))
+        cursor.execute("ALTER TABLE verification_logs ENABLE TRIGGER USER")
+        # The disabled triggers include the rollup deltas, so recount the seeded range
+        cursor.execute("SELECT to_regproc('rebuild_verification_rollups') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT rebuild_verification_rollups(NOW()::TIMESTAMP - INTERVAL '31 days')")
+        cursor.execute("ANALYZE verification_logs")
+        conn.commit()
+        print(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    cursor.close()
+    conn.close()
+
+
+def parse_mix(mix: str) -> list:
+    """Turn 'verify=70,stats=30' into a cumulative weight table"""
+    table = []
+    total = 0
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        total += int(weight)
+        table.append((total, name.strip()))
+    return table
+
+
+def build_request(kind: str, emails: int) -> tuple:
+    """Return (endpoint label, method, path, body) for a request kind"""
+    email = f"bench{random.randrange(emails)}@example.com"
+    if kind == 'verify':
+        body = json.dumps({
+            'fullName': 'Bench User',
+            'email': email,
+            'role': random.choice(ROLES),
+            'platform': random.choice(PLATFORMS),
+            'followers': random.randrange(0, 200000)
+        })
+        return 'POST /api/verify-vip', 'POST', '/api/verify-vip', body
+    if kind == 'stats':
+        return 'GET /api/vip-stats', 'GET', '/api/vip-stats', None
+    if kind == 'security':
+        return 'GET /api/security-status', 'GET', '/api/security-status', None
+    if kind == 'activity':
+        return 'GET /api/user-activity/<email>', 'GET', f'/api/user-activity/{email}', None
+    raise ValueError(f"Unknown request kind '{kind}'")
+
+
+def new_stats() -> dict:
+    return {'latencies': [], 'errors': 0, 'client_errors': 0, 'rate_limited': 0}
+
+
+def worker(url: str, mix: list, emails: int, deadline: float, results: dict, lock: threading.Lock):
+    """Issue requests over one keep-alive connection until the deadline"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    local = {}
+    total_weight = mix[-1][0]
+
+    while time.monotonic() < deadline:
+        roll = random.randrange(total_weight)
+        kind = next(name for bound, name in mix if roll < bound)
+        label, method, path, body = build_request(kind, emails)
+        headers = {'Content-Type': 'application/json'} if body else {}
+
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+            # Blocked verifications are 429 too; only the limiter sends Retry-After
+            throttled = status == 429 and response.getheader('Retry-After') is not None
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            status = throttled = None
+        elapsed = time.perf_counter() - started
+
+        stats = local.setdefault(label, new_stats())
+        stats['latencies'].append(elapsed)
+        if status is None or not 200 <= status < 300:
+            stats['errors'] += 1
+        if status is not None and 400 <= status < 500:
+            stats['client_errors'] += 1
+            if throttled:
+                stats['rate_limited'] += 1
+
+    conn.close()
+    with lock:
+        for label, stats in local.items():
+            merged = results.setdefault(label, new_stats())
+            merged['latencies'].extend(stats['latencies'])
+            for key in ('errors', 'client_errors', 'rate_limited'):
+                merged[key] += stats[key]
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def db_transactions() -> int:
+    """Committed plus rolled back transactions on the benchmark database"""
+    try:
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_stat_clear_snapshot()")
+        cursor.execute(
+            "SELECT xact_commit + xact_rollback FROM pg_stat_database WHERE datname = %s",
+            (DATABASE_CONFIG['database'],)
+        )
+        value = cursor.fetchone()[0]
+        cursor.close()
+        conn.close()
+        return value
+    except psycopg2.Error as e:
+        print(f"Could not read pg_stat_database: {e}")
+        return None
+
+
+def summarize(results: dict, duration: float, round_trips) -> dict:
+    report = {'endpoints': {}}
+    total = 0
+    errors = 0
+    client_errors = 0
+    rate_limited = 0
+    all_latencies = []
+    for label, stats in sorted(results.items()):
+        latencies = sorted(stats['latencies'])
+        total += len(latencies)
+        errors += stats['errors']
+        client_errors += stats['client_errors']
+        rate_limited += stats['rate_limited']
+        all_latencies.extend(latencies)
+        report['endpoints'][label] = {
+            'requests': len(latencies),
+            'errors': stats['errors'],
+            'client_error_rate': round(stats['client_errors'] / len(latencies), 4) if latencies else 0.0,
+            'rate_limited': stats['rate_limited'],
+            'throughput': round(len(latencies) / duration, 1),
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        }
+
+    all_latencies.sort()
+    report['overall'] = {
+        'requests': total,
+        'errors': errors,
+        'client_error_rate': round(client_errors / total, 4) if total else 0.0,
+        'rate_limited': rate_limited,
+        'throughput': round(total / duration, 1),
+        'p50_ms': round(percentile(all_latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(all_latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(all_latencies, 99) * 1000, 2),
+        # Each pooled checkout is one transaction, so this approximates DB round-trips
+        'db_round_trips_per_request': round(round_trips / total, 2) if round_trips is not None and total else None,
+    }
+    return report
+
+
+def print_report(report: dict):
+    header = (f"{'endpoint':<34}{'reqs':>8}{'err':>6}{'4xx%':>7}{'limited':>9}"
+              f"{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    print(header)
+    print('-' * len(header))
+    rows = list(report['endpoints'].items()) + [('overall', report['overall'])]
+    for label, row in rows:
+        print(f"{label:<34}{row['requests']:>8}{row['errors']:>6}{row['client_error_rate'] * 100:>7.1f}"
+              f"{row['rate_limited']:>9}{row['throughput']:>9}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}")
+    print(f"\nDB round-trips per request: {report['overall']['db_round_trips_per_request']}")
+    if report['overall']['rate_limited']:
+        print("⚠ Requests were rate limited; restart the server with RATE_LIMIT_ENABLED=false")
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float) -> list:
+    """Compare throughput and tail latency against a stored baseline"""
+    problems = []
+    # Non-2xx responses are cheap, so a run that is mostly rejections must not pass
+    overall, base_overall = report['overall'], baseline.get('overall', {})
+    error_rate = overall['errors'] / overall['requests'] if overall['requests'] else 0.0
+    base_error_rate = base_overall['errors'] / base_overall['requests'] if base_overall.get('requests') else 0.0
+    if error_rate > base_error_rate + 0.01:
+        problems.append(f"overall: non-2xx rate {error_rate:.1%} > baseline {base_error_rate:.1%} "
+                        f"({overall['rate_limited']} rate limited)")
+    for label, base in list(baseline.get('endpoints', {}).items()) + [('overall', baseline.get('overall', {}))]:
+        current = report['overall'] if label == 'overall' else report['endpoints'].get(label)
+        if not current or not base:
+            continue
+        if base.get('throughput') and current['throughput'] < base['throughput'] * (1 - tolerance):
+            problems.append(f"{label}: throughput {current['throughput']} < baseline {base['throughput']}")
+        for key in ('p95_ms', 'p99_ms'):
+            if base.get(key) and current[key] > base[key] * (1 + tolerance):
+                problems.append(f"{label}: {key} {current[key]} > baseline {base[key]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GuardIQ API benchmark')
+    parser.add_argument('--url', default=os.getenv('BENCH_URL', 'http://localhost:5000'))
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent client connections')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'request mix weights (default: {DEFAULT_MIX})')
+    parser.add_argument('--emails', type=int, default=10000, help='distinct synthetic emails')
+    parser.add_argument('--prepare-db', action='store_true', help='create schema and functions before running')
+    parser.add_argument('--seed-logs', type=int, default=0, help='synthetic verification_logs rows to insert')
+    parser.add_argument('--prepare-only', action='store_true', help='stop after preparing the database')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed regression fraction')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    if args.prepare_db or args.seed_logs:
+        prepare_database(args.seed_logs, args.emails)
+        if args.prepare_only:
+            return
+
+    mix = parse_mix(args.mix)
+    print(f"Benchmarking {args.url} for {args.duration}s at concurrency {args.concurrency} ({args.mix})")
+
+    results = {}
+    lock = threading.Lock()
+    transactions_before = db_transactions()
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=worker, args=(args.url, mix, args.emails, deadline, results, lock))
+        for _ in range(args.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    # pg_stat_database is updated asynchronously by the backends
+    time.sleep(1)
+    transactions_after = db_transactions()
+    round_trips = None
+    if transactions_before is not None and transactions_after is not None:
+        # Discount the two probe connections' own transactions
+        round_trips = max(transactions_after - transactions_before - 2, 0)
+
+    report = summarize(results, elapsed, round_trips)
+    report['config'] = {'duration': args.duration, 'concurrency': args.concurrency, 'mix': args.mix}
+    print()
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        if report['overall']['rate_limited']:
+            print("\n✗ Not recording a baseline from a rate-limited run")
+            sys.exit(1)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        problems = find_regressions(report, baseline, args.tolerance)
+        if problems:
+            print("\nRegressions against baseline:")
+            for problem in problems:
+                print(f"  ✗ {problem}")
+            sys.exit(1)
+        print("\n✓ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
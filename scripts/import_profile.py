@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Import-time profile for GuardIQ cold start
+
+Imports a module in fresh interpreters with ``python -X importtime`` and
+reports the total import time, the slowest modules and the packages they
+belong to. With --budget-ms it exits non-zero when the median total is over
+budget, so CI can hold cold start to it:
+
+    python scripts/import_profile.py --budget-ms 400
+    python scripts/import_profile.py --module backend.api_routes --top 30
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by gunicorn in every worker (preload off) or in the master (preload on)
+DEFAULT_MODULE = 'backend.wsgi'
+
+
+def parse_importtime(output: str) -> list:
+    """``(module, self_us, cumulative_us, depth)`` rows from ``-X importtime`` stderr"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    return rows
+
+
+def profile_once(module: str) -> list:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv('PYTHONPATH')])))
+    # backend.wsgi builds the app for FLASK_ENV, as it does under gunicorn
+    env.setdefault('FLASK_ENV', 'production')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"import {module} failed:\n" + '\n'.join(errors[-20:]))
+    return parse_importtime(result.stderr)
+
+
+def summarize(rows: list, top: int) -> dict:
+    """Totals, slowest modules (cumulative and self) and self time per top-level package"""
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    by_cumulative = sorted(rows, key=lambda row: row[2], reverse=True)
+    by_self = sorted(rows, key=lambda row: row[1], reverse=True)
+    return {
+        'total_ms': sum(row[2] for row in rows if row[3] == 0) / 1000,
+        'modules': len(rows),
+        'cumulative': [{'module': name, 'ms': cumulative / 1000} for name, _, cumulative, _ in by_cumulative[:top]],
+        'self': [{'module': name, 'ms': self_us / 1000} for name, self_us, _, _ in by_self[:top]],
+        'packages': [{'package': package, 'ms': us / 1000}
+                     for package, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]]
+    }
+
+
+def print_report(module: str, totals: list, summary: dict, budget_ms):
+    print(f"Import profile: {module}")
+    print("=" * 50)
+    print(f"Total: {statistics.median(totals):.1f} ms median of {len(totals)} "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}); {summary['modules']} modules")
+    if budget_ms is not None:
+        print(f"Budget: {budget_ms:.1f} ms")
+
+    print("\nSlowest by cumulative time:")
+    for item in summary['cumulative']:
+        print(f"  {item['ms']:8.1f} ms  {item['module']}")
+    print("\nSlowest by self time:")
+    for item in summary['self']:
+        print(f"  {item['ms']:8.1f} ms  {item['module']}")
+    print("\nSelf time by package:")
+    for item in summary['packages']:
+        print(f"  {item['ms']:8.1f} ms  {item['package']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GuardIQ import-time profile')
+    parser.add_argument('--module', default=DEFAULT_MODULE, help=f'module to import (default: {DEFAULT_MODULE})')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to time; the median is reported')
+    parser.add_argument('--top', type=int, default=15, help='modules and packages to list')
+    parser.add_argument('--budget-ms', type=float, default=None, help='fail when the median total exceeds this')
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    try:
+        # The first run also writes .pyc files; it is not counted
+        profile_once(args.module)
+        runs = [profile_once(args.module) for _ in range(max(1, args.runs))]
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    totals = [summarize(rows, 0)['total_ms'] for rows in runs]
+    median = statistics.median(totals)
+    # Per-module figures come from the run closest to the median
+    summary = summarize(min(runs, key=lambda rows: abs(summarize(rows, 0)['total_ms'] - median)), args.top)
+    print_report(args.module, totals, summary, args.budget_ms)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'module': args.module, 'runs_ms': totals, 'median_ms': median,
+                       'budget_ms': args.budget_ms, **summary}, f, indent=2)
+
+    if args.budget_ms is not None and median > args.budget_ms:
+        print(f"\n✗ Over budget by {median - args.budget_ms:.1f} ms")
+        sys.exit(1)
+    if args.budget_ms is not None:
+        print(f"\n✓ Within budget ({args.budget_ms - median:.1f} ms to spare)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Replay verification_logs against candidate verification rules
+Re-decides every logged attempt with a baseline policy (the rules and
+suspicious-activity settings in effect) and a candidate policy, and reports
+how many outcomes would flip between success, failed, blocked and invalid,
+by role and platform.
+
+Usage:
+    python scripts/replay_verifications.py --rules candidate_rules.json
+    python scripts/replay_verifications.py --email-threshold 5 --since 2026-09-01 --jobs 16
+
+The log is split into email ranges read in parallel by worker processes,
+each streaming its range in (email, created_at) order through a named
+cursor, so per-email sliding windows replay exactly. Role, platform and
+follower thresholds are compared a batch at a time with numpy when it is
+installed. IP-based blocking isn't replayed: rows it blocked show up as
+drift between the recorded and baseline outcomes, not as flips.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+
+from setup_database import DATABASE_CONFIG
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.rules import (  # noqa: E402
+    DEFAULT_PLATFORMS, RuleSet, compile_rules, default_rules, load_rules_file
+)
+
+try:
+    import numpy as np
+except ImportError:  # numpy only speeds up the threshold comparisons
+    np = None
+
+OUTCOMES = ('success', 'failed', 'blocked', 'invalid')
+SUCCESS, FAILED, BLOCKED, INVALID = range(4)
+
+# Rows per batch; also bounds distinct emails per batch for the packed window keys
+BATCH_ROWS = 50000
+_TIME_BITS = 47
+
+REPLAY_SELECT = """
+    SELECT l.email, p.m[1], p.m[2], p.m[3]::FLOAT8, l.verification_status, l.created_at
+    FROM verification_logs l
+    CROSS JOIN LATERAL (
+        SELECT regexp_match(l.access_code, '^([^:]+):([^:]+):([0-9]+(?:\\.[0-9]*)?)$') AS m
+    ) p
+    WHERE {where}
+    ORDER BY l.email, l.created_at
+"""
+
+
+@dataclass(frozen=True)
+class Policy:
+    """Everything verify_vip decides with: follower thresholds and the per-email failure window
+
+    Thresholds are a plain ``{(role, platform): min_followers}`` dict copied
+    from a RuleSet, so policies can be sent to worker processes.
+    """
+    thresholds: dict
+    email_threshold: int
+    window: float
+    version: str = ''
+
+    @classmethod
+    def from_rules(cls, rules: RuleSet, email_threshold: int, window: float) -> 'Policy':
+        return cls(dict(rules.thresholds), email_threshold, window, rules.version)
+
+
+def load_policy_rules(source: str, db_config: dict) -> RuleSet:
+    """``default``, ``database`` (the verification_rules tables) or a rules JSON path"""
+    if source == 'default':
+        return default_rules()
+    if source != 'database':
+        return load_rules_file(source)
+
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT role, platform, min_followers FROM verification_rules WHERE is_active = TRUE")
+            rules = [{'role': role, 'platform': platform, 'min_followers': min_followers}
+                     for role, platform, min_followers in cursor.fetchall()]
+            cursor.execute("SELECT platform FROM verification_platforms WHERE is_active = TRUE")
+            platforms = [row[0] for row in cursor.fetchall()] or DEFAULT_PLATFORMS
+    finally:
+        conn.close()
+    return compile_rules(rules, platforms)
+
+
+def replay_exact(policy: Policy, rule_outcomes: List[int], times: List[float]) -> List[int]:
+    """Outcomes for one email's attempts in time order, replaying the failure window"""
+    failures = deque()
+    outcomes = []
+    for outcome, ts in zip(rule_outcomes, times):
+        cutoff = ts - policy.window
+        while failures and failures[0] < cutoff:
+            failures.popleft()
+        if outcome == INVALID:
+            # Rejected before the suspicious-activity check
+            outcomes.append(INVALID)
+        elif len(failures) >= policy.email_threshold:
+            outcomes.append(BLOCKED)
+        else:
+            outcomes.append(outcome)
+            if outcome == FAILED:
+                failures.append(ts)
+    return outcomes
+
+
+class Replayer:
+    """Replays batches of complete per-email histories under a baseline and a candidate policy
+
+    Roles and platforms are dictionary-encoded as they are seen, so each
+    policy's thresholds become a dense role x platform table.
+    """
+
+    def __init__(self, baseline: Policy, candidate: Policy):
+        self.policies = (baseline, candidate)
+        self.roles: Dict[str, int] = {}
+        self.platforms: Dict[str, int] = {}
+        self.tables = None
+        # (role code, platform code, baseline, candidate) -> rows
+        self.transitions = Counter()
+        # (recorded status, baseline) -> rows
+        self.drift = Counter()
+        self.rows = 0
+        self.unparsed = 0
+
+    def _codes(self, values, index: dict) -> list:
+        setdefault = index.setdefault
+        return [setdefault(value, len(index)) for value in values]
+
+    def _threshold_tables(self):
+        """Per-policy ``[role, platform]`` threshold arrays, -1 where the pair is invalid"""
+        shape = (len(self.roles), len(self.platforms))
+        if self.tables is None or self.tables[0].shape != shape:
+            self.tables = []
+            for policy in self.policies:
+                table = np.full(shape, -1, dtype=np.float64)
+                for role, r in self.roles.items():
+                    for platform, p in self.platforms.items():
+                        threshold = policy.thresholds.get((role, platform))
+                        if threshold is not None:
+                            table[r, p] = threshold
+                self.tables.append(table)
+        return self.tables
+
+    def add(self, rows: List[tuple]):
+        """Replay ``(email, role, platform, followers, status, created_at)`` rows in (email, created_at) order
+
+        Every email's rows must be complete within the batch.
+        """
+        parsed = [row for row in rows if row[1] is not None]
+        self.unparsed += len(rows) - len(parsed)
+        if not parsed:
+            return
+        self.rows += len(parsed)
+        emails, roles, platforms, followers, statuses, created = zip(*parsed)
+        role_codes = self._codes(roles, self.roles)
+        platform_codes = self._codes(platforms, self.platforms)
+        times = [value.timestamp() for value in created]
+
+        if np is None:
+            outcomes = [self._replay_python(policy, emails, roles, platforms, followers, times)
+                        for policy in self.policies]
+            for r, p, base, cand in zip(role_codes, platform_codes, *outcomes):
+                self.transitions[(r, p, base, cand)] += 1
+        else:
+            outcomes = self._replay_numpy(emails, role_codes, platform_codes, followers, times)
+            keys = ((np.asarray(role_codes, dtype=np.int64) * len(self.platforms) +
+                     np.asarray(platform_codes, dtype=np.int64)) * 16 + outcomes[0] * 4 + outcomes[1])
+            values, counts = np.unique(keys, return_counts=True)
+            for key, count in zip(values.tolist(), counts.tolist()):
+                pair, change = divmod(key, 16)
+                r, p = divmod(pair, len(self.platforms))
+                self.transitions[(r, p, change // 4, change % 4)] += count
+            outcomes = [outcomes[0].tolist()]
+
+        self.drift.update(zip(statuses, (OUTCOMES[o] for o in outcomes[0])))
+
+    def _replay_python(self, policy: Policy, emails, roles, platforms, followers, times) -> List[int]:
+        thresholds = policy.thresholds
+        rule_outcomes = []
+        for role, platform, count in zip(roles, platforms, followers):
+            threshold = thresholds.get((role, platform))
+            rule_outcomes.append(INVALID if threshold is None else SUCCESS if count >= threshold else FAILED)
+
+        outcomes = []
+        start = 0
+        for i in range(1, len(emails) + 1):
+            if i == len(emails) or emails[i] != emails[start]:
+                outcomes.extend(replay_exact(policy, rule_outcomes[start:i], times[start:i]))
+                start = i
+        return outcomes
+
+    def _replay_numpy(self, emails, role_codes, platform_codes, followers, times) -> list:
+        """Threshold comparisons for the whole batch at once; only emails that could hit the
+        failure threshold are replayed row by row"""
+        n = len(emails)
+        role_codes = np.asarray(role_codes, dtype=np.int64)
+        platform_codes = np.asarray(platform_codes, dtype=np.int64)
+        followers = np.asarray(followers, dtype=np.float64)
+        times = np.asarray(times, dtype=np.float64)
+
+        # Email group ids (rows arrive sorted by email) packed above millisecond offsets
+        email_ids = np.zeros(n, dtype=np.int64)
+        if n > 1:
+            changed = np.fromiter((a != b for a, b in zip(emails, emails[1:])), dtype=bool, count=n - 1)
+            email_ids[1:] = np.cumsum(changed)
+        offsets = np.round((times - times.min()) * 1000).astype(np.int64)
+        keys = (email_ids << _TIME_BITS) | offsets
+
+        results = []
+        for policy, table in zip(self.policies, self._threshold_tables()):
+            thresholds = table[role_codes, platform_codes]
+            invalid = thresholds < 0
+            failed = ~invalid & (followers < thresholds)
+            outcomes = np.where(invalid, INVALID, np.where(failed, FAILED, SUCCESS)).astype(np.int64)
+
+            # Failures inside each row's window, counting every rule failure (blocking only
+            # removes failures, so this is an upper bound); rows under the threshold can't be blocked
+            cumulative = np.concatenate(([0], np.cumsum(failed)))
+            starts = np.searchsorted(keys, keys - int(policy.window * 1000), side='left')
+            prior = cumulative[:n] - cumulative[starts]
+            hot = np.unique(email_ids[~invalid & (prior >= policy.email_threshold)])
+            for email_id in hot.tolist():
+                lo, hi = np.searchsorted(email_ids, [email_id, email_id + 1])
+                outcomes[lo:hi] = replay_exact(policy, outcomes[lo:hi].tolist(), times[lo:hi].tolist())
+            results.append(outcomes)
+        return results
+
+    def summary(self) -> dict:
+        roles = {code: name for name, code in self.roles.items()}
+        platforms = {code: name for name, code in self.platforms.items()}
+        return {
+            'rows': self.rows,
+            'unparsed': self.unparsed,
+            'transitions': [(roles[r], platforms[p], OUTCOMES[base], OUTCOMES[cand], count)
+                            for (r, p, base, cand), count in self.transitions.items()],
+            'drift': [(recorded, baseline, count) for (recorded, baseline), count in self.drift.items()]
+        }
+
+
+def replay_range(task: dict) -> dict:
+    """Worker: stream one email range and replay it"""
+    where = ['l.created_at >= %s', 'l.created_at < %s']
+    params = [task['since'], task['until']]
+    if task['low'] is None:
+        # The first range also takes rows without an email
+        where.append('(l.email IS NULL OR l.email < %s)' if task['high'] is not None else 'TRUE')
+    else:
+        where.append('l.email >= %s')
+        params.append(task['low'])
+        if task['high'] is not None:
+            where.append('l.email < %s')
+    if task['high'] is not None:
+        params.append(task['high'])
+
+    started = time.perf_counter()
+    replayer = Replayer(task['baseline'], task['candidate'])
+    conn = psycopg2.connect(**task['db_config'])
+    try:
+        cursor = conn.cursor(name='replay_verifications')
+        cursor.itersize = BATCH_ROWS
+        cursor.execute(REPLAY_SELECT.format(where=' AND '.join(where)), params)
+        carry = []
+        while True:
+            rows = cursor.fetchmany(BATCH_ROWS)
+            if not rows:
+                break
+            batch = carry + rows
+            # Hold back the last email, which may continue in the next fetch; an email with
+            # more than 4 batches of attempts is replayed in pieces
+            split = len(batch)
+            while split > 0 and batch[split - 1][0] == batch[-1][0]:
+                split -= 1
+            if split == 0 and len(batch) < BATCH_ROWS * 4:
+                carry = batch
+                continue
+            split = split or len(batch)
+            replayer.add(batch[:split])
+            carry = batch[split:]
+        if carry:
+            replayer.add(carry)
+        cursor.close()
+        conn.rollback()
+    finally:
+        conn.close()
+
+    summary = replayer.summary()
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def email_ranges(db_config: dict, since: datetime, until: datetime, parts: int,
+                 sample_percent: float) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Split the email keyspace into roughly equal ranges from a table sample"""
+    if parts <= 1:
+        return [(None, None)]
+    fractions = [i / parts for i in range(1, parts)]
+    conn = psycopg2.connect(**db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT percentile_disc(%s::FLOAT8[]) WITHIN GROUP (ORDER BY email)
+                FROM verification_logs TABLESAMPLE SYSTEM (%s)
+                WHERE email IS NOT NULL AND created_at >= %s AND created_at < %s
+            """, (fractions, sample_percent, since, until))
+            bounds = cursor.fetchone()[0] or []
+    finally:
+        conn.close()
+
+    bounds = sorted(set(bound for bound in bounds if bound is not None))
+    edges = [None] + bounds + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def merge(summaries: List[dict]) -> dict:
+    transitions = Counter()
+    drift = Counter()
+    rows = unparsed = 0
+    for summary in summaries:
+        rows += summary['rows']
+        unparsed += summary['unparsed']
+        for role, platform, base, cand, count in summary['transitions']:
+            transitions[(role, platform, base, cand)] += count
+        for recorded, baseline, count in summary['drift']:
+            drift[(recorded, baseline)] += count
+
+    groups = {}
+    for (role, platform, base, cand), count in transitions.items():
+        group = groups.setdefault((role, platform), {'role': role, 'platform': platform, 'rows': 0,
+                                                     'flipped': 0, 'changes': Counter()})
+        group['rows'] += count
+        if base != cand:
+            group['flipped'] += count
+            group['changes'][f"{base}->{cand}"] += count
+
+    by_group = sorted(groups.values(), key=lambda group: (-group['flipped'], group['role'], group['platform']))
+    for group in by_group:
+        group['changes'] = dict(group['changes'].most_common())
+
+    changes = Counter()
+    for group in by_group:
+        changes.update(group['changes'])
+    return {
+        'rows': rows,
+        'unparsed': unparsed,
+        'flipped': sum(group['flipped'] for group in by_group),
+        'changes': dict(changes.most_common()),
+        'by_role_platform': by_group,
+        'drift': {f"{recorded}->{baseline}": count for (recorded, baseline), count in drift.most_common()
+                  if recorded != baseline}
+    }
+
+
+def print_report(report: dict, seconds: float):
+    rows = report['rows']
+    print(f"Replayed {rows:,} attempts in {seconds:.1f}s ({rows / max(seconds, 1e-9):,.0f} rows/s); "
+          f"{report['unparsed']:,} rows without a role:platform:followers access_code skipped")
+    print(f"Flipped: {report['flipped']:,} ({report['flipped'] / max(rows, 1):.2%})")
+    for change, count in report['changes'].items():
+        print(f"  {change:<20} {count:>12,}")
+
+    flipped = [group for group in report['by_role_platform'] if group['flipped']]
+    if flipped:
+        print(f"\n{'Role':<18} {'Platform':<12} {'Rows':>12} {'Flipped':>10}  Changes")
+        for group in flipped:
+            changes = ', '.join(f"{change} {count:,}" for change, count in group['changes'].items())
+            print(f"{group['role']:<18} {group['platform']:<12} {group['rows']:>12,} {group['flipped']:>10,}  {changes}")
+
+    drift = sum(report['drift'].values())
+    if drift:
+        print(f"\nBaseline replay differs from the recorded outcome for {drift:,} rows "
+              "(IP blocks, rate limiting, or rules changed since):")
+        for change, count in report['drift'].items():
+            print(f"  recorded {change:<20} {count:>12,}")
+
+
+def parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay verification_logs under candidate rules and report flipped outcomes")
+    parser.add_argument('--rules', default='default',
+                        help="Candidate rules: a rules JSON file, 'database' or 'default' (default: %(default)s)")
+    parser.add_argument('--baseline-rules', default=os.getenv('VERIFICATION_RULES_SOURCE', 'default'),
+                        help="Rules the logs were decided with; 'file' means VERIFICATION_RULES_PATH")
+    parser.add_argument('--email-threshold', type=int, help="Candidate failed attempts per email before blocking")
+    parser.add_argument('--window', type=float, help="Candidate failure window in seconds")
+    parser.add_argument('--since', type=parse_time, default=datetime.min, help="Replay logs created at or after (ISO 8601)")
+    parser.add_argument('--until', type=parse_time, default=datetime.max, help="Replay logs created before (ISO 8601)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 4, help="Worker processes")
+    parser.add_argument('--ranges-per-job', type=int, default=4, help="Email ranges per worker, for load balancing")
+    parser.add_argument('--sample-percent', type=float, default=0.1, help="Table sample used to split email ranges")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    baseline_source = args.baseline_rules
+    if baseline_source == 'file':
+        baseline_source = os.getenv('VERIFICATION_RULES_PATH', os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend', 'verification_rules.json'))
+
+    try:
+        baseline = Policy.from_rules(
+            load_policy_rules(baseline_source, DATABASE_CONFIG),
+            email_threshold=int(os.getenv('SUSPICIOUS_EMAIL_THRESHOLD', '3')),
+            window=float(os.getenv('SUSPICIOUS_WINDOW', '3600'))
+        )
+        candidate = Policy.from_rules(
+            load_policy_rules(args.rules, DATABASE_CONFIG),
+            email_threshold=args.email_threshold if args.email_threshold is not None else baseline.email_threshold,
+            window=args.window if args.window is not None else baseline.window
+        )
+        ranges = email_ranges(DATABASE_CONFIG, args.since, args.until, args.jobs * args.ranges_per_job,
+                              args.sample_percent)
+    except (OSError, ValueError, KeyError, psycopg2.Error) as e:
+        print(f"Replay setup failed: {e}")
+        sys.exit(1)
+
+    if not args.json:
+        print(f"Baseline rules {baseline.version} (email threshold {baseline.email_threshold}, "
+              f"window {baseline.window:g}s) vs candidate {candidate.version} "
+              f"(email threshold {candidate.email_threshold}, window {candidate.window:g}s)")
+        print(f"Replaying {len(ranges)} email ranges with {args.jobs} workers...")
+
+    started = time.perf_counter()
+    summaries = []
+    tasks = [{'db_config': DATABASE_CONFIG, 'baseline': baseline, 'candidate': candidate,
+              'since': args.since, 'until': args.until, 'low': low, 'high': high} for low, high in ranges]
+    try:
+        with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            for future in as_completed([pool.submit(replay_range, task) for task in tasks]):
+                summaries.append(future.result())
+                if not args.json:
+                    done = sum(summary['rows'] for summary in summaries)
+                    print(f"  {len(summaries)}/{len(tasks)} ranges, {done:,} rows, "
+                          f"{done / (time.perf_counter() - started):,.0f} rows/s")
+    except psycopg2.Error as e:
+        print(f"Replay failed: {e}")
+        sys.exit(1)
+
+    report = merge(summaries)
+    seconds = time.perf_counter() - started
+    if args.json:
+        report['seconds'] = round(seconds, 3)
+        print(json.dumps(report, indent=2))
+    else:
+        print()
+        print_report(report, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,8 @@ Run this script to initialize the PostgreSQL database
 """
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+import argparse
 import os
 import sys
 
@@ -18,6 +19,11 @@ DATABASE_CONFIG = {
     'port': os.getenv('DB_PORT', '5432')
 }
 
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Monthly verification_logs partitions created ahead of time
+PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+
 def create_database():
     """Create the GuardIQ database if it doesn't exist"""
     try:
@@ -50,6 +56,87 @@ def create_database():
         print(f"Error creating database: {e}")
         return False
 
+def run_sql_file(cursor, path):
+    """Execute a SQL script, skipping psql meta-commands such as \\c"""
+    with open(path, encoding='utf-8') as f:
+        sql = ''.join(line for line in f if not line.lstrip().startswith('\\'))
+    cursor.execute(sql)
+
+def setup_verification_logs(cursor):
+    """Create verification_logs range-partitioned by created_at
+    
+    An existing unpartitioned table is renamed to verification_logs_legacy
+    and its rows are copied into the partitioned table.
+    """
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('verification_logs')")
+    row = cursor.fetchone()
+    legacy = row is not None and row[0] == 'r'
+    
+    if legacy:
+        print("Migrating verification_logs to a partitioned table...")
+        cursor.execute("ALTER TABLE verification_logs RENAME TO verification_logs_legacy")
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS verification_logs (
+            id BIGSERIAL,
+            email VARCHAR(255),
+            access_code VARCHAR(100),
+            verification_status VARCHAR(20),
+            ip_address VARCHAR(45),
+            user_agent TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    
+    # Covering indexes for the per-email and per-status time range queries
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_verification_logs_email_created
+        ON verification_logs (email, created_at) INCLUDE (verification_status, ip_address)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_verification_logs_status_created
+        ON verification_logs (verification_status, created_at) INCLUDE (email)
+    """)
+    # Per-IP failure counts while the in-memory detector is cold
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_verification_logs_ip_failed
+        ON verification_logs (ip_address, created_at) WHERE verification_status = 'failed'
+    """)
+    # Keyset pagination order for exports
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_verification_logs_created_id
+        ON verification_logs (created_at, id)
+    """)
+    
+    # Partition maintenance functions
+    run_sql_file(cursor, os.path.join(SCRIPTS_DIR, '05_partition_verification_logs.sql'))
+    
+    start_month = None
+    if legacy:
+        cursor.execute("SELECT MIN(created_at) FROM verification_logs_legacy")
+        start_month = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT create_verification_log_partitions(%s, COALESCE(%s::date, CURRENT_DATE))",
+        (PARTITION_MONTHS_AHEAD, start_month)
+    )
+    
+    if legacy:
+        cursor.execute("""
+            INSERT INTO verification_logs
+            (id, email, access_code, verification_status, ip_address, user_agent, created_at)
+            SELECT id, email, access_code, verification_status, ip_address, user_agent,
+                   COALESCE(created_at, CURRENT_TIMESTAMP)
+            FROM verification_logs_legacy
+        """)
+        copied = cursor.rowcount
+        cursor.execute("""
+            SELECT setval(pg_get_serial_sequence('verification_logs', 'id'),
+                          COALESCE((SELECT MAX(id) FROM verification_logs), 0) + 1, false)
+        """)
+        print(f"Copied {copied} rows; drop verification_logs_legacy once verified "
+              "and re-apply 03_functions_and_triggers.sql to attach triggers")
+
 def setup_tables():
     """Create tables and insert sample data"""
     try:
@@ -74,18 +161,20 @@ def setup_tables():
             )
         """)
         
-        # Create verification logs table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS verification_logs (
-                id SERIAL PRIMARY KEY,
-                email VARCHAR(255),
-                access_code VARCHAR(100),
-                verification_status VARCHAR(20),
-                ip_address VARCHAR(45),
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        # Create verification logs table, partitioned by month
+        setup_verification_logs(cursor)
+        
+        # Announce vip_users changes so API workers can invalidate cached lookups
+        run_sql_file(cursor, os.path.join(SCRIPTS_DIR, '06_vip_user_notifications.sql'))
+        
+        # Hourly/daily rollups for dashboard time series, backfilled on first install
+        run_sql_file(cursor, os.path.join(SCRIPTS_DIR, '07_verification_rollups.sql'))
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM verification_rollups_hourly)")
+        if not cursor.fetchone()[0]:
+            cursor.execute("SELECT rebuild_verification_rollups()")
+        
+        # Security events raised by the API, written in batches
+        run_sql_file(cursor, os.path.join(SCRIPTS_DIR, '08_security_events.sql'))
         
         print("Tables created successfully")
         
@@ -99,12 +188,11 @@ def setup_tables():
             ('David Brown', 'david.brown@trinova.com', '+1-555-0105', 'TriNova Security', 'Level 4', 'GUARDIAN2024ELITE')
         ]
         
-        for user in sample_users:
-            cursor.execute("""
-                INSERT INTO vip_users (full_name, email, phone, organization, security_clearance, access_code)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (email) DO NOTHING
-            """, user)
+        execute_values(cursor, """
+            INSERT INTO vip_users (full_name, email, phone, organization, security_clearance, access_code)
+            VALUES %s
+            ON CONFLICT (email) DO NOTHING
+        """, sample_users)
         
         conn.commit()
         cursor.close()
@@ -121,8 +209,24 @@ def setup_tables():
         print(f"Error setting up tables: {e}")
         return False
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Set up the GuardIQ database and optionally bulk load data")
+    parser.add_argument('--load', action='append', metavar='TABLE=PATH',
+                        help="Load a CSV (with header) or NDJSON file, optionally .gz, into vip_users or verification_logs")
+    parser.add_argument('--synthetic', action='append', metavar='TABLE=ROWS',
+                        help="Generate ROWS synthetic rows for vip_users or verification_logs")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 4, help="Parallel loader processes")
+    parser.add_argument('--chunk-rows', type=int, default=50000, help="Rows per COPY chunk (one checkpoint each)")
+    parser.add_argument('--keep-indexes', action='store_true',
+                        help="Load with secondary indexes in place instead of rebuilding them afterwards")
+    parser.add_argument('--restart', action='store_true', help="Ignore checkpoints from an earlier run of the same load")
+    parser.add_argument('--seed', type=int, default=42, help="Synthetic data seed")
+    parser.add_argument('--synthetic-days', type=int, default=90, help="Days of history spanned by synthetic logs")
+    return parser.parse_args(argv)
+
 def main():
     """Main setup function"""
+    args = parse_args()
     print("GuardIQ Database Setup")
     print("=" * 30)
     
@@ -136,6 +240,23 @@ def main():
         print("Failed to setup tables")
         sys.exit(1)
     
+    if args.load or args.synthetic:
+        # Imported here so a plain setup doesn't need the loader
+        from bulk_loader import BulkLoader, parse_sources
+        
+        print("\nBulk loading...")
+        try:
+            sources = parse_sources(args.load, args.synthetic, seed=args.seed, days=args.synthetic_days)
+            loader = BulkLoader(jobs=args.jobs, chunk_rows=args.chunk_rows, rebuild_indexes=not args.keep_indexes)
+            loader.load(sources, restart=args.restart)
+        except (ValueError, OSError) as e:
+            print(f"Bulk load failed: {e}")
+            sys.exit(1)
+        except psycopg2.Error as e:
+            print(f"Bulk load failed: {e}")
+            print("Re-run the same command to resume from the last loaded chunk")
+            sys.exit(1)
+    
     print("\nDatabase setup completed successfully!")
     print("You can now start the Flask backend server.")
 
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for verification_logs
+Run this daily (e.g. from cron) to create upcoming monthly partitions and
+detach or archive partitions older than the retention period.
+"""
+
+import argparse
+import sys
+
+import psycopg2
+
+from setup_database import DATABASE_CONFIG, PARTITION_MONTHS_AHEAD
+
+def main():
+    """Main retention function"""
+    parser = argparse.ArgumentParser(description='verification_logs partition maintenance')
+    parser.add_argument('--months-ahead', type=int, default=PARTITION_MONTHS_AHEAD,
+                        help='future monthly partitions to keep created')
+    parser.add_argument('--months-to-keep', type=int, default=3,
+                        help='months of history to keep attached')
+    parser.add_argument('--archive-schema',
+                        help='move detached partitions into this schema instead of dropping them')
+    args = parser.parse_args()
+    
+    try:
+        conn = psycopg2.connect(**DATABASE_CONFIG)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT create_verification_log_partitions(%s)", (args.months_ahead,))
+        created = cursor.fetchone()[0]
+        
+        cursor.execute(
+            "SELECT detach_old_verification_log_partitions(%s, %s)",
+            (args.months_to_keep, args.archive_schema)
+        )
+        detached = cursor.fetchone()[0]
+        
+        conn.commit()
+        cursor.close()
+        conn.close()
+        
+    except psycopg2.Error as e:
+        print(f"Retention error: {e}")
+        sys.exit(1)
+    
+    action = f"archived to '{args.archive_schema}'" if args.archive_schema else "dropped"
+    print(f"Created {created} partition(s); {detached} partition(s) detached and {action}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+-- Keyset pagination order for the backend's streaming threat_detections export
+CREATE INDEX IF NOT EXISTS idx_threat_detections_created_at_id
+ON public.threat_detections (created_at, id);
@@ -0,0 +1,29 @@
+-- Deduplication key for bulk ingestion: one detection per (vip_id, platform, content_url).
+-- Rows without a content_url stay distinct (NULLs never conflict).
+
+-- Fold existing duplicates into the oldest row before the unique index is built
+WITH ranked AS (
+  SELECT id,
+         first_value(id) OVER (PARTITION BY vip_id, platform, content_url ORDER BY created_at, id) AS keep_id
+  FROM public.threat_detections
+  WHERE content_url IS NOT NULL
+),
+duplicates AS (
+  SELECT id, keep_id FROM ranked WHERE id <> keep_id
+),
+relinked AS (
+  UPDATE public.campaign_networks c
+  SET detection_id = d.keep_id
+  FROM duplicates d
+  WHERE c.detection_id = d.id
+  RETURNING c.id
+)
+DELETE FROM public.threat_detections t
+USING duplicates d
+WHERE t.id = d.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_threat_detections_dedupe
+ON public.threat_detections (vip_id, platform, content_url);
+
+CREATE INDEX IF NOT EXISTS idx_campaign_networks_detection_id
+ON public.campaign_networks (detection_id);
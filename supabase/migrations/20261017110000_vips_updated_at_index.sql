@@ -0,0 +1,3 @@
+-- Lets the backend's VIP match index poll for changed vips rows
+CREATE INDEX IF NOT EXISTS idx_vips_updated_at
+ON public.vips (updated_at);
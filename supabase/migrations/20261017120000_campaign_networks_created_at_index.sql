@@ -0,0 +1,3 @@
+-- Lets the backend's campaign account graph poll for new campaign_networks rows
+CREATE INDEX IF NOT EXISTS idx_campaign_networks_created_at
+ON public.campaign_networks (created_at);
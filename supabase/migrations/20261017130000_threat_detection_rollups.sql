@@ -0,0 +1,127 @@
+-- Hourly and daily threat_detections counts by threat_type and platform for
+-- the backend's /api/timeseries. Buckets are UTC. Statement-level triggers
+-- apply each insert, update or delete statement as one net upsert per
+-- bucket, so a 2,000-row ingest batch touches a few rollup rows, and rows
+-- that arrive late, or move between types or buckets, are counted where
+-- they belong.
+
+CREATE TABLE IF NOT EXISTS public.threat_detection_rollups_hourly (
+  bucket TIMESTAMP NOT NULL,
+  threat_type threat_type NOT NULL,
+  platform platform_type NOT NULL,
+  detections BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, threat_type, platform)
+);
+
+CREATE TABLE IF NOT EXISTS public.threat_detection_rollups_daily (
+  bucket DATE NOT NULL,
+  threat_type threat_type NOT NULL,
+  platform platform_type NOT NULL,
+  detections BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, threat_type, platform)
+);
+
+-- Aggregates across every user's VIPs: readable only with the service role
+ALTER TABLE public.threat_detection_rollups_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.threat_detection_rollups_daily ENABLE ROW LEVEL SECURITY;
+
+-- Add per-(hour, threat_type, platform) deltas to both rollups
+CREATE OR REPLACE FUNCTION public.upsert_threat_detection_rollups(
+  buckets TIMESTAMP[], threat_types threat_type[], platforms platform_type[], deltas BIGINT[]
+)
+RETURNS VOID
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+  INSERT INTO threat_detection_rollups_hourly AS r (bucket, threat_type, platform, detections)
+  SELECT * FROM unnest(buckets, threat_types, platforms, deltas)
+  ORDER BY 1, 2, 3
+  ON CONFLICT (bucket, threat_type, platform) DO UPDATE
+  SET detections = r.detections + EXCLUDED.detections;
+
+  INSERT INTO threat_detection_rollups_daily AS r (bucket, threat_type, platform, detections)
+  SELECT c.bucket::DATE, c.threat_type, c.platform, SUM(c.delta)
+  FROM unnest(buckets, threat_types, platforms, deltas) AS c(bucket, threat_type, platform, delta)
+  GROUP BY 1, 2, 3
+  ORDER BY 1, 2, 3
+  ON CONFLICT (bucket, threat_type, platform) DO UPDATE
+  SET detections = r.detections + EXCLUDED.detections;
+$$;
+
+REVOKE ALL ON FUNCTION public.upsert_threat_detection_rollups(TIMESTAMP[], threat_type[], platform_type[], BIGINT[])
+FROM PUBLIC, anon, authenticated;
+
+CREATE OR REPLACE FUNCTION public.apply_threat_detection_rollups()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM upsert_threat_detection_rollups(array_agg(bucket), array_agg(threat_type), array_agg(platform), array_agg(delta))
+    FROM (
+      SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AS bucket, threat_type, platform, COUNT(*) AS delta
+      FROM new_detections GROUP BY 1, 2, 3
+    ) c;
+  ELSIF TG_OP = 'UPDATE' THEN
+    -- Status-only updates net out to nothing and skip the rollups entirely
+    PERFORM upsert_threat_detection_rollups(array_agg(bucket), array_agg(threat_type), array_agg(platform), array_agg(delta))
+    FROM (
+      SELECT bucket, threat_type, platform, SUM(delta) AS delta
+      FROM (
+        SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AS bucket, threat_type, platform, 1 AS delta
+        FROM new_detections
+        UNION ALL
+        SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC'), threat_type, platform, -1
+        FROM old_detections
+      ) changes
+      GROUP BY 1, 2, 3
+      HAVING SUM(delta) <> 0
+    ) c;
+  ELSE
+    PERFORM upsert_threat_detection_rollups(array_agg(bucket), array_agg(threat_type), array_agg(platform), array_agg(delta))
+    FROM (
+      SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC') AS bucket, threat_type, platform, -COUNT(*) AS delta
+      FROM old_detections GROUP BY 1, 2, 3
+    ) c;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS threat_detection_rollups_insert ON public.threat_detections;
+CREATE TRIGGER threat_detection_rollups_insert
+  AFTER INSERT ON public.threat_detections
+  REFERENCING NEW TABLE AS new_detections
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.apply_threat_detection_rollups();
+
+DROP TRIGGER IF EXISTS threat_detection_rollups_update ON public.threat_detections;
+CREATE TRIGGER threat_detection_rollups_update
+  AFTER UPDATE ON public.threat_detections
+  REFERENCING OLD TABLE AS old_detections NEW TABLE AS new_detections
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.apply_threat_detection_rollups();
+
+DROP TRIGGER IF EXISTS threat_detection_rollups_delete ON public.threat_detections;
+CREATE TRIGGER threat_detection_rollups_delete
+  AFTER DELETE ON public.threat_detections
+  REFERENCING OLD TABLE AS old_detections
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION public.apply_threat_detection_rollups();
+
+-- Backfill existing detections
+TRUNCATE public.threat_detection_rollups_hourly, public.threat_detection_rollups_daily;
+
+INSERT INTO public.threat_detection_rollups_hourly (bucket, threat_type, platform, detections)
+SELECT date_trunc('hour', created_at AT TIME ZONE 'UTC'), threat_type, platform, COUNT(*)
+FROM public.threat_detections
+GROUP BY 1, 2, 3;
+
+INSERT INTO public.threat_detection_rollups_daily (bucket, threat_type, platform, detections)
+SELECT bucket::DATE, threat_type, platform, SUM(detections)
+FROM public.threat_detection_rollups_hourly
+GROUP BY 1, 2, 3;